@@ -0,0 +1,14 @@
+"""
+Benchmarks for the static site generator.
+
+Run the stage benchmark suite with `python3 -m bench run` and compare
+two result files with `python3 -m bench compare`. The standalone
+bench_*.py scripts measure single components.
+"""
+import os
+import sys
+
+SRC_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "..", "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,77 @@
+import argparse
+import json
+import platform
+import sys
+
+from .corpus import SHAPES, CorpusSpec
+from .modes import run_modes
+from .stages import compare, run_stages
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+            prog="python3 -m bench",
+            description="Time each build stage on a synthetic site.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Run the stage benchmarks")
+    modes = commands.add_parser(
+            "modes", help="Compare the serial and pipelined page builds")
+    modes.add_argument("--io-jobs", type=int, default=4)
+    for command in (run, modes):
+        command.add_argument("--shape", choices=SHAPES,
+                             default="small-posts")
+        command.add_argument("--pages", type=int, default=200)
+        command.add_argument("--page-kb", type=float, default=4)
+        command.add_argument("--static-files", type=int, default=50)
+        command.add_argument("--static-kb", type=float, default=16)
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--repeat", type=int, default=3)
+        command.add_argument("-o", "--output",
+                             help="Write results to this file")
+    diff = commands.add_parser(
+            "compare", help="Fail when a stage regressed past a threshold")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=0.1,
+                      help="Allowed slowdown, 0.1 is 10 percent")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args: argparse.Namespace = parse_args(argv)
+    if args.command in ("run", "modes"):
+        spec: CorpusSpec = CorpusSpec(args.shape, args.pages, args.page_kb,
+                                      args.static_files, args.static_kb,
+                                      args.seed)
+        if args.command == "run":
+            results: dict = run_stages(spec, args.repeat)
+            for name, result in results["stages"].items():
+                print(f"{name:<20}{result['seconds'] * 1000:>10.1f} ms")
+        else:
+            results = run_modes(spec, args.repeat, args.io_jobs)
+            for name, result in results["modes"].items():
+                print(f"{name:<20}{result['seconds'] * 1000:>10.1f} ms"
+                      + f"{result['pages_per_second']:>10.0f} pages/s")
+        results["python"] = platform.python_version()
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=1)
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline: dict = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current: dict = json.load(f)
+    if baseline.get("corpus") != current.get("corpus"):
+        print("Warning: results were measured on different corpora.")
+    regressions = compare(baseline, current, args.threshold)
+    for name, before, after in regressions:
+        print(f"Regression in {name}: {before * 1000:.1f} ms -> "
+              + f"{after * 1000:.1f} ms ({after / before - 1:+.0%})")
+    if regressions:
+        return 1
+    print("No stage regressed past the threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
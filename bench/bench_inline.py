@@ -0,0 +1,86 @@
+"""
+Pathological-input benchmark for text_to_textnodes.
+
+Times the single pass scanner against the previous five pass
+pipeline on paragraphs with a growing number of inline spans and
+checks that the scanner's time per character stays flat, i.e. that
+it scales linearly with the input size.
+
+Usage: python3 bench/bench_inline.py [--max-spans N]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from inline_markdown import (split_nodes_delimiter, split_nodes_image,  # noqa: E402
+                             split_nodes_link, text_to_textnodes)
+from textnode import TextNode, TextType  # noqa: E402
+
+SHAPES: dict[str, str] = {
+    "bold": "**bold** text ",
+    "mixed": "**b** _i_ `c` ",
+    "links": "[link](/a/b) ",
+    "images": "![alt](/images/a.png) ",
+    "plain_brackets": "[not a link] (nor this) ",
+}
+MAX_GROWTH: float = 3.0
+
+
+def text_to_textnodes_multipass(text: str) -> list[TextNode]:
+    text_nodes: list[TextNode] = [TextNode(text, TextType.TEXT)]
+    text_nodes = split_nodes_delimiter(text_nodes, "**", TextType.BOLD)
+    text_nodes = split_nodes_delimiter(text_nodes, "_", TextType.ITALIC)
+    text_nodes = split_nodes_delimiter(text_nodes, "`", TextType.CODE)
+    text_nodes = split_nodes_image(text_nodes)
+    return split_nodes_link(text_nodes)
+
+
+def time_per_char(func: Callable[[str], list], text: str) -> float:
+    best: float = float("inf")
+    for _ in range(3):
+        start: float = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(text) * 1e9
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-spans", type=int, default=16000)
+    args = parser.parse_args()
+    sizes: list[int] = []
+    spans: int = 1000
+    while spans <= args.max_spans:
+        sizes.append(spans)
+        spans *= 2
+    failed: bool = False
+    print(f"{'shape':<16}{'spans':>8}{'scanner ns/char':>18}"
+          + f"{'multipass ns/char':>20}")
+    for shape, unit in SHAPES.items():
+        per_char: list[float] = []
+        for spans in sizes:
+            text: str = unit * spans
+            if text_to_textnodes(text) != text_to_textnodes_multipass(text):
+                print(f"{shape}: scanner output differs from multipass")
+                return 1
+            scanner: float = time_per_char(text_to_textnodes, text)
+            multipass: float = time_per_char(text_to_textnodes_multipass,
+                                             text)
+            per_char.append(scanner)
+            print(f"{shape:<16}{spans:>8}{scanner:>18.1f}{multipass:>20.1f}")
+        growth: float = per_char[-1] / per_char[0]
+        print(f"{shape:<16}{'growth':>8}{growth:>18.2f}")
+        if growth > MAX_GROWTH:
+            failed = True
+    if failed:
+        print(f"Scanner time per character grew more than {MAX_GROWTH}x.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
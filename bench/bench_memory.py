@@ -0,0 +1,133 @@
+"""
+Memory benchmark for the node classes.
+
+Parses a synthetic reference page into TextNodes and an HTMLNode
+tree while tracing allocations with tracemalloc, and reports the
+bytes retained per node. The same nodes are also measured in the
+dict based layout the classes had before they were slotted, where
+every instance has a __dict__ and every link or image its own props
+dict, to show what the slots save.
+
+Usage: python3 bench/bench_memory.py [--paragraphs N]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from htmlnode import HTMLNode  # noqa: E402
+from inline_markdown import text_to_textnodes  # noqa: E402
+from markdown_blocks import markdown_to_html_node  # noqa: E402
+from textnode import TextNode, TextType  # noqa: E402
+
+PARAGRAPH: str = ("See **the option** and _its default_ in `config.py`, "
+                  + "the [reference](/docs/reference) and "
+                  + "![diagram](/images/diagram.png) for details.")
+
+
+class DictTextNode:
+    """
+    TextNode as it was laid out before slots.
+    """
+
+    def __init__(self, text: str, text_type: TextType,
+                 url: Optional[str] = None) -> None:
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    """
+    HTMLNode as it was laid out before slots and shared props.
+    """
+
+    def __init__(self, tag: Optional[str] = None,
+                 value: Optional[str] = None,
+                 children: Optional[list["DictHTMLNode"]] = None,
+                 props: Optional[dict] = None) -> None:
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def dict_text_nodes(nodes: list[TextNode]) -> list[DictTextNode]:
+    return [DictTextNode(node.text, node.text_type, node.url)
+            for node in nodes]
+
+
+def dict_html_node(node: HTMLNode) -> DictHTMLNode:
+    return DictHTMLNode(
+            node.tag, node.value,
+            None if node.children is None
+            else [dict_html_node(child) for child in node.children],
+            None if node.props is None else dict(node.props))
+
+
+def count_nodes(root: HTMLNode) -> int:
+    count: int = 0
+    stack: list[HTMLNode] = [root]
+    while stack:
+        node: HTMLNode = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+
+def measure(label: str, build) -> float:
+    """
+    Print and return the bytes retained per node by the nodes build
+    returns with their count.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    nodes, count = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained: int = after - before
+    print(f"{label:<20}{count:>10} nodes{retained / 1024 / 1024:>10.1f} MB"
+          + f"{retained / count:>10.1f} bytes/node")
+    del nodes
+    return retained / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    args = parser.parse_args()
+    markdown: str = "\n\n".join([PARAGRAPH] * args.paragraphs)
+
+    def build_text_nodes() -> tuple[list, int]:
+        text_nodes: list = [text_to_textnodes(PARAGRAPH)
+                            for _ in range(args.paragraphs)]
+        return text_nodes, sum(map(len, text_nodes))
+
+    def build_html_nodes() -> tuple[HTMLNode, int]:
+        root: HTMLNode = markdown_to_html_node(markdown)
+        return root, count_nodes(root)
+
+    def build_dict_text_nodes() -> tuple[list, int]:
+        text_nodes, count = build_text_nodes()
+        return [dict_text_nodes(nodes) for nodes in text_nodes], count
+
+    def build_dict_html_nodes() -> tuple[DictHTMLNode, int]:
+        root, count = build_html_nodes()
+        return dict_html_node(root), count
+
+    for label, build, baseline in (
+            ("TextNode", build_text_nodes, build_dict_text_nodes),
+            ("HTMLNode", build_html_nodes, build_dict_html_nodes)):
+        slotted: float = measure(label, build)
+        unslotted: float = measure(f"{label} (dict)", baseline)
+        print(f"{label} slots save {1 - slotted / unslotted:.0%} per node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Peak memory benchmark for rendering a large HTMLNode tree.
+
+Builds a page of the requested size, then measures with tracemalloc
+the peak memory used by to_html() and by write_html() streaming into
+a file, relative to the size of the rendered output.
+
+Usage: python3 bench/bench_render.py [--megabytes N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from htmlnode import HTMLNode, LeafNode, ParentNode  # noqa: E402
+
+PARAGRAPH: list[tuple] = [
+    (None, "Some plain text with "),
+    ("b", "bold"),
+    (None, " and "),
+    ("a", "a link", {"href": "/blog/post"}),
+    (None, " in a long enough sentence."),
+]
+
+
+def build_page(megabytes: float) -> tuple[HTMLNode, int]:
+    paragraph: ParentNode = ParentNode(
+            "p", [LeafNode(*leaf) for leaf in PARAGRAPH])
+    size: int = len(paragraph.to_html())
+    count: int = int(megabytes * 1024 * 1024 / size)
+    sections: list[HTMLNode] = [
+            ParentNode("section", [ParentNode(
+                "p", [LeafNode(*leaf) for leaf in PARAGRAPH])
+                for _ in range(100)])
+            for _ in range(count // 100)]
+    page: ParentNode = ParentNode("div", sections)
+    return page, len(page.to_html())
+
+
+def measure(label: str, output_size: int, func) -> None:
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    func()
+    elapsed: float = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12}{elapsed:>8.2f}s{peak / 1024 / 1024:>10.1f} MB"
+          + f"{peak / output_size:>8.2f}x output")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megabytes", type=float, default=50)
+    args = parser.parse_args()
+    page, output_size = build_page(args.megabytes)
+    print(f"output size {output_size / 1024 / 1024:.1f} MB")
+    measure("to_html", output_size, page.to_html)
+    with tempfile.TemporaryFile("w", encoding="utf-8") as f:
+        measure("write_html", output_size, lambda: page.write_html(f.write))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import random
+
+SHAPES: tuple[str, ...] = ("small-posts", "huge-pages", "inline-heavy",
+                           "list-heavy", "code-heavy")
+WORDS: tuple[str, ...] = ("elf", "ring", "hobbit", "shire", "river", "stone",
+                          "song", "road", "tower", "forest", "light", "age")
+
+
+class CorpusSpec:
+    """
+    Shape and size of a synthetic site. page_kb is the approximate
+    markdown size of an ordinary page. In the huge-pages shape every
+    50th page is 100 times that size.
+    """
+
+    def __init__(self, shape: str = "small-posts", pages: int = 200,
+                 page_kb: float = 4, static_files: int = 50,
+                 static_kb: float = 16, seed: int = 0) -> None:
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown corpus shape: {shape}")
+        self.shape = shape
+        self.pages = pages
+        self.page_kb = page_kb
+        self.static_files = static_files
+        self.static_kb = static_kb
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def sentence(rng: random.Random, inline: bool = False) -> str:
+    words: list[str] = [rng.choice(WORDS) for _ in range(rng.randint(6, 14))]
+    if inline:
+        words[1] = f"**{words[1]}**"
+        words[3] = f"_{words[3]}_"
+        words[5] = f"`{words[5]}`"
+        words.append(f"[{rng.choice(WORDS)}](/blog/{rng.choice(WORDS)})")
+    return " ".join(words).capitalize() + "."
+
+
+def block(rng: random.Random, shape: str) -> str:
+    if shape == "list-heavy":
+        kind: str = rng.choice(("- ", "1. "))
+        return "\n".join(f"{kind}{sentence(rng, inline=True)}"
+                         for _ in range(rng.randint(3, 12)))
+    if shape == "code-heavy" and rng.random() < 0.6:
+        lines: list[str] = [f"    {rng.choice(WORDS)} = {rng.randint(0, 99)}"
+                            for _ in range(rng.randint(4, 20))]
+        return "```python\n" + "\n".join(lines) + "\n```"
+    inline: bool = shape == "inline-heavy" or rng.random() < 0.3
+    paragraph: str = " ".join(sentence(rng, inline)
+                              for _ in range(rng.randint(2, 6)))
+    if rng.random() < 0.1:
+        return f"## {sentence(rng)}\n\n{paragraph}"
+    return paragraph
+
+
+def page(rng: random.Random, shape: str, size: int) -> str:
+    parts: list[str] = [f"# {sentence(rng)}"]
+    length: int = len(parts[0])
+    while length < size:
+        parts.append(block(rng, shape))
+        length += len(parts[-1]) + 2
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(root: str, spec: CorpusSpec) -> None:
+    """
+    Write a synthetic site into root: content/ with spec.pages
+    markdown pages nested in sections, static/ with spec.static_files
+    binary assets and a template.html.
+    """
+    rng: random.Random = random.Random(spec.seed)
+    size: int = int(spec.page_kb * 1024)
+    for number in range(spec.pages):
+        page_size: int = size
+        if spec.shape == "huge-pages" and number % 50 == 0:
+            page_size = size * 100
+        section: str = f"section{number % 10}"
+        path: str = os.path.join(root, "content", section,
+                                 f"post{number}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(page(rng, spec.shape, page_size))
+    for number in range(spec.static_files):
+        path = os.path.join(root, "static", f"images{number % 5}",
+                            f"asset{number}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(rng.randbytes(int(spec.static_kb * 1024)))
+    with open(os.path.join(root, "template.html"), "w",
+              encoding="utf-8") as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head>\n'
+                + '  <link href="/index.css" rel="stylesheet" />\n'
+                + "  <title>{{ Title }}</title>\n</head>\n"
+                + "<body>\n  <article>{{ Content }}</article>\n</body>\n"
+                + "</html>\n")
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Callable
+
+from build import discover_pages, generate_pages, generate_pages_pipelined
+from context import BuildContext
+from template import clear_template_cache
+
+from .corpus import CorpusSpec, generate_corpus
+from .stages import best_of
+
+
+def run_modes(spec: CorpusSpec, repeat: int = 3,
+              io_jobs: int = 4) -> dict:
+    """
+    Generate a corpus and time a full page build with the serial
+    generator and with the read, render and write pipeline.
+
+    Returns:
+        JSON serializable results with the corpus spec and, per
+        mode, the best timing in seconds and the page throughput
+    """
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, spec)
+        content_dir: str = os.path.join(root, "content")
+        dest_dir: str = os.path.join(root, "docs")
+        template_path: str = os.path.join(root, "template.html")
+        with redirect_stdout(StringIO()):
+            pages: list[tuple[str, str, str]] = [
+                    (from_path, template_path, html_path)
+                    for from_path, html_path in discover_pages(content_dir,
+                                                               dest_dir)]
+
+        def timed(build: Callable[[], list[str]]) -> Callable[[], None]:
+            def run() -> None:
+                clear_template_cache()
+                with redirect_stdout(StringIO()):
+                    build()
+            return run
+
+        def clean() -> None:
+            if os.path.exists(dest_dir):
+                shutil.rmtree(dest_dir)
+
+        modes: dict[str, Callable[[], None]] = {
+            "serial": timed(lambda: generate_pages(pages, BuildContext())),
+            "pipeline": timed(lambda: generate_pages_pipelined(
+                    pages, BuildContext(), io_jobs)),
+        }
+        results: dict = {"corpus": spec.to_dict(), "io_jobs": io_jobs,
+                         "modes": {}}
+        for name, run in modes.items():
+            timings: list[float] = best_of(repeat, run, clean)
+            results["modes"][name] = {
+                "seconds": min(timings),
+                "pages_per_second": len(pages) / min(timings),
+                "runs": timings,
+            }
+    return results
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Callable, Optional
+
+from build import copy_static, discover_pages
+from htmlnode import HTMLNode
+from inline_markdown import text_to_textnodes
+from markdown_blocks import (BlockType, markdown_to_blocks,
+                             markdown_to_html_node, parse_document)
+from template import Template
+
+from .corpus import CorpusSpec, generate_corpus
+
+STAGES: tuple[str, ...] = ("copy_static", "markdown_to_blocks",
+                           "text_to_textnodes", "to_html", "template",
+                           "write")
+INLINE_BLOCKS: tuple[BlockType, ...] = (BlockType.PARAGRAPH,
+                                        BlockType.HEADING)
+
+
+def best_of(repeat: int, func: Callable[[], object],
+            setup: Optional[Callable[[], object]] = None) -> list[float]:
+    """
+    Time func repeat times, calling setup before every run outside
+    the timed region.
+    """
+    timings: list[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start: float = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_stages(spec: CorpusSpec, repeat: int = 3) -> dict:
+    """
+    Generate a corpus and time every build stage on it separately.
+    Each stage gets the outputs of the previous ones precomputed, so
+    its timing covers only its own work.
+
+    Returns:
+        JSON serializable results with the corpus spec and, per
+        stage, the best and all measured timings in seconds
+    """
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, spec)
+        content_dir: str = os.path.join(root, "content")
+        dest_dir: str = os.path.join(root, "docs")
+        with redirect_stdout(StringIO()):
+            pages: list[tuple[str, str]] = discover_pages(content_dir,
+                                                          dest_dir)
+        markdowns: list[str] = []
+        for from_path, _ in pages:
+            with open(from_path, encoding="utf-8") as f:
+                markdowns.append(f.read())
+        inline_texts: list[str] = [
+                block.lstrip("#").strip().replace("\n", " ")
+                for markdown in markdowns
+                for block_type, block in parse_document(markdown).blocks
+                if block_type in INLINE_BLOCKS]
+        nodes: list[HTMLNode] = [markdown_to_html_node(markdown)
+                                 for markdown in markdowns]
+        contents: list[str] = [node.to_html() for node in nodes]
+        template: Template = Template(os.path.join(root, "template.html"),
+                                      "/site")
+        rendered: list[str] = [template.render(Title="Title", Content=html)
+                               for html in contents]
+
+        def copy() -> None:
+            with redirect_stdout(StringIO()):
+                copy_static(os.path.join(root, "static"),
+                            os.path.join(root, "copy"))
+
+        def write() -> None:
+            for (_, dest_path), page in zip(pages, rendered):
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                with open(dest_path, "w", encoding="utf-8") as f:
+                    f.write(page)
+
+        def clean() -> None:
+            if os.path.exists(dest_dir):
+                shutil.rmtree(dest_dir)
+
+        stages: dict[str, Callable[[], object]] = {
+            "copy_static": copy,
+            "markdown_to_blocks": lambda: [markdown_to_blocks(markdown)
+                                           for markdown in markdowns],
+            "text_to_textnodes": lambda: [text_to_textnodes(text)
+                                          for text in inline_texts],
+            "to_html": lambda: [node.to_html() for node in nodes],
+            "template": lambda: [template.render(Title="Title", Content=html)
+                                 for html in contents],
+            "write": write,
+        }
+        # Pages are written into an empty output directory every run.
+        setups: dict[str, Callable[[], object]] = {"write": clean}
+        results: dict = {"corpus": spec.to_dict(), "stages": {}}
+        for name in STAGES:
+            timings: list[float] = best_of(repeat, stages[name],
+                                           setups.get(name))
+            results["stages"][name] = {"seconds": min(timings),
+                                       "runs": timings}
+        results["bytes"] = {"markdown": sum(map(len, markdowns)),
+                            "html": sum(map(len, rendered))}
+    return results
+
+
+def compare(baseline: dict, current: dict,
+            threshold: float) -> list[tuple[str, float, float]]:
+    """
+    Find the stages whose best time in current exceeds the baseline
+    by more than threshold (0.1 is 10 percent).
+
+    Returns:
+        List of stage name, baseline and current seconds
+    """
+    regressions: list[tuple[str, float, float]] = []
+    for name, result in current["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            continue
+        if result["seconds"] > base["seconds"] * (1 + threshold):
+            regressions.append((name, base["seconds"], result["seconds"]))
+    return regressions
@@ -1,2 +1,2 @@
 python3 src/main.py
-cd public && python3 -m http.server 8888
+cd docs && python3 -m http.server 8888
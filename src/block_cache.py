@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from typing import Optional
+
+# hits, misses, evictions
+CacheStats = tuple[int, int, int]
+# html, the internal links and the search terms of a block
+CachedBlock = tuple[str, tuple[str, ...], tuple[str, ...]]
+
+
+class BlockCache:
+    """
+    Least recently used memo of rendered blocks, keyed on the block
+    text. A block renders to the same html wherever it appears, so
+    repeated notices, snippets and lists are only rendered once.
+
+    The internal links and search terms of a block are kept with its
+    html, so they are known for every page the block appears on.
+
+    The cache is bounded both by the number of blocks and by the
+    characters of html it holds, whichever is reached first.
+    """
+
+    def __init__(self, max_entries: int = 4096,
+                 max_chars: int = 8 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.entries: OrderedDict[str, CachedBlock] = OrderedDict()
+        self.chars: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __repr__(self) -> str:
+        return (f"BlockCache({len(self.entries)}/{self.max_entries} blocks, "
+                + f"{self.chars}/{self.max_chars} chars)")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, block: str) -> Optional[CachedBlock]:
+        cached: Optional[CachedBlock] = self.entries.get(block)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(block)
+        self.hits += 1
+        return cached
+
+    def put(self, block: str, html: str, links: tuple[str, ...] = (),
+            terms: tuple[str, ...] = ()) -> None:
+        entry: CachedBlock = (html, links, terms)
+        size: int = _entry_size(block, entry)
+        if size > self.max_chars or self.max_entries <= 0:
+            return
+        previous: Optional[CachedBlock] = self.entries.pop(block, None)
+        if previous is not None:
+            self.chars -= _entry_size(block, previous)
+        self.entries[block] = entry
+        self.chars += size
+        while (len(self.entries) > self.max_entries
+               or self.chars > self.max_chars):
+            old_block, old_entry = self.entries.popitem(last=False)
+            self.chars -= _entry_size(old_block, old_entry)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.chars = 0
+
+    def drain_stats(self) -> CacheStats:
+        """
+        Take the statistics counted so far, used by workers to hand
+        them over to the parent process.
+        """
+        stats: CacheStats = (self.hits, self.misses, self.evictions)
+        self.hits = self.misses = self.evictions = 0
+        return stats
+
+    def add_stats(self, stats: CacheStats) -> None:
+        hits, misses, evictions = stats
+        self.hits += hits
+        self.misses += misses
+        self.evictions += evictions
+
+    def report(self) -> str:
+        lookups: int = self.hits + self.misses
+        rate: float = self.hits / lookups * 100 if lookups else 0.0
+        return (f"Block cache: {self.hits} hits, {self.misses} misses "
+                + f"({rate:.1f}% hit rate), {self.evictions} evictions, "
+                + f"{len(self.entries)} blocks, {self.chars} chars")
+
+
+def _entry_size(block: str, entry: CachedBlock) -> int:
+    html, links, terms = entry
+    return (len(block) + len(html) + sum(len(link) for link in links)
+            + sum(len(term) for term in terms))
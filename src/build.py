@@ -0,0 +1,975 @@
+import argparse
+import hashlib
+import os
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext, redirect_stdout
+from io import StringIO
+from queue import Queue
+from typing import Callable, Iterator, Optional, TextIO
+
+from block_cache import CacheStats
+from context import BuildContext
+from fingerprint import ASSET_MANIFEST, AssetMap
+from images import ImageSizes
+from inventory import Inventory
+from manifest import BuildManifest, generator_version, hash_text
+from markdown_blocks import (Document, block_title, block_to_html_node,
+                             iter_blocks, iter_html, parse_document)
+from minify import HtmlMinifier, MinifyStats, minify_html
+from precompress import CompressResult, precompress
+from profiling import NullProfiler, TraceEvent
+from search import (SEARCH_DIR, SEARCH_STATE, SearchResult,
+                    write_search_index)
+from shards import Shard, shard_name, shard_of
+from sitemap import FEED, PageInfo, write_feed, write_sitemap
+from static_sync import publish_css, publish_file, sync_static
+from template import Template, find_layout, load_template
+from transforms import TransformPipeline, make_pipeline
+from urls import SiteIndex, UrlResolver, page_url
+
+IMAGE_CACHE: str = "images.json"
+# Manifest of a sharded build, kept in the shard directory so it
+# travels with the shard output and is left out when merging.
+SHARD_MANIFEST: str = ".manifest.json"
+
+
+class Site:
+    """
+    Paths of a site, all derived from its root directory.
+    """
+
+    def __init__(self, root_dir: str) -> None:
+        self.root_dir = root_dir
+        self.static_dir: str = os.path.join(root_dir, "static/")
+        self.content_dir: str = os.path.join(root_dir, "content")
+        self.dest_dir: str = os.path.join(root_dir, "docs/")
+        self.template_path: str = os.path.join(root_dir, "template.html")
+        self.layouts_dir: str = os.path.join(root_dir, "layouts")
+        self.cache_dir: str = os.path.join(root_dir, ".build-cache")
+        self.shards_dir: str = os.path.join(root_dir, "shards")
+
+    def __repr__(self) -> str:
+        return f"Site({self.root_dir})"
+
+    def shard_dir(self, shard: Shard) -> str:
+        return os.path.join(self.shards_dir, shard_name(shard), "")
+
+    def manifest_path(self, shard: Optional[Shard] = None) -> str:
+        """
+        Path of the build manifest, one in every shard directory for
+        sharded builds.
+        """
+        if shard is None:
+            return os.path.join(self.cache_dir, "manifest.json")
+        return os.path.join(self.shard_dir(shard), SHARD_MANIFEST)
+
+
+def normalize_basepath(basepath: str) -> str:
+    return "/" + basepath.strip("/").replace("//", "/")
+
+
+def build_site(site: Site, options: argparse.Namespace,
+               context: BuildContext) -> list[str]:
+    """
+    Copy all files and directories from static directory into
+    the output directory (site.dest_dir, docs/). And generate all
+    markdown files in content directory to html files in the output
+    directory.
+
+    A sharded build (options.shard) only generates the pages of its
+    shard, into the shard directory. Static files are published once,
+    by merge_shards.
+
+    Args:
+        site: Paths of the site to build
+        options: Parsed command line options
+        context: Build configuration and state
+
+    Returns:
+        Error messages of the pages that failed to generate
+    """
+    manifest: Optional[BuildManifest] = context.manifest
+    previous_assets: list[str] = manifest.assets if manifest else []
+    minified: bool = context.minify is not None
+    republish_css: bool = (manifest is not None
+                           and manifest.minified not in (None, minified))
+    baked: tuple[Optional[str], Optional[str]] = baked_digests(context)
+    with context.profiler.stage("inventory"):
+        static: Inventory = Inventory.scan(site.static_dir, options.ignore)
+        content: Inventory = Inventory.scan(site.content_dir,
+                                            options.ignore)
+    with context.profiler.stage("copy"):
+        if options.fingerprint:
+            context.assets = AssetMap.scan(site.static_dir,
+                                           options.copy_jobs, static)
+        if options.shard is None:
+            assets: list[str] = publish_static(
+                    site, options, context, static, previous_assets,
+                    options.clean, republish_css)
+        else:
+            if options.clean and os.path.exists(site.dest_dir):
+                shutil.rmtree(site.dest_dir)
+            assets = []
+    if options.image_sizes:
+        with context.profiler.stage("images"):
+            context.images = ImageSizes.scan(
+                    site.static_dir,
+                    os.path.join(site.cache_dir, IMAGE_CACHE), static)
+    if (context.block_cache is not None
+            and baked_digests(context) != baked):
+        # Cached blocks carry the asset urls and image sizes of the
+        # build that rendered them.
+        context.block_cache.clear()
+    context.urls = UrlResolver(context.basepath, context.assets,
+                               context.images, site.dest_dir)
+    errors: list[str] = generate_pages_recursive(
+            site.content_dir, site.template_path, site.dest_dir, context,
+            options.jobs, site.layouts_dir,
+            options.io_jobs if options.pipeline else 0, content,
+            options.shard)
+    if manifest is not None:
+        manifest.assets = assets
+        manifest.minified = minified
+        for removed in manifest.prune(site.dest_dir):
+            print(f"Removed stale page: {removed}")
+        manifest.save()
+        if options.shard is None:
+            with context.profiler.stage("links"):
+                for line in check_links(site, manifest, context.assets):
+                    print(line)
+            index_site(site, options, context, manifest)
+            map_site(site, options, context, manifest)
+    return errors
+
+
+def baked_digests(
+        context: BuildContext) -> tuple[Optional[str], Optional[str]]:
+    """
+    Digests of the asset map and image sizes rendered html depends on.
+    """
+    return (None if context.assets is None else context.assets.digest,
+            None if context.images is None else context.images.digest)
+
+
+def publish_static(site: Site, options: argparse.Namespace,
+                   context: BuildContext, static: Inventory,
+                   previous_assets: list[str], clean: bool,
+                   republish_css: bool = False) -> list[str]:
+    """
+    Publish the static files into the output directory, under their
+    fingerprinted names when context.assets is set. republish_css
+    publishes the css files again even when they look current, for
+    when minification was switched since the previous build.
+
+    Returns:
+        Relative paths of the published files
+    """
+    if context.assets is not None:
+        if clean and os.path.exists(site.dest_dir):
+            shutil.rmtree(site.dest_dir)
+        assets: list[str] = sync_static(
+                site.static_dir, site.dest_dir, previous_assets,
+                options.checksum, options.hardlink, options.copy_jobs,
+                context.assets.paths, context.minify, static,
+                republish_css).files
+        os.makedirs(site.dest_dir, exist_ok=True)
+        context.assets.write_manifest(
+                os.path.join(site.dest_dir, ASSET_MANIFEST))
+        return assets
+    if clean:
+        copy_static(site.static_dir, site.dest_dir, context.minify, static)
+        return static.paths()
+    return sync_static(
+            site.static_dir, site.dest_dir, previous_assets,
+            options.checksum, options.hardlink, options.copy_jobs,
+            minify=context.minify, inventory=static,
+            republish_css=republish_css).files
+
+
+def merge_shards(site: Site, options: argparse.Namespace,
+                 context: BuildContext, count: int) -> list[str]:
+    """
+    Combine the outputs of count sharded builds and the static files
+    into a fresh output directory. No path may be produced by two
+    shards, or by a shard and the static files; any overlap is
+    reported before anything is written. Links are checked across
+    the pages of all shards.
+
+    Args:
+        site: Paths of the site to merge
+        options: Parsed command line options
+        context: Build configuration and state
+        count: Number of shards the site was built in
+
+    Returns:
+        Error messages of missing shards or shard manifests and
+        overlapping paths
+    """
+    shards: list[Shard] = [(index, count) for index in range(count)]
+    with context.profiler.stage("inventory"):
+        static: Inventory = Inventory.scan(site.static_dir, options.ignore)
+        outputs: list[Inventory] = []
+        for shard in shards:
+            shard_dir: str = site.shard_dir(shard)
+            if not os.path.isdir(shard_dir):
+                return [f"Missing shard {shard_name(shard)}: {shard_dir}"]
+            if not os.path.isfile(site.manifest_path(shard)):
+                return [f"Missing manifest of shard {shard_name(shard)}: "
+                        + site.manifest_path(shard)]
+            outputs.append(Inventory.scan(shard_dir, (SHARD_MANIFEST,)))
+    published: list[str] = static.paths()
+    if options.fingerprint:
+        context.assets = AssetMap.scan(site.static_dir, options.copy_jobs,
+                                       static)
+        published = [context.assets.paths[path] for path in published]
+        published.append(ASSET_MANIFEST)
+    owners: dict[str, str] = dict.fromkeys(published, "static files")
+    errors: list[str] = []
+    for shard, output in zip(shards, outputs):
+        owner: str = f"shard {shard_name(shard)}"
+        for rel_path in output.paths():
+            previous: str = owners.setdefault(rel_path, owner)
+            if previous != owner:
+                errors.append(f"Overlapping output {rel_path}: "
+                              + f"{previous} and {owner}")
+    if errors:
+        return errors
+    with context.profiler.stage("copy"):
+        assets: list[str] = publish_static(site, options, context, static,
+                                           [], True)
+    with context.profiler.stage("merge"):
+        for shard, output in zip(shards, outputs):
+            output.make_dirs(site.dest_dir)
+            for entry in output:
+                publish_file(entry.path,
+                             os.path.join(site.dest_dir, entry.rel_path),
+                             options.hardlink)
+            print(f"Merged shard {shard_name(shard)}: {len(output)} files")
+    merged: BuildManifest = BuildManifest(site.manifest_path(),
+                                          site.root_dir)
+    merged.assets = assets
+    for shard in shards:
+        shard_manifest: BuildManifest = BuildManifest.load(
+                site.manifest_path(shard), site.root_dir)
+        for key, entry in shard_manifest.pages.items():
+            output_path: str = os.path.relpath(
+                    os.path.join(site.root_dir, entry["output"]),
+                    site.shard_dir(shard))
+            merged.pages[key] = dict(entry, output=merged.key(
+                    os.path.join(site.dest_dir, output_path)))
+    with context.profiler.stage("links"):
+        for line in check_links(site, merged, context.assets):
+            print(line)
+    index_site(site, options, context, merged)
+    map_site(site, options, context, merged)
+    if context.manifest is not None:
+        context.manifest.pages = merged.pages
+        context.manifest.assets = assets
+        context.manifest.minified = context.minify is not None
+        context.manifest.save()
+    return errors
+
+
+def check_links(site: Site, manifest: BuildManifest,
+                assets: Optional[AssetMap] = None) -> list[str]:
+    """
+    Find the internal links of every page that point at neither a
+    generated page nor a static asset, from the links recorded in the
+    manifest, so unchanged pages are checked as well.
+
+    Returns:
+        One line per broken link
+    """
+    index: SiteIndex = SiteIndex(assets)
+    outputs: dict[str, str] = {}
+    for key, entry in manifest.pages.items():
+        output: str = os.path.relpath(
+                os.path.join(manifest.root, entry["output"]),
+                site.dest_dir).replace(os.sep, "/")
+        outputs[key] = output
+        index.add_page(output)
+    for rel_path in manifest.assets:
+        index.add_asset(rel_path)
+    lines: list[str] = []
+    for key in sorted(manifest.pages):
+        for link in index.broken_links(outputs[key],
+                                       manifest.pages[key].get("links", ())):
+            lines.append(f"Broken link in {key}: {link}")
+    return lines
+
+
+def index_site(site: Site, options: argparse.Namespace,
+               context: BuildContext, manifest: BuildManifest) -> None:
+    """
+    Update the client side search index of the output from the search
+    terms recorded in the manifest, when the site is searched.
+    """
+    if not options.search:
+        return
+    pages: dict[str, tuple[str, str, list[str]]] = {}
+    for key, entry in manifest.pages.items():
+        if "terms" not in entry:
+            continue
+        output: str = os.path.relpath(
+                os.path.join(manifest.root, entry["output"]),
+                site.dest_dir).replace(os.sep, "/")
+        pages[key] = (page_url(output, context.basepath),
+                      entry.get("title", ""), entry["terms"])
+    with context.profiler.stage("search"):
+        result: SearchResult = write_search_index(
+                os.path.join(site.dest_dir, SEARCH_DIR),
+                os.path.join(site.cache_dir, SEARCH_STATE), pages)
+    print(result.report())
+
+
+def map_site(site: Site, options: argparse.Namespace,
+             context: BuildContext, manifest: BuildManifest) -> None:
+    """
+    Write the sitemap and the feed of a section, when asked for, from
+    the url, title and modification time recorded in the manifest for
+    every page, without reading any generated page.
+    """
+    if not options.sitemap and options.feed is None:
+        return
+    with context.profiler.stage("sitemap"):
+        if options.sitemap:
+            urls, written = write_sitemap(
+                    site.dest_dir, options.site_url,
+                    site_pages(site, manifest, context.basepath),
+                    context.basepath)
+            print(f"Sitemap: {urls} urls in {len(written)} file(s)")
+        if options.feed is not None:
+            section: str = options.feed.strip("/")
+            section_dir: str = os.path.join(site.dest_dir, section)
+            index: Optional[dict] = manifest.pages.get(manifest.key(
+                    os.path.join(site.content_dir, section, "index.md")))
+            os.makedirs(section_dir, exist_ok=True)
+            entries: int = write_feed(
+                    os.path.join(section_dir, FEED), options.site_url,
+                    page_url(f"{section}/index.html".lstrip("/"),
+                             context.basepath),
+                    (index or {}).get("title", section or "Feed"),
+                    site_pages(site, manifest, context.basepath),
+                    options.feed_entries)
+            print(f"Feed: {entries} entries in "
+                  + os.path.join(section_dir, FEED))
+
+
+def site_pages(site: Site, manifest: BuildManifest,
+               basepath: str) -> Iterator[PageInfo]:
+    """
+    Url, title and modification time of every page in the manifest,
+    one at a time in the order of their sources.
+    """
+    for key in sorted(manifest.pages):
+        entry: dict = manifest.pages[key]
+        if "modified" not in entry:
+            continue
+        output: str = os.path.relpath(
+                os.path.join(manifest.root, entry["output"]),
+                site.dest_dir).replace(os.sep, "/")
+        yield (page_url(output, basepath), entry.get("title", ""),
+               entry["modified"])
+
+
+def compress_output(site: Site, options: argparse.Namespace,
+                    context: BuildContext) -> None:
+    """
+    Precompress the output of a build when it was asked for.
+    """
+    if not options.precompress:
+        return
+    with context.profiler.stage("compress"):
+        result: CompressResult = precompress(
+                site.dest_dir, options.compress_min_bytes,
+                options.compress_jobs)
+    print(result.report())
+
+
+def copy_static(src: str, dst: str,
+                minify: Optional[MinifyStats] = None,
+                inventory: Optional[Inventory] = None) -> None:
+    """
+    Copy all files and directories from src to dst.
+    If dst exists, it will be deleted and recreated. Used for
+    clean builds, incremental builds use sync_static instead.
+
+    Args:
+        src: Source directory path
+        dst: Destination directory path
+        minify: Statistics to record into when css files are to be
+            minified, None to copy them as they are
+        inventory: Scan of src to reuse, src is scanned when None
+    """
+    if inventory is None:
+        inventory = Inventory.scan(src)
+    if os.path.exists(dst):
+        shutil.rmtree(dst)
+    inventory.make_dirs(dst)
+    for entry in inventory:
+        dst_path: str = os.path.join(dst, entry.rel_path)
+        if minify is not None and entry.rel_path.endswith(".css"):
+            log: Optional[str] = publish_css(entry.path, dst_path, minify)
+        else:
+            shutil.copy(entry.path, dst_path)
+            log = None
+        print(f"Copied file: {entry.path} to {dst_path}")
+        if log is not None:
+            print(log)
+
+
+def generate_pages_recursive(
+        content_dir: str, template_path: str, dest_path: str,
+        context: Optional[BuildContext] = None, jobs: int = 1,
+        layouts_dir: Optional[str] = None, io_jobs: int = 0,
+        inventory: Optional[Inventory] = None,
+        shard: Optional[Shard] = None) -> list[str]:
+    """
+    Recursively generate pages from content directories into
+    destination directories. All pages are discovered first and
+    then generated, in parallel worker processes when jobs > 1 or
+    in a read, render and write pipeline when io_jobs > 0.
+    Pages below a directory with a layout in layouts_dir use that
+    layout instead of the default template.
+
+    Args:
+        content_dir: Source directory path
+        template_path: Source template path files
+        dest_path: Destination directory path
+        context: Build configuration and state
+        jobs: Number of worker processes generating pages
+        layouts_dir: Directory path holding per-directory layouts
+        io_jobs: Number of threads reading and writing pages in a
+            pipelined build, 0 to not pipeline
+        inventory: Scan of content_dir to reuse, content_dir is
+            scanned when None
+        shard: Index and count of the shard to generate the pages of,
+            None for every page
+
+    Returns:
+        Error messages of the pages that failed to generate
+    """
+    context = context or BuildContext()
+    with context.profiler.stage("scan"):
+        pages: list[tuple[str, str, str]] = [
+                (from_path,
+                 find_layout(from_path, content_dir, layouts_dir,
+                             template_path),
+                 html_path)
+                for from_path, html_path in discover_pages(
+                    content_dir, dest_path, inventory, shard)]
+    if io_jobs > 0:
+        return generate_pages_pipelined(pages, context, io_jobs)
+    return generate_pages(pages, context, jobs)
+
+
+def discover_pages(
+        content_dir: str, dest_path: str,
+        inventory: Optional[Inventory] = None,
+        shard: Optional[Shard] = None) -> list[tuple[str, str]]:
+    """
+    Collect every markdown file in content directories paired with
+    its html destination, in a stable sorted order. Destination
+    directories mirroring the content tree are created at once.
+
+    Args:
+        content_dir: Source directory path
+        dest_path: Destination directory path
+        inventory: Scan of content_dir to reuse, content_dir is
+            scanned when None
+        shard: Index and count of the shard to collect the pages of,
+            None for every page
+    """
+    if inventory is None:
+        inventory = Inventory.scan(content_dir)
+    inventory.make_dirs(dest_path)
+    pages: list[tuple[str, str]] = []
+    for entry in sorted(inventory,
+                        key=lambda entry: entry.rel_path.split("/")):
+        if not entry.rel_path.endswith(".md"):
+            print(f"Skipping non-markdown file: {entry.path}")
+            continue
+        if shard is not None and shard_of(entry.rel_path,
+                                          shard[1]) != shard[0]:
+            continue
+        html_file: str = os.path.basename(entry.path).replace(".md",
+                                                              ".html")
+        pages.append((entry.path,
+                      os.path.join(dest_path,
+                                   os.path.dirname(entry.rel_path),
+                                   html_file)))
+    return pages
+
+
+def page_dest_path(content_dir: str, dest_dir: str, from_path: str) -> str:
+    """
+    Destination html path of a markdown file, as discover_pages
+    would pair it.
+    """
+    rel_dir: str = os.path.relpath(os.path.dirname(from_path), content_dir)
+    html_file: str = os.path.basename(from_path).replace(".md", ".html")
+    return os.path.normpath(os.path.join(dest_dir, rel_dir, html_file))
+
+
+def generate_pages(
+        pages: list[tuple[str, str, str]],
+        context: Optional[BuildContext] = None, jobs: int = 1) -> list[str]:
+    """
+    Generate the given pages, fanning them out across worker
+    processes when jobs > 1. Every page is rendered by the same
+    generate_page call in both modes, so the output is identical,
+    and page logs are printed in the order the pages were given.
+
+    Args:
+        pages: Source markdown, template and destination html paths
+        context: Build configuration and state
+        jobs: Number of worker processes generating pages
+
+    Returns:
+        Error messages of the pages that failed to generate
+    """
+    context = context or BuildContext()
+    manifest: Optional[BuildManifest] = context.manifest
+    if jobs > 1 and len(pages) > 1:
+        chunksize: int = max(1, len(pages) // (jobs * 8))
+        with ProcessPoolExecutor(
+                max_workers=jobs, initializer=_init_page_worker,
+                initargs=(context, True)) as executor:
+            results = list(executor.map(_generate_page_task, pages,
+                                        chunksize=chunksize))
+    else:
+        _init_page_worker(context)
+        results = [_generate_page_task(page, capture=False) for page in pages]
+    errors: list[str] = []
+    for (from_path, _, dest_path), result in zip(pages, results):
+        log, entry, error, events, cache_stats, minified = result
+        if log:
+            print(log, end="")
+        context.profiler.extend(events)
+        if context.block_cache is not None and cache_stats is not None:
+            context.block_cache.add_stats(cache_stats)
+        if context.minify is not None:
+            context.minify.extend(minified)
+        if manifest is not None:
+            if entry is not None:
+                manifest.adopt(from_path, entry)
+            else:
+                manifest.mark_seen(from_path)
+        if error is not None:
+            errors.append(error)
+    return errors
+
+
+def generate_pages_pipelined(
+        pages: list[tuple[str, str, str]],
+        context: Optional[BuildContext] = None, io_jobs: int = 4,
+        queue_size: int = 64) -> list[str]:
+    """
+    Generate the given pages in overlapping stages, so slow storage
+    does not leave the cpu idle: a pool of threads reads markdown
+    ahead, this thread renders it, and another pool of threads writes
+    the html. The stages are connected by bounded queues, so at most
+    about queue_size pages are held in memory at a time. Logs,
+    manifest updates and errors are the same as generate_pages.
+
+    Args:
+        pages: Source markdown, template and destination html paths
+        context: Build configuration and state
+        io_jobs: Number of threads reading and of threads writing pages
+        queue_size: Number of pages buffered between two stages
+
+    Returns:
+        Error messages of the pages that failed to generate
+    """
+    context = context or BuildContext()
+    manifest: Optional[BuildManifest] = context.manifest
+    reads: Queue[Optional[Future[Optional[str]]]] = Queue(
+            maxsize=queue_size)
+    writes: deque[tuple[int, str, str, dict[str, str], list[str],
+                        Optional[list[str]], str, Future[None]]] = deque()
+    errors: dict[int, str] = {}
+
+    def fail(index: int, from_path: str, error: Exception) -> None:
+        errors[index] = page_error(from_path, error)
+        if manifest is not None:
+            manifest.mark_seen(from_path)
+
+    def finish_write() -> None:
+        (index, from_path, dest_path, inputs, links, terms, title,
+         written) = writes.popleft()
+        try:
+            written.result()
+        except Exception as e:
+            fail(index, from_path, e)
+            return
+        if manifest is not None:
+            manifest.record(from_path, dest_path, inputs, links, terms,
+                            title, source_modified(from_path))
+
+    with (ThreadPoolExecutor(io_jobs, "read") as readers,
+          ThreadPoolExecutor(io_jobs, "write") as writers):
+        def feed() -> None:
+            for from_path, _, _ in pages:
+                reads.put(readers.submit(read_page_ahead, from_path,
+                                         context))
+            reads.put(None)
+
+        feeder: threading.Thread = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            for index, ((from_path, template_path, dest_path), read) in (
+                    enumerate(zip(pages, iter(reads.get, None)))):
+                try:
+                    markdown: Optional[str] = read.result()
+                    if markdown is None:
+                        generate_streamed_page(from_path, template_path,
+                                               dest_path, context)
+                        continue
+                    template: Template = load_template(
+                            template_path, context.basepath, context.assets)
+                    inputs: dict[str, str] = page_inputs(
+                            hash_text(markdown), template, context)
+                    if (manifest is not None
+                            and manifest.is_current(from_path, dest_path,
+                                                    inputs)):
+                        print(f"Skipping unchanged page: {from_path}")
+                        continue
+                    print(f"Generating page from {from_path} to {dest_path} "
+                          + f"using {template_path}")
+                    context.urls.start_page(dest_path)
+                    page, links, title = render_page(from_path, markdown,
+                                                     template, context)
+                    page = minify_page(from_path, dest_path, page, context)
+                except Exception as e:
+                    fail(index, from_path, e)
+                    continue
+                writes.append((index, from_path, dest_path, inputs, links,
+                               page_terms(context), title,
+                               writers.submit(write_page, from_path,
+                                              dest_path, page, context)))
+                if len(writes) >= queue_size:
+                    finish_write()
+            while writes:
+                finish_write()
+        finally:
+            while reads.get() is not None:
+                pass
+            feeder.join()
+    return [errors[index] for index in sorted(errors)]
+
+
+_worker_state: dict = {}
+
+
+def _init_page_worker(context: BuildContext, worker: bool = False) -> None:
+    """
+    Hand the build context to a worker once, as an argument rather
+    than module globals, so it also works with the spawn start method.
+    Worker processes drop profiling events inherited from the parent.
+    """
+    if worker:
+        context.profiler.drain()
+        if context.block_cache is not None:
+            context.block_cache.drain_stats()
+        if context.minify is not None:
+            context.minify.drain()
+    _worker_state["context"] = context
+
+
+def _generate_page_task(
+        task: tuple[str, str, str], capture: bool = True
+        ) -> tuple[str, Optional[dict], Optional[str],
+                   list[TraceEvent], Optional[CacheStats],
+                   list[tuple[str, int, int]]]:
+    """
+    Generate one page inside a worker, capturing its log output,
+    profiling events, block cache and minification statistics and any
+    error so the parent can report them in a deterministic order.
+    """
+    from_path, template_path, dest_path = task
+    context: BuildContext = _worker_state["context"]
+    manifest: Optional[BuildManifest] = context.manifest
+    log = StringIO()
+    error: Optional[str] = None
+    try:
+        with redirect_stdout(log) if capture else nullcontext():
+            generate_page(from_path, template_path, dest_path, context)
+    except Exception as e:
+        error = page_error(from_path, e)
+    entry: Optional[dict] = None
+    if manifest is not None and error is None:
+        entry = manifest.pages[manifest.key(from_path)]
+    events: list[TraceEvent] = []
+    cache_stats: Optional[CacheStats] = None
+    minified: list[tuple[str, int, int]] = []
+    if capture:
+        events = context.profiler.drain()
+        if context.block_cache is not None:
+            cache_stats = context.block_cache.drain_stats()
+        if context.minify is not None:
+            minified = context.minify.drain()
+    return log.getvalue(), entry, error, events, cache_stats, minified
+
+
+def generate_page(
+        from_path: str, template_path: str, dest_path: str,
+        context: Optional[BuildContext] = None) -> bool:
+    """
+    Generating markdown file into html page using html template.
+    Read the markdown, render it into the template compiled once
+    per build, write it into new html.
+    When a manifest is given, pages whose markdown, template and
+    generator are unchanged since the last build are skipped.
+
+    Args:
+        from_path: Source markdown path files
+        template_path: Source template path files
+        dest_path: Destination new html path files
+        context: Build configuration and state
+
+    Returns:
+        True if the page was written, False if it was up to date
+    """
+    context = context or BuildContext()
+    if is_streamed(from_path, context):
+        return generate_streamed_page(from_path, template_path, dest_path,
+                                      context)
+    manifest: Optional[BuildManifest] = context.manifest
+    markdown: str = read_page(from_path, context)
+    template: Template = load_template(template_path, context.basepath,
+                                       context.assets)
+    inputs: dict[str, str] = page_inputs(hash_text(markdown), template,
+                                         context)
+    if (manifest is not None
+            and manifest.is_current(from_path, dest_path, inputs)):
+        print(f"Skipping unchanged page: {from_path}")
+        return False
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    context.urls.start_page(dest_path)
+    page, links, title = render_page(from_path, markdown, template, context)
+    terms: Optional[list[str]] = page_terms(context)
+    page = minify_page(from_path, dest_path, page, context)
+    write_page(from_path, dest_path, page, context)
+    if manifest is not None:
+        manifest.record(from_path, dest_path, inputs, links, terms, title,
+                        source_modified(from_path))
+    return True
+
+
+def generate_streamed_page(
+        from_path: str, template_path: str, dest_path: str,
+        context: BuildContext) -> bool:
+    """
+    Generate a page too large to hold in memory. The markdown is read
+    line by line twice: once for its title and hash, and once to
+    render it block by block straight into the content slot of the
+    template in the output file. Memory is bounded by the largest
+    block rather than by the page. The output is written to a
+    temporary file first, so a failing page never leaves half an
+    html file behind.
+
+    Returns:
+        True if the page was written, False if it was up to date
+    """
+    manifest: Optional[BuildManifest] = context.manifest
+    profiler: NullProfiler = context.profiler
+    with profiler.stage("read", from_path):
+        title, source, slots = scan_markdown(from_path, context.transforms)
+    template: Template = load_template(template_path, context.basepath,
+                                       context.assets)
+    inputs: dict[str, str] = page_inputs(source, template, context)
+    if (manifest is not None
+            and manifest.is_current(from_path, dest_path, inputs)):
+        print(f"Skipping unchanged page: {from_path}")
+        return False
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    if title is None:
+        raise ValueError("Heading 1 is not found.")
+    dest_dir: str = os.path.dirname(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    tmp_path: str = dest_path + ".tmp"
+    minifier: Optional[HtmlMinifier] = None
+    context.urls.start_page(dest_path)
+    context.urls.drain_links()
+    page_terms(context)
+    try:
+        with profiler.stage("stream", from_path):
+            with (open(from_path, encoding="utf-8") as markdown_fd,
+                  open(tmp_path, "w", encoding="utf-8") as f):
+                lines: Iterator[str] = (line.removesuffix("\n")
+                                        for line in markdown_fd)
+                write: Callable[[str], object] = f.write
+                if context.minify is not None:
+                    minifier = HtmlMinifier(f.write)
+                    write = minifier.write
+                template.render_stream(
+                        write, "Content",
+                        iter_html(iter_blocks(lines), context.block_cache,
+                                  context.urls,
+                                  make_pipeline(context.transforms),
+                                  context.search),
+                        Title=title, **slots)
+                if minifier is not None:
+                    minifier.close()
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    links: list[str] = context.urls.drain_links()
+    terms: Optional[list[str]] = page_terms(context)
+    if context.minify is not None and minifier is not None:
+        print(context.minify.record(dest_path, minifier.before,
+                                    minifier.after))
+    if manifest is not None:
+        manifest.record(from_path, dest_path, inputs, links, terms, title,
+                        source_modified(from_path))
+    return True
+
+
+def is_streamed(from_path: str, context: BuildContext) -> bool:
+    return (context.stream_threshold is not None
+            and os.path.getsize(from_path) > context.stream_threshold)
+
+
+def scan_markdown(
+        from_path: str, transforms: tuple[str, ...] = ()
+        ) -> tuple[Optional[str], str, dict[str, str]]:
+    """
+    Read a markdown file line by line for its title and the hash of
+    its text, the same hash_text gives for the file read at once.
+    The blocks the transforms change are run through them, so the
+    template slots they fill, like a table of contents, are known
+    before the page is streamed.
+    """
+    digest = hashlib.sha256()
+    title: Optional[str] = None
+    pipeline: Optional[TransformPipeline] = make_pipeline(transforms)
+
+    def lines(markdown_fd: TextIO) -> Iterator[str]:
+        for line in markdown_fd:
+            digest.update(line.encode("utf-8"))
+            yield line.removesuffix("\n")
+
+    with open(from_path, encoding="utf-8") as markdown_fd:
+        for block_type, block in iter_blocks(lines(markdown_fd)):
+            if title is None:
+                title = block_title(block)
+            if pipeline is not None and pipeline.selects(block_type.value):
+                pipeline.apply(block_to_html_node(block_type, block))
+    return (title, digest.hexdigest(),
+            {} if pipeline is None else pipeline.slots())
+
+
+def page_error(from_path: str, error: Exception) -> str:
+    return (f"Failed to generate page {from_path}: "
+            + f"{type(error).__name__}: {error}")
+
+
+def read_page(from_path: str, context: BuildContext) -> str:
+    with context.profiler.stage("read", from_path):
+        with open(from_path, encoding="utf-8") as markdown_fd:
+            return markdown_fd.read()
+
+
+def read_page_ahead(from_path: str,
+                    context: BuildContext) -> Optional[str]:
+    """
+    Read a page for the pipelined build, or nothing when the page is
+    large enough to be streamed instead.
+    """
+    if is_streamed(from_path, context):
+        return None
+    return read_page(from_path, context)
+
+
+def page_inputs(source: str, template: Template,
+                context: BuildContext) -> dict[str, str]:
+    """
+    Everything the html of a page depends on, as recorded in the
+    build manifest, given the hash of its markdown.
+    """
+    inputs: dict[str, str] = {
+        "source": source,
+        "template": template.digest,
+        "generator": generator_version(),
+        "basepath": context.basepath,
+    }
+    if context.assets is not None:
+        inputs["assets"] = context.assets.digest
+    if context.minify is not None:
+        inputs["minify"] = "html"
+    if context.images is not None:
+        inputs["images"] = context.images.digest
+    if context.transforms:
+        inputs["transforms"] = ",".join(context.transforms)
+    if context.search is not None:
+        inputs["search"] = "terms"
+    return inputs
+
+
+def render_page(from_path: str, markdown: str, template: Template,
+                context: BuildContext) -> tuple[str, list[str], str]:
+    """
+    Render a page into its template. The search terms of the page
+    are left in context.search, for page_terms.
+
+    Returns:
+        The html of the page, its internal links and its title
+    """
+    profiler: NullProfiler = context.profiler
+    with profiler.stage("parse", from_path):
+        document: Document = parse_document(markdown)
+    context.urls.drain_links()
+    transforms: Optional[TransformPipeline] = make_pipeline(context.transforms)
+    page_terms(context)
+    with profiler.stage("render", from_path):
+        html: str = document.to_html(context.block_cache, context.urls,
+                                     transforms, context.search)
+    links: list[str] = context.urls.drain_links()
+    slots: dict[str, str] = {} if transforms is None else transforms.slots()
+    title: str = document.require_title()
+    with profiler.stage("template", from_path):
+        return (template.render(Title=title, Content=html, **slots), links,
+                title)
+
+
+def page_terms(context: BuildContext) -> Optional[list[str]]:
+    """
+    Take the search terms of the page just rendered, when the site is
+    searched.
+    """
+    if context.search is None:
+        return None
+    return context.search.drain()
+
+
+def source_modified(from_path: str) -> int:
+    """
+    Modification time of a page source in whole seconds, the last
+    modification of the page in the sitemap and feed.
+    """
+    return int(os.path.getmtime(from_path))
+
+
+def minify_page(from_path: str, dest_path: str, page: str,
+                context: BuildContext) -> str:
+    if context.minify is None:
+        return page
+    with context.profiler.stage("minify", from_path):
+        minified: str = minify_html(page)
+    print(context.minify.add(dest_path, page, minified))
+    return minified
+
+
+def write_page(from_path: str, dest_path: str, page: str,
+               context: BuildContext) -> None:
+    with context.profiler.stage("write", from_path):
+        dest_dir: str = os.path.dirname(dest_path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+        with open(dest_path, "w", encoding="utf-8") as f:
+            f.write(page)
@@ -0,0 +1,45 @@
+from typing import Optional
+
+from block_cache import BlockCache
+from fingerprint import AssetMap
+from images import ImageSizes
+from manifest import BuildManifest
+from minify import MinifyStats
+from profiling import NULL_PROFILER, NullProfiler
+from search import SearchTerms
+from urls import UrlResolver
+
+
+class BuildContext:
+    """
+    Configuration and state of one build, handed to every page
+    generation. It is passed to worker processes as is, so it must
+    stay picklable.
+    """
+
+    def __init__(
+            self, basepath: str = "/",
+            manifest: Optional[BuildManifest] = None,
+            profiler: NullProfiler = NULL_PROFILER,
+            block_cache: Optional[BlockCache] = None,
+            stream_threshold: Optional[int] = None,
+            assets: Optional[AssetMap] = None,
+            minify: Optional[MinifyStats] = None,
+            images: Optional[ImageSizes] = None,
+            urls: Optional[UrlResolver] = None,
+            transforms: tuple[str, ...] = (),
+            search: Optional[SearchTerms] = None) -> None:
+        self.basepath = basepath
+        self.manifest = manifest
+        self.profiler = profiler
+        self.block_cache = block_cache
+        self.stream_threshold = stream_threshold
+        self.assets = assets
+        self.minify = minify
+        self.images = images
+        self.urls: UrlResolver = urls or UrlResolver(basepath, assets, images)
+        self.transforms = transforms
+        self.search = search
+
+    def __repr__(self) -> str:
+        return f"BuildContext({self.basepath})"
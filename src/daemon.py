@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Optional
+
+from build import Site
+from context import BuildContext
+from profiling import TraceEvent
+from template import clear_template_cache
+from watch import SiteWatcher
+
+DAEMON_SOCKET: str = "daemon.sock"
+CONNECT_TIMEOUT: float = 1.0
+# Options a build request must share with the daemon, as they change
+# the output or how it is built.
+BUILD_OPTIONS: tuple[str, ...] = (
+        "checksum", "hardlink", "fingerprint", "ignore", "jobs",
+        "pipeline", "image_sizes", "minify", "heading_ids", "toc",
+        "search", "site_url", "sitemap", "feed", "feed_entries",
+        "precompress", "compress_min_bytes", "stream_above")
+
+
+def socket_path(site: Site) -> str:
+    return os.path.join(site.cache_dir, DAEMON_SOCKET)
+
+
+def build_options(options: argparse.Namespace) -> dict:
+    return {name: getattr(options, name) for name in BUILD_OPTIONS}
+
+
+def option_flags(names: list[str]) -> str:
+    return ", ".join("--" + name.replace("_", "-") for name in names)
+
+
+def stage_timings(events: list[TraceEvent]) -> dict[str, float]:
+    """
+    Wall seconds spent in every stage, summed over its events.
+    """
+    timings: dict[str, float] = {}
+    for name, _, _, wall, _, _, _ in events:
+        timings[name] = timings.get(name, 0.0) + wall
+    return timings
+
+
+def format_timings(command: str, timings: dict[str, float]) -> str:
+    stages: list[tuple[str, float]] = sorted(
+            ((name, wall) for name, wall in timings.items()
+             if name != "total"),
+            key=lambda item: item[1], reverse=True)
+    line: str = f"Daemon {command}: {timings['total'] * 1000:.1f} ms"
+    if stages:
+        line += " (" + ", ".join(f"{name} {wall * 1000:.1f} ms"
+                                 for name, wall in stages) + ")"
+    return line
+
+
+class BuildDaemon:
+    """
+    Keeps a site loaded between builds: compiled templates, the block
+    cache, the manifest and the imported generator stay in memory, so
+    a build request only pays for what changed. Requests are handled
+    one at a time.
+
+    Requests are JSON objects with a command (build for the whole
+    site, rebuild with the paths that changed, ping or stop) and the
+    root and base path of the site the client wants built. Build
+    requests also carry the client's BUILD_OPTIONS, and are refused
+    when they differ from the daemon's. The response carries the
+    build log, the errors and the wall time of every stage of the
+    request.
+    """
+
+    def __init__(self, site: Site, options: argparse.Namespace,
+                 context: BuildContext) -> None:
+        self.site = site
+        self.options = options
+        self.context = context
+        self.watcher: SiteWatcher = SiteWatcher(site, options, context)
+        self.running: bool = True
+
+    def __repr__(self) -> str:
+        return f"BuildDaemon({self.site.root_dir})"
+
+    def handle(self, request: dict) -> dict:
+        if (request.get("root") != self.site.root_dir
+                or request.get("basepath") != self.context.basepath):
+            return {"ok": False,
+                    "error": f"Daemon builds {self.site.root_dir} with "
+                    + f"base path {self.context.basepath}"}
+        command: Optional[str] = request.get("command")
+        if command in ("build", "rebuild"):
+            options: dict = build_options(self.options)
+            requested: dict = request.get("options", {})
+            differing: list[str] = [name for name in BUILD_OPTIONS
+                                    if requested.get(name) != options[name]]
+            if differing:
+                return {"ok": False,
+                        "error": "Daemon builds with other options: "
+                        + option_flags(differing)}
+        start: float = time.perf_counter()
+        self.context.profiler.drain()
+        log = StringIO()
+        errors: list[str] = []
+        with redirect_stdout(log):
+            try:
+                if command == "build":
+                    errors = self.watcher.build()
+                elif command == "rebuild":
+                    paths: set[str] = set(request.get("paths", ()))
+                    changed: set[str] = {path for path in paths
+                                         if os.path.exists(path)}
+                    errors = self.watcher.rebuild(changed, paths - changed)
+                elif command == "stop":
+                    self.running = False
+                elif command != "ping":
+                    return {"ok": False,
+                            "error": f"Unknown command: {command}"}
+            except Exception as e:
+                clear_template_cache()
+                errors.append(f"Failed to build: {type(e).__name__}: {e}")
+        timings: dict[str, float] = stage_timings(
+                self.context.profiler.drain())
+        timings["total"] = time.perf_counter() - start
+        return {"ok": True, "errors": errors, "log": log.getvalue(),
+                "timings": timings}
+
+    def serve(self, path: str) -> None:
+        """
+        Answer requests on the Unix socket at path until stopped. A
+        socket left behind by a daemon that is gone is replaced.
+        """
+        if os.path.exists(path):
+            if request(path, {"command": "ping"}) is not None:
+                raise RuntimeError(
+                        f"A daemon is already listening on {path}")
+            os.remove(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        daemon: BuildDaemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                try:
+                    message: dict = json.loads(self.rfile.readline())
+                except ValueError:
+                    response: dict = {"ok": False, "error": "Bad request"}
+                else:
+                    response = daemon.handle(message)
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+
+        with socketserver.UnixStreamServer(path, Handler) as server:
+            try:
+                while self.running:
+                    server.handle_request()
+            finally:
+                os.remove(path)
+
+
+def request(path: str, message: dict) -> Optional[dict]:
+    """
+    Send one request to the daemon listening at path and wait for its
+    response.
+
+    Returns:
+        The response, None when no daemon is listening
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+            return None
+        client.settimeout(None)
+        client.sendall(json.dumps(message).encode() + b"\n")
+        with client.makefile("rb") as f:
+            line: bytes = f.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def serve_daemon(site: Site, options: argparse.Namespace,
+                 context: BuildContext) -> None:
+    """
+    Build the site once, then serve build requests until stopped.
+    """
+    daemon: BuildDaemon = BuildDaemon(site, options, context)
+    for error in daemon.watcher.build():
+        print(error)
+    path: str = socket_path(site)
+    print(f"Build daemon listening on {path}")
+    try:
+        daemon.serve(path)
+    except KeyboardInterrupt:
+        pass
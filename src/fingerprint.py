@@ -0,0 +1,83 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from inventory import Inventory
+from manifest import hash_file, hash_text
+
+FINGERPRINT_LENGTH: int = 8
+ASSET_MANIFEST: str = "asset-manifest.json"
+
+
+def fingerprint_name(rel_path: str, digest: str) -> str:
+    """
+    Name of an asset with its content hash before the extension,
+    images/tom.png becomes images/tom.3f9a1c2b.png.
+    """
+    directory, file_name = os.path.split(rel_path)
+    stem, extension = os.path.splitext(file_name)
+    name: str = f"{stem}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+    return f"{directory}/{name}" if directory else name
+
+
+class AssetMap:
+    """
+    Content hashes of the static assets and the fingerprinted paths
+    they are published under. An asset keeps its path for as long as
+    its content does, so it can be cached indefinitely.
+    """
+
+    def __init__(self, hashes: dict[str, str]) -> None:
+        self.hashes = hashes
+        self.paths: dict[str, str] = {
+                rel_path: fingerprint_name(rel_path, digest)
+                for rel_path, digest in hashes.items()}
+        self.digest: str = hash_text(json.dumps(sorted(self.paths.items())))
+
+    def __repr__(self) -> str:
+        return f"AssetMap({len(self.paths)} assets)"
+
+    @classmethod
+    def scan(cls, root: str, workers: int = 1,
+             inventory: Optional[Inventory] = None) -> "AssetMap":
+        """
+        Hash every file below root, in a pool of threads when
+        workers > 1, reusing inventory as the scan of root if given.
+        """
+        entries: Inventory = (Inventory.scan(root) if inventory is None
+                              else inventory)
+        files: list[str] = entries.paths()
+        paths: Iterable[str] = (entry.path for entry in entries)
+        if workers > 1 and len(files) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                hashes: list[str] = list(executor.map(hash_file, paths))
+        else:
+            hashes = list(map(hash_file, paths))
+        return cls(dict(zip(files, hashes)))
+
+    def resolve(self, url_path: str) -> str:
+        """
+        Fingerprinted version of a site relative url path, keeping
+        any query or fragment. Paths that are not assets are returned
+        unchanged.
+        """
+        end: int = len(url_path)
+        for separator in "?#":
+            index: int = url_path.find(separator)
+            if index != -1:
+                end = min(end, index)
+        path: str = self.paths.get(url_path[:end], url_path[:end])
+        return path + url_path[end:]
+
+    def write_manifest(self, path: str) -> None:
+        """
+        Write the published path and content hash of every asset, for
+        deploy tools to upload only what changed.
+        """
+        assets: dict[str, dict[str, str]] = {
+                rel_path: {"path": self.paths[rel_path], "hash": digest}
+                for rel_path, digest in sorted(self.hashes.items())}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"assets": assets}, f, indent=1)
+            f.write("\n")
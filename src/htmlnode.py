@@ -1,14 +1,40 @@
 from types import NotImplementedType
-from typing import Optional
+from typing import Callable, Mapping, Optional
+
+
+class HTMLBuffer:
+    """
+    Collects html fragments, joining them into larger chunks as they
+    arrive so a big document never holds millions of small strings.
+    """
+
+    def __init__(self, chunk_size: int = 4096) -> None:
+        self.chunk_size = chunk_size
+        self.chunks: list[str] = []
+        self.pending: list[str] = []
+
+    def write(self, fragment: str) -> None:
+        self.pending.append(fragment)
+        if len(self.pending) >= self.chunk_size:
+            self.chunks.append("".join(self.pending))
+            self.pending.clear()
+
+    def getvalue(self) -> str:
+        if self.pending:
+            self.chunks.append("".join(self.pending))
+            self.pending.clear()
+        return "".join(self.chunks)
 
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
             self,
             tag: Optional[str] = None,
             value: Optional[str] = None,
             children: Optional[list["HTMLNode"]] = None,
-            props: Optional[dict] = None,
+            props: Optional[Mapping[str, str]] = None,
     ) -> None:
         self.tag = tag
         self.value = value
@@ -30,6 +56,9 @@ class HTMLNode:
     def to_html(self) -> str:
         raise NotImplementedError
 
+    def write_html(self, write: Callable[[str], object]) -> None:
+        write(self.to_html())
+
     def props_to_html(self) -> str:
         attributes: str = ""
         if self.props == None:
@@ -40,9 +69,11 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
             self, tag: Optional[str], value: str,
-            props: Optional[dict] = None) -> None:
+            props: Optional[Mapping[str, str]] = None) -> None:
         super().__init__(tag, value, props=props)
 
     def to_html(self) -> str:
@@ -54,18 +85,37 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
             self, tag: str, children: list["HTMLNode"],
-            props: Optional[dict] = None) -> None:
+            props: Optional[Mapping[str, str]] = None) -> None:
         super().__init__(tag, children=children, props=props)
 
     def to_html(self) -> str:
-        if self.tag == None:
-            raise ValueError("Parent node must have a tag!")
-        if self.children == None:
-            raise ValueError("Parent node must have atleast one children!")
-        html = f"<{self.tag}{self.props_to_html()}>"
-        for child in self.children:
-            html += child.to_html()
-        html += f"</{self.tag}>"
-        return html
+        buffer: HTMLBuffer = HTMLBuffer()
+        self.write_html(buffer.write)
+        return buffer.getvalue()
+
+    def write_html(self, write: Callable[[str], object]) -> None:
+        """
+        Render the tree below this node without recursion, passing
+        every fragment to write in document order. write can append
+        to a buffer or go straight to an output file.
+        """
+        stack: list[HTMLNode | str] = [self]
+        while stack:
+            node: HTMLNode | str = stack.pop()
+            if isinstance(node, str):
+                write(node)
+                continue
+            if not isinstance(node, ParentNode):
+                node.write_html(write)
+                continue
+            if node.tag == None:
+                raise ValueError("Parent node must have a tag!")
+            if node.children == None:
+                raise ValueError("Parent node must have atleast one children!")
+            write(f"<{node.tag}{node.props_to_html()}>")
+            stack.append(f"</{node.tag}>")
+            stack.extend(reversed(node.children))
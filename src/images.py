@@ -0,0 +1,159 @@
+import json
+import os
+import struct
+from typing import BinaryIO, Optional
+
+from inventory import Inventory
+from manifest import hash_file, hash_text
+
+IMAGE_EXTENSIONS: tuple[str, ...] = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+IMAGE_CACHE_VERSION: int = 1
+# JPEG start of frame markers, which carry the image size.
+JPEG_SOF_MARKERS: frozenset[int] = frozenset(
+        range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+Size = tuple[int, int]
+
+
+def image_size(path: str) -> Optional[Size]:
+    """
+    Read the width and height of a PNG, JPEG, GIF or WebP image from
+    its header, without decoding the image.
+
+    Returns:
+        Width and height in pixels, None for unknown formats and files
+        too short to hold a size
+    """
+    with open(path, "rb") as f:
+        head: bytes = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            if len(head) < 24:
+                return None
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            if len(head) < 10:
+                return None
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            if len(head) < 30:
+                return None
+            return _webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _jpeg_size(f)
+    return None
+
+
+def _webp_size(head: bytes) -> Optional[Size]:
+    chunk: bytes = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits: int = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return (int.from_bytes(head[24:27], "little") + 1,
+                int.from_bytes(head[27:30], "little") + 1)
+    return None
+
+
+def _jpeg_size(f: BinaryIO) -> Optional[Size]:
+    while True:
+        byte: bytes = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker: int = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue
+        length_bytes: bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length: int = struct.unpack(">H", length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame: bytes = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+class ImageSizes:
+    """
+    Sizes of every image in the static directory, so rendered images
+    can carry width and height and browsers reserve their space before
+    they load.
+
+    Sizes are kept in a persistent cache keyed on the file hash, with
+    the size and modification time of each path, so only new or
+    changed images are hashed and only new content is read.
+    """
+
+    def __init__(self, sizes: dict[str, Size]) -> None:
+        self.sizes = sizes
+        self.digest: str = hash_text(json.dumps(sorted(sizes.items())))
+
+    def __repr__(self) -> str:
+        return f"ImageSizes({len(self.sizes)} images)"
+
+    @classmethod
+    def scan(cls, static_dir: str, cache_path: str,
+             inventory: Optional[Inventory] = None) -> "ImageSizes":
+        """
+        Find the size of every image below static_dir, reusing and
+        then updating the cache at cache_path. The sizes and
+        modification times come from inventory, the scan of
+        static_dir, which is scanned when not given.
+        """
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cache: dict = json.load(f)
+            if cache.get("version") != IMAGE_CACHE_VERSION:
+                raise ValueError("Unsupported image cache version")
+            files: dict[str, list] = cache["files"]
+            hashes: dict[str, Optional[list[int]]] = cache["sizes"]
+        except (OSError, ValueError, KeyError, TypeError):
+            files, hashes = {}, {}
+        sizes: dict[str, Size] = {}
+        seen: dict[str, list] = {}
+        if inventory is None:
+            inventory = Inventory.scan(static_dir)
+        for file in inventory:
+            if not file.rel_path.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            entry: Optional[list] = files.get(file.rel_path)
+            if (entry is None
+                    or entry[:2] != [file.st_size, file.st_mtime_ns]):
+                entry = [file.st_size, file.st_mtime_ns,
+                         hash_file(file.path)]
+            digest: str = entry[2]
+            if digest not in hashes:
+                hashes[digest] = image_size(file.path)
+            seen[file.rel_path] = entry
+            size: Optional[list[int]] = hashes[digest]
+            if size is not None:
+                sizes[file.rel_path] = (size[0], size[1])
+        used: set[str] = {entry[2] for entry in seen.values()}
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path: str = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": IMAGE_CACHE_VERSION, "files": seen,
+                       "sizes": {digest: size
+                                 for digest, size in hashes.items()
+                                 if digest in used}}, f)
+        os.replace(tmp_path, cache_path)
+        return cls(sizes)
+
+    def size(self, url: str) -> Optional[Size]:
+        """
+        Size of the image at url, when it is a site absolute path to a
+        known image.
+        """
+        if not url.startswith("/") or url.startswith("//"):
+            return None
+        return self.sizes.get(url[1:].split("?")[0].split("#")[0])
@@ -1,18 +1,91 @@
 import re
+from typing import Optional
 
 from textnode import TextNode, TextType
 
 
-def text_to_textnodes(text) -> list[TextNode]:
-    text_nodes: list[TextNode] = [TextNode(text, TextType.TEXT)]
-    text_nodes = split_nodes_delimiter(text_nodes, "**", TextType.BOLD)
-    text_nodes = split_nodes_delimiter(text_nodes, "_", TextType.ITALIC)
-    text_nodes = split_nodes_delimiter(text_nodes, "`", TextType.CODE)
-    text_nodes = split_nodes_image(text_nodes)
-    text_nodes = split_nodes_link(text_nodes)
+DELIMITER_PATTERN = re.compile(r"\*\*|[_`]")
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+DELIMITER_TYPES: dict[str, TextType] = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+DELIMITER_RANKS: dict[str, int] = {"**": 0, "_": 1, "`": 2}
+
+
+def text_to_textnodes(text: str) -> list[TextNode]:
+    """
+    Split inline markdown into text nodes in a single left to right
+    pass. Produces the same nodes as splitting bold, italic and code
+    delimiters followed by images and links, one after another:
+    bold delimiters take precedence over italic ones, italic over
+    code, and images and links are split out of every span.
+    """
+    text_nodes: list[TextNode] = []
+    errors: set[str] = set()
+    opened: Optional[str] = None
+    start: int = 0
+    for match in DELIMITER_PATTERN.finditer(text):
+        delimiter: str = match.group()
+        if opened is None:
+            if start < match.start():
+                _split_span(text, start, match.start(), TextType.TEXT,
+                            text_nodes)
+            opened, start = delimiter, match.end()
+            continue
+        if delimiter == opened:
+            _split_span(text, start, match.start(), DELIMITER_TYPES[opened],
+                        text_nodes)
+            opened, start = None, match.end()
+            continue
+        if DELIMITER_RANKS[delimiter] > DELIMITER_RANKS[opened]:
+            continue
+        errors.add(opened)
+        opened, start = delimiter, match.end()
+    if opened is not None:
+        errors.add(opened)
+    if errors:
+        delimiter = min(errors, key=DELIMITER_RANKS.__getitem__)
+        raise ValueError(f"Missing second '{delimiter}' delimiter!")
+    if start < len(text):
+        _split_span(text, start, len(text), TextType.TEXT, text_nodes)
     return text_nodes
 
 
+def _split_span(text: str, start: int, end: int, text_type: TextType,
+                text_nodes: list[TextNode]) -> None:
+    """
+    Append text[start:end] as a node of text_type, or, when the span
+    holds images or links, as those nodes with plain text in between.
+    """
+    image: Optional[re.Match] = IMAGE_PATTERN.search(text, start, end)
+    if image is None and LINK_PATTERN.search(text, start, end) is None:
+        text_nodes.append(TextNode(text[start:end], text_type))
+        return
+    while image is not None:
+        _split_links(text, start, image.start(), text_nodes)
+        text_nodes.append(TextNode(image.group(1), TextType.IMAGE,
+                                   image.group(2)))
+        start = image.end()
+        image = IMAGE_PATTERN.search(text, start, end)
+    _split_links(text, start, end, text_nodes)
+
+
+def _split_links(text: str, start: int, end: int,
+                 text_nodes: list[TextNode]) -> None:
+    for link in LINK_PATTERN.finditer(text, start, end):
+        if start < link.start():
+            text_nodes.append(TextNode(text[start:link.start()],
+                                       TextType.TEXT))
+        text_nodes.append(TextNode(link.group(1), TextType.LINK,
+                                   link.group(2)))
+        start = link.end()
+    if start < end:
+        text_nodes.append(TextNode(text[start:end], TextType.TEXT))
+
+
 def split_nodes_delimiter(
         old_nodes: list[TextNode], delimiter: str,
         text_type: TextType) -> list[TextNode]:
@@ -0,0 +1,133 @@
+import fnmatch
+import os
+import re
+from operator import attrgetter
+from typing import Iterable, Iterator, Optional
+
+# Editor and OS droppings that are never part of a site.
+DEFAULT_IGNORE: tuple[str, ...] = (".DS_Store", "Thumbs.db", "*.swp", "*~",
+                                   ".#*")
+
+
+def ignore_pattern(patterns: Iterable[str]) -> Optional[re.Pattern]:
+    """
+    Compile shell style name patterns into one regular expression,
+    so a name is checked against all of them in one match.
+    """
+    translated: list[str] = [fnmatch.translate(pattern)
+                             for pattern in patterns]
+    if not translated:
+        return None
+    return re.compile("|".join(translated))
+
+
+class FileEntry:
+    """
+    A file found by a scan, with the parts of the stat result its
+    directory entry carried that later stages use, so none of them
+    has to stat it again. The fields are named like those of
+    os.stat_result, so an entry can stand in for one. Only these are
+    kept, a whole stat result per file would dominate the memory of
+    large trees.
+    """
+
+    __slots__ = ("rel_path", "path", "st_size", "st_mtime_ns", "st_ino",
+                 "st_dev")
+
+    def __init__(self, rel_path: str, path: str,
+                 stat: os.stat_result) -> None:
+        self.rel_path = rel_path
+        self.path = path
+        self.st_size: int = stat.st_size
+        self.st_mtime_ns: int = stat.st_mtime_ns
+        self.st_ino: int = stat.st_ino
+        self.st_dev: int = stat.st_dev
+
+    def __repr__(self) -> str:
+        return f"FileEntry({self.rel_path}, {self.st_size})"
+
+
+class Inventory:
+    """
+    Every file and directory below a root, found in a single pass of
+    os.scandir. Files are listed in the order os.walk gives with
+    sorted names: the files of a directory, then its subdirectories.
+    Relative paths use forward slashes so they can be stored in the
+    manifest. Names matching an ignore pattern are skipped along with
+    everything below them.
+    """
+
+    def __init__(self, root: str, files: list[FileEntry],
+                 dirs: list[str]) -> None:
+        self.root = root
+        self.files = files
+        self.dirs = dirs
+        self._by_path: Optional[dict[str, FileEntry]] = None
+
+    def __repr__(self) -> str:
+        return (f"Inventory({self.root}, {len(self.files)} files, "
+                + f"{len(self.dirs)} dirs)")
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        return iter(self.files)
+
+    @classmethod
+    def scan(cls, root: str,
+             ignore: Iterable[str] = DEFAULT_IGNORE) -> "Inventory":
+        """
+        Scan the tree below root. A missing root is an empty tree.
+        Symbolic links to directories are not followed, like os.walk.
+        """
+        pattern: Optional[re.Pattern] = ignore_pattern(ignore)
+        files: list[FileEntry] = []
+        dirs: list[str] = []
+        stack: list[str] = [""]
+        while stack:
+            rel_dir: str = stack.pop()
+            try:
+                with os.scandir(os.path.join(root, rel_dir)) as it:
+                    entries: list[os.DirEntry] = sorted(
+                            it, key=attrgetter("name"))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            subdirs: list[str] = []
+            for entry in entries:
+                if pattern is not None and pattern.match(entry.name):
+                    continue
+                rel_path: str = (f"{rel_dir}/{entry.name}" if rel_dir
+                                 else entry.name)
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(rel_path)
+                        continue
+                    stat: os.stat_result = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append(FileEntry(rel_path, entry.path, stat))
+            dirs.extend(subdirs)
+            stack.extend(reversed(subdirs))
+        return cls(root, files, dirs)
+
+    def paths(self) -> list[str]:
+        return [entry.rel_path for entry in self.files]
+
+    def get(self, rel_path: str) -> Optional[FileEntry]:
+        if self._by_path is None:
+            self._by_path = {entry.rel_path: entry for entry in self.files}
+        return self._by_path.get(rel_path)
+
+    def make_dirs(self, dest: str) -> None:
+        """
+        Mirror the directory tree below dest in one go, creating only
+        the deepest directories, whose parents come along.
+        """
+        os.makedirs(dest, exist_ok=True)
+        parents: set[str] = {os.path.dirname(rel_dir)
+                             for rel_dir in self.dirs}
+        for rel_dir in self.dirs:
+            if rel_dir not in parents:
+                os.makedirs(os.path.join(dest, rel_dir), exist_ok=True)
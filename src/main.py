@@ -1,109 +1,258 @@
+import argparse
 import os
-import re
-import shutil
 import sys
+from typing import Optional
 
-from markdown_blocks import extract_title, markdown_to_html_node
+from block_cache import BlockCache
+from build import (Site, build_site, compress_output, merge_shards,
+                   normalize_basepath)
+from context import BuildContext
+from daemon import (build_options, format_timings, request, serve_daemon,
+                    socket_path)
+from fingerprint import ASSET_MANIFEST
+from inventory import DEFAULT_IGNORE
+from manifest import BuildManifest
+from minify import MinifyStats
+from profiling import NullProfiler, Profiler
+from search import SearchTerms
+from shards import parse_shard
+from transforms import HeadingIds, TableOfContents
+from watch import watch_site
 
 
-def main() -> None:
-    """
-    Copy all files and directories from static directory into
-    public directory. And generate all markdown files in
-    content directory to html files in public directory.
-    """
-    global BASEPATH
-    BASEPATH = sys.argv[1] if len(sys.argv) > 1 else "/"
-    BASEPATH = f"/{BASEPATH.lstrip("/").rstrip("/").replace("//", "/")}"
-    root_dir: str = os.getcwd()
-    source_dir: str = os.path.join(root_dir, "static/")
-    dest_dir: str = os.path.join(root_dir, "docs/")
-    copy_static(source_dir, dest_dir)
-    content_dir: str = os.path.join(root_dir, "content")
-    template_path: str = os.path.join(root_dir, "template.html")
-    generate_pages_recursive(content_dir, template_path, dest_dir)
-
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+            description="Generate a static site from markdown content.")
+    parser.add_argument("basepath", nargs="?", default="/",
+                        help="Base path every absolute url is rooted at")
+    parser.add_argument("--clean", action="store_true",
+                        help="Delete the output directory and rebuild it")
+    parser.add_argument("--checksum", action="store_true",
+                        help="Compare static files by content hash")
+    parser.add_argument("--hardlink", action="store_true",
+                        help="Publish static files as hardlinks")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="Publish static files under content hashed "
+                        + "names and write " + ASSET_MANIFEST)
+    parser.add_argument("--ignore", action="append",
+                        default=list(DEFAULT_IGNORE), metavar="PATTERN",
+                        help="Skip static and content files and "
+                        + "directories whose name matches PATTERN, on top "
+                        + "of editor and OS files (repeatable)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="Number of processes generating pages")
+    parser.add_argument("--shard", type=parse_shard, metavar="INDEX/COUNT",
+                        help="Only generate the pages of one of COUNT "
+                        + "shards (INDEX from 0), into shards/INDEX-of-COUNT")
+    parser.add_argument("--merge", type=int, metavar="COUNT",
+                        help="Merge the outputs of COUNT shards and the "
+                        + "static files into the output directory")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap reading, rendering and writing pages "
+                        + "in one process")
+    parser.add_argument("--io-jobs", type=int, default=4, metavar="N",
+                        help="Number of threads reading and of threads "
+                        + "writing pages in a pipelined build")
+    parser.add_argument("--copy-jobs", type=int, default=1, metavar="N",
+                        help="Number of threads copying static files")
+    parser.add_argument("--image-sizes", action="store_true",
+                        help="Give images their width and height and "
+                        + "load them lazily")
+    parser.add_argument("--minify", action="store_true",
+                        help="Minify the html of pages and the css of "
+                        + "static files")
+    parser.add_argument("--heading-ids", action="store_true",
+                        help="Give headings ids slugged from their text")
+    parser.add_argument("--toc", action="store_true",
+                        help="Fill the {{ TOC }} template slot with a "
+                        + "table of contents, implies --heading-ids")
+    parser.add_argument("--search", action="store_true",
+                        help="Write a client side search index of the "
+                        + "pages into the output")
+    parser.add_argument("--site-url", metavar="URL",
+                        help="Scheme and host the site is served from, "
+                        + "for the sitemap and feed")
+    parser.add_argument("--sitemap", action="store_true",
+                        help="Write sitemap.xml, split under a sitemap "
+                        + "index above 50000 urls")
+    parser.add_argument("--feed", metavar="SECTION",
+                        help="Write an Atom feed.xml of the newest pages "
+                        + "below this content directory, like blog")
+    parser.add_argument("--feed-entries", type=int, default=20,
+                        metavar="N", help="Number of pages in the feed")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Write .gz (and .zst where available) "
+                        + "siblings of html, css, js and svg output")
+    parser.add_argument("--compress-min-bytes", type=int, default=1024,
+                        metavar="N",
+                        help="Smallest file size worth precompressing")
+    parser.add_argument("--compress-jobs", type=int, default=1, metavar="N",
+                        help="Number of threads precompressing files")
+    parser.add_argument("--profile", action="store_true",
+                        help="Report wall and cpu time per stage and page")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="Number of slowest pages to report")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write a Chrome trace of the build (implies "
+                        + "--profile)")
+    parser.add_argument("--block-cache", type=int, default=4096, metavar="N",
+                        help="Number of rendered blocks to reuse across "
+                        + "pages, 0 to render every block")
+    parser.add_argument("--block-cache-mb", type=float, default=8,
+                        metavar="MB",
+                        help="Memory budget of the block cache in "
+                        + "megabytes of html")
+    parser.add_argument("--stream-above", type=float, metavar="MB",
+                        help="Stream pages whose markdown is larger than "
+                        + "this many megabytes instead of reading them "
+                        + "whole")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep rebuilding what changes and serve the "
+                        + "site with live reload")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Build, then keep the site loaded and serve "
+                        + "build requests on a Unix socket")
+    parser.add_argument("--client", action="store_true",
+                        help="Ask a running daemon to build, building "
+                        + "in this process when none is running")
+    parser.add_argument("--rebuild", action="append", metavar="PATH",
+                        help="With --client, only rebuild what PATH "
+                        + "affects (repeatable)")
+    parser.add_argument("--stop-daemon", action="store_true",
+                        help="Stop the running daemon")
+    parser.add_argument("--port", type=int, default=8888,
+                        help="Port to serve the site on in watch mode, "
+                        + "0 to not serve it")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="Seconds between checks for changes")
+    args: argparse.Namespace = parser.parse_args(argv)
+    if args.pipeline and args.jobs > 1:
+        parser.error("--pipeline renders in one process, it cannot be "
+                     + "combined with --jobs")
+    if args.shard is not None and args.merge is not None:
+        parser.error("--shard builds one shard, --merge combines them, "
+                     + "they cannot be combined")
+    if args.merge is not None and args.merge < 1:
+        parser.error("--merge needs at least one shard")
+    if ((args.watch or args.daemon or args.client)
+            and (args.shard is not None or args.merge is not None)):
+        parser.error("--watch, --daemon and --client always build the "
+                     + "whole site")
+    if args.daemon and (args.watch or args.client):
+        parser.error("--daemon cannot be combined with --watch or --client")
+    if (args.sitemap or args.feed is not None) and not args.site_url:
+        parser.error("--sitemap and --feed need --site-url")
+    if args.feed_entries < 1:
+        parser.error("--feed-entries needs at least one entry")
+    if args.rebuild and not args.client:
+        parser.error("--rebuild is a request to the daemon, it needs "
+                     + "--client")
+    return args
 
-def copy_static(src: str, dst: str) -> None:
-    """
-    Recursively copy all files and directories from src to dst.
-    If dst exists, it will be deleted and recreated.
 
-    Args:
-        src: Source directory path
-        dst: Destination directory path
-    """
-    if os.path.exists(dst):
-        shutil.rmtree(dst)
-    os.mkdir(dst)
-    entries: list[str] = os.listdir(src)
-    for entry in entries:
-        src_path: str = os.path.join(src, entry)
-        dst_path: str = os.path.join(dst, entry)
-        if os.path.isfile(src_path):
-            shutil.copy(src_path, dst_path)
-            print(f"Copied file: {src_path} to {dst_path}")
-            continue
-        print(f"Proccessing directory: {src_path}")
-        copy_static(src_path, dst_path)
+def transform_names(args: argparse.Namespace) -> tuple[str, ...]:
+    names: list[str] = []
+    if args.heading_ids or args.toc:
+        names.append(HeadingIds.name)
+    if args.toc:
+        names.append(TableOfContents.name)
+    return tuple(names)
 
 
-def generate_pages_recursive(
-        content_dir: str, template_path: str, dest_path: str) -> None:
+def request_build(site: Site, args: argparse.Namespace) -> bool:
     """
-    Recursively generate pages from content directories into
-    destination directories.
+    Have the running daemon build the site, printing its log, errors
+    and timings.
 
-    Args:
-        content_dir: Source directory path
-        template_path: Source template path files
-        dest_path: Destination directory path
+    Returns:
+        False when no daemon could build it, so it is built here
     """
-    entries: list[str] = os.listdir(content_dir)
-    if not entries:
-        os.makedirs(dest_path, exist_ok=True)
-    for entry in entries:
-        parent_dir: str = os.path.join(dest_path, entry)
-        dest_dir: str = os.path.dirname(parent_dir)
-        if dest_dir:
-            os.makedirs(dest_dir, exist_ok=True)
-        from_path: str = os.path.join(content_dir, entry)
-        if os.path.isfile(from_path):
-            if entry.endswith(".md"):
-                html_file: str = entry.replace(".md", ".html")
-                html_file_path: str = os.path.join(dest_dir, html_file)
-                generate_page(from_path, template_path, html_file_path)
-                continue
-            print(f"Skipping non-markdown file: {from_path}")
-            continue
-        generate_pages_recursive(from_path, template_path, parent_dir)
+    message: dict = {"command": "build", "root": site.root_dir,
+                     "basepath": normalize_basepath(args.basepath),
+                     "options": build_options(args)}
+    if args.rebuild:
+        message["command"] = "rebuild"
+        message["paths"] = [os.path.abspath(path) for path in args.rebuild]
+    response: Optional[dict] = request(socket_path(site), message)
+    if response is None or not response["ok"]:
+        reason: str = ("no daemon is running" if response is None
+                       else response["error"])
+        print(f"Building in process, {reason}.")
+        return False
+    print(response["log"], end="")
+    print(format_timings(message["command"], response["timings"]))
+    errors: list[str] = response["errors"]
+    if errors:
+        for error in errors:
+            print(error, file=sys.stderr)
+        sys.exit(f"Failed to generate {len(errors)} page(s).")
+    return True
 
 
-def generate_page(from_path: str, template_path: str, dest_path: str) -> None:
+def main(argv: Optional[list[str]] = None) -> None:
     """
-    Generating markdown file into html page using html template.
-    Read both markdown and template, write it into new html.
-
-    Args:
-        from_path: Source markdown path files
-        template_path: Source template path files
-        dest_path: Destination new html path files
+    Build the site in the current directory as configured by the
+    command line arguments.
     """
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path, encoding="utf-8") as markdown_fd, \
-         open(template_path, encoding="utf-8") as template_fd:
-        markdown: str = markdown_fd.read()
-        template: str = template_fd.read()
-    html: str = markdown_to_html_node(markdown).to_html()
-    template = template.replace("{{ Title }}", extract_title(markdown))
-    template = template.replace("{{ Content }}", html)
-    template = re.sub(r'href="/([^"]*)"', rf'href="{BASEPATH}/\1"', template)
-    template = re.sub(r'src="/([^"]*)"', rf'src="{BASEPATH}/\1"', template)
-    dest_dir: str = os.path.dirname(dest_path)
-    if dest_dir:
-        os.makedirs(dest_dir, exist_ok=True)
-    with open(dest_path, "w", encoding="utf-8") as f:
-        f.write(template)
+    args: argparse.Namespace = parse_args(argv)
+    site: Site = Site(os.getcwd())
+    if args.stop_daemon:
+        stopped: Optional[dict] = request(
+                socket_path(site),
+                {"command": "stop", "root": site.root_dir,
+                 "basepath": normalize_basepath(args.basepath)})
+        print("Stopped the daemon." if stopped is not None and stopped["ok"]
+              else "No daemon is running.")
+        return
+    if args.client and request_build(site, args):
+        return
+    if args.shard is not None:
+        site.dest_dir = site.shard_dir(args.shard)
+    manifest: BuildManifest = BuildManifest.load(
+            site.manifest_path(args.shard), site.root_dir)
+    profiler: NullProfiler = (Profiler()
+                              if args.profile or args.trace or args.daemon
+                              else NullProfiler())
+    block_cache: Optional[BlockCache] = None
+    if args.block_cache > 0:
+        block_cache = BlockCache(args.block_cache,
+                                 int(args.block_cache_mb * 1024 * 1024))
+    stream_threshold: Optional[int] = None
+    if args.stream_above is not None:
+        stream_threshold = int(args.stream_above * 1024 * 1024)
+    minify: Optional[MinifyStats] = MinifyStats() if args.minify else None
+    context: BuildContext = BuildContext(normalize_basepath(args.basepath),
+                                         manifest, profiler, block_cache,
+                                         stream_threshold, minify=minify,
+                                         transforms=transform_names(args),
+                                         search=(SearchTerms() if args.search
+                                                 else None))
+    if args.watch:
+        watch_site(site, args, context)
+        return
+    if args.daemon:
+        serve_daemon(site, args, context)
+        return
+    if args.merge is not None:
+        errors: list[str] = merge_shards(site, args, context, args.merge)
+    else:
+        errors = build_site(site, args, context)
+    compress_output(site, args, context)
+    if minify is not None:
+        print(minify.report())
+    if isinstance(profiler, Profiler):
+        print(profiler.report(args.profile_top))
+        if block_cache is not None:
+            print(block_cache.report())
+        if args.trace:
+            profiler.write_chrome_trace(args.trace)
+            print(f"Wrote trace: {args.trace}")
+    if errors:
+        for error in errors:
+            print(error, file=sys.stderr)
+        if args.merge is not None:
+            sys.exit(f"Failed to merge {args.merge} shard(s).")
+        sys.exit(f"Failed to generate {len(errors)} page(s).")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Optional
+
+MANIFEST_VERSION: int = 1
+# Modules that serve or schedule builds without shaping their
+# output, left out of the generator version.
+NON_OUTPUT_MODULES: frozenset[str] = frozenset(
+        {"daemon.py", "profiling.py", "watch.py"})
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    return hash_bytes(text.encode("utf-8"))
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Hash a file in fixed size chunks so large files never
+    have to be held in memory at once.
+
+    Args:
+        path: File path to hash
+        chunk_size: Number of bytes read per chunk
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_output(path: str, dest_dir: str) -> None:
+    """
+    Delete the output file at path and the directories below dest_dir
+    it leaves empty.
+    """
+    os.remove(path)
+    parent: str = os.path.dirname(path)
+    while (os.path.abspath(parent) != os.path.abspath(dest_dir)
+           and not os.listdir(parent)):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+@lru_cache(maxsize=None)
+def generator_version() -> str:
+    """
+    Hash of the generator's own source modules. Any change to the
+    code that turns markdown into html invalidates every page, test
+    modules and NON_OUTPUT_MODULES do not.
+    """
+    src_dir: str = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for entry in sorted(os.listdir(src_dir)):
+        if (not entry.endswith(".py") or entry.startswith("test_")
+                or entry in NON_OUTPUT_MODULES):
+            continue
+        digest.update(entry.encode("utf-8"))
+        digest.update(hash_file(os.path.join(src_dir, entry)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Persisted record of the inputs every page was last generated from.
+    Pages are keyed by their source path relative to root, each entry
+    holds the output path, the hashes of the inputs used and the
+    internal links of the page, so links are checked across the whole
+    site even when most pages are skipped, and the title and source
+    modification time the sitemap and feed are written from. When the
+    site is searched, it also holds the search terms of the page.
+    Assets lists the static files published into the output
+    directory, minified tells whether their css was minified, None
+    when it is not known.
+    """
+
+    def __init__(self, path: str, root: str) -> None:
+        self.path = path
+        self.root = root
+        self.pages: dict[str, dict] = {}
+        self.assets: list[str] = []
+        self.minified: Optional[bool] = None
+        self.seen: set[str] = set()
+
+    @classmethod
+    def load(cls, path: str, root: str) -> "BuildManifest":
+        manifest: BuildManifest = cls(path, root)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data: dict = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") == MANIFEST_VERSION:
+            manifest.pages = data.get("pages", {})
+            manifest.assets = data.get("assets", [])
+            manifest.minified = data.get("minified")
+        return manifest
+
+    def save(self) -> None:
+        dest_dir: str = os.path.dirname(self.path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+        tmp_path: str = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "pages": self.pages,
+                       "assets": self.assets, "minified": self.minified},
+                      f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def key(self, path: str) -> str:
+        return os.path.relpath(path, self.root)
+
+    def mark_seen(self, from_path: str) -> None:
+        self.seen.add(self.key(from_path))
+
+    def is_current(self, from_path: str, dest_path: str,
+                   inputs: dict[str, str]) -> bool:
+        """
+        Check whether dest_path was generated from exactly these inputs
+        and still exists. Marks the page as seen for this build.
+        """
+        key: str = self.key(from_path)
+        self.seen.add(key)
+        entry: Optional[dict] = self.pages.get(key)
+        if entry is None or entry.get("inputs") != inputs:
+            return False
+        if entry.get("output") != self.key(dest_path):
+            return False
+        return os.path.exists(dest_path)
+
+    def record(self, from_path: str, dest_path: str,
+               inputs: dict[str, str],
+               links: Optional[list[str]] = None,
+               terms: Optional[list[str]] = None,
+               title: Optional[str] = None,
+               modified: Optional[int] = None) -> None:
+        entry: dict = {"output": self.key(dest_path), "inputs": inputs}
+        if links:
+            entry["links"] = links
+        if terms is not None:
+            entry["terms"] = terms
+        if title is not None:
+            entry["title"] = title
+        if modified is not None:
+            entry["modified"] = modified
+        self.adopt(from_path, entry)
+
+    def adopt(self, from_path: str, entry: dict) -> None:
+        """
+        Take over the entry another manifest recorded for from_path,
+        like the one of a worker process.
+        """
+        key: str = self.key(from_path)
+        self.seen.add(key)
+        self.pages[key] = entry
+
+    def forget(self, from_path: str, dest_dir: str) -> Optional[str]:
+        """
+        Drop the page generated from from_path and delete its output,
+        along with the directories below dest_dir it leaves empty.
+
+        Returns:
+            The removed output path, if there was one
+        """
+        entry: Optional[dict] = self.pages.pop(self.key(from_path), None)
+        self.seen.discard(self.key(from_path))
+        if entry is None:
+            return None
+        output: str = os.path.join(self.root, entry["output"])
+        if not os.path.exists(output):
+            return None
+        remove_output(output, dest_dir)
+        return output
+
+    def prune(self, dest_dir: str) -> list[str]:
+        """
+        Delete outputs of pages whose sources were not seen during
+        this build and forget them. Directories below dest_dir left
+        empty are deleted too.
+
+        Returns:
+            List of removed output paths
+        """
+        removed: list[str] = []
+        for key in sorted(set(self.pages) - self.seen):
+            output: str = os.path.join(self.root, self.pages.pop(key)["output"])
+            if os.path.exists(output):
+                remove_output(output, dest_dir)
+                removed.append(output)
+        return removed
@@ -1,9 +1,19 @@
 from enum import Enum
 import re
+from typing import Iterable, Iterator, Optional
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from block_cache import BlockCache, CachedBlock
+from htmlnode import HTMLBuffer, HTMLNode, LeafNode, ParentNode
 from inline_markdown import text_to_textnodes
+from search import SearchTerms, block_terms
 from textnode import TextNode, text_node_to_html_node
+from transforms import TransformPipeline
+from urls import UrlResolver
+
+
+HEADING_PATTERN = re.compile(r"#{1,6}\s")
+ORDERED_ITEM_PATTERN = re.compile(r"\d+.\s")
+HEADING_TAGS: dict[int, str] = {level: f"h{level}" for level in range(1, 7)}
 
 
 class BlockType(Enum):
@@ -15,52 +25,174 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+class Document:
+    """
+    A markdown document parsed in one pass: its title (the first
+    heading 1, if any) and its classified blocks.
+    """
+
+    def __init__(self, title: Optional[str],
+                 blocks: list[tuple[BlockType, str]]) -> None:
+        self.title = title
+        self.blocks = blocks
+
+    def __repr__(self) -> str:
+        return f"Document({self.title}, {len(self.blocks)} blocks)"
+
+    def require_title(self) -> str:
+        if self.title is None:
+            raise ValueError("Heading 1 is not found.")
+        return self.title
+
+    def to_html_node(
+            self, urls: Optional[UrlResolver] = None,
+            transforms: Optional[TransformPipeline] = None,
+            terms: Optional[SearchTerms] = None) -> HTMLNode:
+        children: list[HTMLNode] = []
+        for block_type, block in self.blocks:
+            child: HTMLNode = block_to_html_node(block_type, block, urls)
+            if transforms is not None:
+                transforms.apply(child)
+            if terms is not None and block_type != BlockType.CODE:
+                terms.add(block_terms(child))
+            children.append(child)
+        return ParentNode("div", children)
+
+    def to_html(self, cache: Optional[BlockCache] = None,
+                urls: Optional[UrlResolver] = None,
+                transforms: Optional[TransformPipeline] = None,
+                terms: Optional[SearchTerms] = None) -> str:
+        """
+        Render the document to html, reusing the html of blocks
+        already in the cache. The output is the same as rendering
+        to_html_node(urls, transforms, terms).
+        """
+        if cache is None:
+            return self.to_html_node(urls, transforms, terms).to_html()
+        buffer: HTMLBuffer = HTMLBuffer()
+        for html in iter_html(self.blocks, cache, urls, transforms, terms):
+            buffer.write(html)
+        return buffer.getvalue()
+
+
+def parse_document(markdown: str | Iterable[str]) -> Document:
+    """
+    Parse markdown, given as a string or as an iterable of lines,
+    into a document holding both the title and the blocks.
+    """
+    title: Optional[str] = None
+    blocks: list[tuple[BlockType, str]] = []
+    for block_type, block in iter_blocks(markdown):
+        if title is None:
+            title = block_title(block)
+        blocks.append((block_type, block))
+    return Document(title, blocks)
+
+
+def iter_html(blocks: Iterable[tuple[BlockType, str]],
+              cache: Optional[BlockCache] = None,
+              urls: Optional[UrlResolver] = None,
+              transforms: Optional[TransformPipeline] = None,
+              terms: Optional[SearchTerms] = None) -> Iterator[str]:
+    """
+    Render classified blocks one at a time, yielding the html of the
+    enclosing div piece by piece, so a document never has to be held
+    in memory as a whole.
+
+    The cache keeps the internal links and search terms of every
+    block with its html, so urls and terms record them for cached
+    blocks as well. Blocks the transforms may change are rendered
+    every time, their html depends on the blocks before them, and so
+    are blocks whose urls are resolved against the page directory.
+    Code blocks are not searched.
+    """
+    yield "<div>"
+    for block_type, block in blocks:
+        searched: bool = terms is not None and block_type != BlockType.CODE
+        if transforms is not None and transforms.selects(block_type.value):
+            node: HTMLNode = block_to_html_node(block_type, block, urls)
+            transforms.apply(node)
+            if searched:
+                terms.add(block_terms(node))
+            yield node.to_html()
+            continue
+        cached: Optional[CachedBlock] = (None if cache is None
+                                         else cache.get(block))
+        if cached is not None:
+            html, links, words = cached
+            if urls is not None:
+                urls.links.extend(links)
+            if searched:
+                terms.add(words)
+        else:
+            start: int = 0 if urls is None else len(urls.links)
+            node = block_to_html_node(block_type, block, urls)
+            html = node.to_html()
+            words = block_terms(node) if searched else ()
+            if searched:
+                terms.add(words)
+            links = () if urls is None else tuple(urls.links[start:])
+            if cache is not None and not (
+                    urls is not None and urls.depends_on_page(links)):
+                cache.put(block, html, links, words)
+        yield html
+    yield "</div>"
+
+
 def extract_title(markdown: str) -> str:
-    blocks: list[str] = markdown_to_blocks(markdown)
-    for block in blocks:
-        if block.startswith("# "):
-            return block.lstrip("# ").rstrip()
+    for _, block in iter_blocks(markdown):
+        title: Optional[str] = block_title(block)
+        if title is not None:
+            return title
     raise ValueError("Heading 1 is not found.")
 
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    blocks: list[str] = markdown_to_blocks(markdown)
-    children: list[HTMLNode] = []
-    for block in blocks:
-        block_type: BlockType = block_to_block_type(block)
-        if block_type == BlockType.PARAGRAPH:
-            children.append(paragraph_to_html_node(block))
-        if block_type == BlockType.HEADING:
-            children.append(heading_to_html_node(block))
-        if block_type == BlockType.CODE:
-            children.append(code_to_html_node(block))
-        if block_type == BlockType.QUOTE:
-            children.append(quote_to_html_node(block))
-        if block_type == BlockType.UNORDERED_LIST:
-            children.append(list_to_html_node(block))
-        if block_type == BlockType.ORDERED_LIST:
-            children.append(list_to_html_node(block))
-    return ParentNode("div", children)
-
-
-def paragraph_to_html_node(block: str) -> HTMLNode:
+def block_title(block: str) -> Optional[str]:
+    if block.startswith("# "):
+        return block.lstrip("# ").rstrip()
+    return None
+
+
+def markdown_to_html_node(
+        markdown: str,
+        transforms: Optional[TransformPipeline] = None) -> HTMLNode:
+    return parse_document(markdown).to_html_node(transforms=transforms)
+
+
+def block_to_html_node(block_type: BlockType, block: str,
+                       urls: Optional[UrlResolver] = None) -> HTMLNode:
+    if block_type == BlockType.HEADING:
+        return heading_to_html_node(block, urls)
+    if block_type == BlockType.CODE:
+        return code_to_html_node(block)
+    if block_type == BlockType.QUOTE:
+        return quote_to_html_node(block, urls)
+    if (block_type == BlockType.UNORDERED_LIST
+            or block_type == BlockType.ORDERED_LIST):
+        return list_to_html_node(block, urls)
+    return paragraph_to_html_node(block, urls)
+
+
+def paragraph_to_html_node(block: str,
+                           urls: Optional[UrlResolver] = None) -> HTMLNode:
     children: list[HTMLNode] = []
     block = block.replace("\n", " ")
     text_nodes: list[TextNode] = text_to_textnodes(block)
     for text_node in text_nodes:
-        children.append(text_node_to_html_node(text_node))
+        children.append(text_node_to_html_node(text_node, urls))
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block: str) -> HTMLNode:
+def heading_to_html_node(block: str,
+                         urls: Optional[UrlResolver] = None) -> HTMLNode:
     children: list[HTMLNode] = []
     hlen: int = block.find(" ")
     if hlen <= 6:
         block = block[hlen + 1:]
     text_nodes: list[TextNode] = text_to_textnodes(block)
     for text_node in text_nodes:
-        children.append(text_node_to_html_node(text_node))
-    return ParentNode(f"h{hlen}", children)
+        children.append(text_node_to_html_node(text_node, urls))
+    return ParentNode(HEADING_TAGS.get(hlen, f"h{hlen}"), children)
 
 
 def code_to_html_node(block: str) -> HTMLNode:
@@ -68,17 +200,19 @@ def code_to_html_node(block: str) -> HTMLNode:
     return ParentNode("pre", [LeafNode("code", block)])
 
 
-def quote_to_html_node(block: str) -> HTMLNode:
+def quote_to_html_node(block: str,
+                       urls: Optional[UrlResolver] = None) -> HTMLNode:
     children: list[HTMLNode] = []
     block = re.sub(r"\n>\n", " ", block)
     block = re.sub(r">\s+", "", block)
     text_nodes: list[TextNode] = text_to_textnodes(block)
     for text_node in text_nodes:
-        children.append(text_node_to_html_node(text_node))
+        children.append(text_node_to_html_node(text_node, urls))
     return ParentNode("blockquote", children)
 
 
-def list_to_html_node(block: str) -> HTMLNode:
+def list_to_html_node(block: str,
+                      urls: Optional[UrlResolver] = None) -> HTMLNode:
     tag: str = "ul"
     children: list[HTMLNode] = []
     lines: list[str] = block.split("\n")
@@ -91,30 +225,66 @@ def list_to_html_node(block: str) -> HTMLNode:
             tag = "ol"
         text_nodes: list[TextNode] = text_to_textnodes(line)
         for text_node in text_nodes:
-            grandchildren.append(text_node_to_html_node(text_node))
+            grandchildren.append(text_node_to_html_node(text_node, urls))
         children.append(ParentNode("li", grandchildren))
     return ParentNode(tag, children)
 
 
 def block_to_block_type(block: str) -> BlockType:
-    if re.match(r"^#{1,6}\s", block):
-        return BlockType.HEADING
-    if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
-    lines: list[str] = block.split("\n")
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.UNORDERED_LIST
-    if all(re.match(r"\d+.\s", line) for line in lines):
-        return BlockType.ORDERED_LIST
+    return classify_block(block.split("\n"))
+
+
+def classify_block(lines: list[str]) -> BlockType:
+    """
+    Classify a block from its lines, dispatching on the first
+    character so only one kind of block is ever checked.
+    """
+    first: str = lines[0][:1]
+    if first == "#":
+        if HEADING_PATTERN.match("\n".join(lines[:2])):
+            return BlockType.HEADING
+    elif first == "`":
+        if lines[0].startswith("```") and lines[-1].endswith("```"):
+            return BlockType.CODE
+    elif first == ">":
+        if all(line.startswith(">") for line in lines):
+            return BlockType.QUOTE
+    elif first == "-":
+        if all(line.startswith("- ") for line in lines):
+            return BlockType.UNORDERED_LIST
+    elif first.isdigit():
+        if all(ORDERED_ITEM_PATTERN.match(line) for line in lines):
+            return BlockType.ORDERED_LIST
     return BlockType.PARAGRAPH
 
 
 def markdown_to_blocks(markdown: str) -> list[str]:
-    blocks: list[str] = []
-    for block in markdown.split("\n\n"):
-        block = re.sub(r"(?=\n)\s+", "\n", block.strip())
-        if block:
-            blocks.append(block)
-    return blocks
+    return [block for _, block in iter_blocks(markdown)]
+
+
+def iter_blocks(
+        markdown: str | Iterable[str]) -> Iterator[tuple[BlockType, str]]:
+    """
+    Scan markdown line by line and yield every block with its type
+    as soon as the empty line closing it is read. Lines are stripped
+    of indentation and whitespace only lines are dropped.
+
+    Args:
+        markdown: Markdown string or iterable of lines without newlines
+    """
+    lines: Iterable[str] = (markdown.split("\n") if isinstance(markdown, str)
+                            else markdown)
+    block: list[str] = []
+    for line in lines:
+        if not line:
+            if block:
+                block[-1] = block[-1].rstrip()
+                yield classify_block(block), "\n".join(block)
+                block = []
+            continue
+        line = line.lstrip()
+        if line:
+            block.append(line)
+    if block:
+        block[-1] = block[-1].rstrip()
+        yield classify_block(block), "\n".join(block)
@@ -0,0 +1,190 @@
+import re
+import threading
+from typing import Callable
+
+# Elements whose content is kept exactly as written.
+PRESERVED_PATTERN = re.compile(
+        r"<(pre|code|textarea|script|style)\b.*?</\1\s*>",
+        re.DOTALL | re.IGNORECASE)
+PRESERVED_OPEN_PATTERN = re.compile(r"<(pre|code|textarea|script|style)\b",
+                                    re.IGNORECASE)
+COMMENT_PATTERN = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+COMMENT_OPEN_PATTERN = re.compile(r"<!--(?!\[if)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+BLOCK_TAGS: tuple[str, ...] = (
+        "html", "head", "body", "title", "meta", "link", "article", "section",
+        "header", "footer", "nav", "main", "aside", "div", "p", "blockquote",
+        "ul", "ol", "li", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "br",
+        "table", "thead", "tbody", "tr", "th", "td", "!DOCTYPE")
+BLOCK_TAG_PATTERN = re.compile(
+        r"\s*(</?(?:" + "|".join(BLOCK_TAGS) + r")\b[^>]*>)\s*",
+        re.IGNORECASE)
+
+CSS_TOKEN_PATTERN = re.compile(
+        r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)""", re.DOTALL)
+CSS_PUNCTUATION_PATTERN = re.compile(r"\s*([{};,>])\s*")
+CSS_COLON_PATTERN = re.compile(r":\s+")
+
+
+def minify_html(html: str) -> str:
+    """
+    Drop comments, collapse runs of whitespace to one space and remove
+    whitespace around block level tags, where browsers ignore it.
+    Whitespace between inline elements is kept as one space, since it
+    is rendered. pre, code, textarea, script and style elements are
+    left untouched.
+    """
+    parts: list[str] = []
+    position: int = 0
+    for match in PRESERVED_PATTERN.finditer(html):
+        parts.append(_minify_markup(html[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_minify_markup(html[position:]))
+    return "".join(parts)
+
+
+def _minify_markup(html: str) -> str:
+    html = COMMENT_PATTERN.sub("", html)
+    html = WHITESPACE_PATTERN.sub(" ", html)
+    return BLOCK_TAG_PATTERN.sub(r"\1", html)
+
+
+def _stream_cut(html: str) -> int:
+    """
+    Position of the last block level tag in html that minify_html
+    treats as plain markup, so html before and after it minify to the
+    same as html as a whole. The cut is taken before the whitespace
+    leading up to the tag, never inside or right after a preserved
+    element or comment, since removing a comment joins the whitespace
+    around it, and never after one that is not closed yet. 0 when
+    there is no such tag.
+    """
+    start: int = 0
+    end: int = len(html)
+    while opener := PRESERVED_OPEN_PATTERN.search(html, start):
+        preserved = PRESERVED_PATTERN.match(html, opener.start())
+        if preserved is None:
+            end = opener.start()
+            break
+        start = preserved.end()
+    while opener := COMMENT_OPEN_PATTERN.search(html, start, end):
+        comment = COMMENT_PATTERN.match(html, opener.start())
+        if comment is None or comment.end() > end:
+            end = opener.start()
+            break
+        start = comment.end()
+    cut: int = 0
+    for match in BLOCK_TAG_PATTERN.finditer(html, start, end):
+        if match.start() > start:
+            cut = match.start()
+    return cut
+
+
+class HtmlMinifier:
+    """
+    Minify html written in pieces, like a streamed page, the same as
+    minify_html would the whole page. Pieces are held back until a
+    block level tag makes it safe to minify what came before, so
+    whitespace and comments spanning pieces are handled like anywhere
+    else.
+    """
+
+    def __init__(self, write: Callable[[str], object]) -> None:
+        self._write = write
+        self._pending: str = ""
+        self.before: int = 0
+        self.after: int = 0
+
+    def write(self, html: str) -> None:
+        self._pending += html
+        cut: int = _stream_cut(self._pending)
+        if cut:
+            self._flush(self._pending[:cut])
+            self._pending = self._pending[cut:]
+
+    def close(self) -> None:
+        self._flush(self._pending)
+        self._pending = ""
+
+    def _flush(self, html: str) -> None:
+        minified: str = minify_html(html)
+        self.before += len(html.encode("utf-8"))
+        self.after += len(minified.encode("utf-8"))
+        self._write(minified)
+
+
+def minify_css(css: str) -> str:
+    """
+    Drop comments and whitespace that carries no meaning in css.
+    Strings are left untouched, and so are spaces before colons and
+    around + and -, which matter in selectors and calc().
+    """
+    parts: list[str] = []
+    position: int = 0
+    for match in CSS_TOKEN_PATTERN.finditer(css):
+        parts.append(_minify_rules(css[position:match.start()]))
+        if match.group(1) is not None:
+            parts.append(match.group(1))
+        position = match.end()
+    parts.append(_minify_rules(css[position:]))
+    return "".join(parts).strip().replace(";}", "}")
+
+
+def _minify_rules(css: str) -> str:
+    css = WHITESPACE_PATTERN.sub(" ", css)
+    css = CSS_PUNCTUATION_PATTERN.sub(r"\1", css)
+    return CSS_COLON_PATTERN.sub(":", css)
+
+
+class MinifyStats:
+    """
+    Bytes before and after minification, per file and in total. Files
+    can be added from several threads.
+    """
+
+    def __init__(self) -> None:
+        self.files: list[tuple[str, int, int]] = []
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {"files": self.files}
+
+    def __setstate__(self, state: dict) -> None:
+        self.files = state["files"]
+        self.lock = threading.Lock()
+
+    def add(self, path: str, original: str, minified: str) -> str:
+        """
+        Record the savings of minifying the text written to path.
+
+        Returns:
+            Log line of the savings
+        """
+        return self.record(path, len(original.encode("utf-8")),
+                           len(minified.encode("utf-8")))
+
+    def record(self, path: str, before: int, after: int) -> str:
+        with self.lock:
+            self.files.append((path, before, after))
+        return f"Minified {path}: {before} -> {after} bytes"
+
+    def drain(self) -> list[tuple[str, int, int]]:
+        """
+        Take the recorded files, used by workers to hand them over to
+        the parent process.
+        """
+        with self.lock:
+            files: list[tuple[str, int, int]] = self.files
+            self.files = []
+        return files
+
+    def extend(self, files: list[tuple[str, int, int]]) -> None:
+        with self.lock:
+            self.files.extend(files)
+
+    def report(self) -> str:
+        before: int = sum(file[1] for file in self.files)
+        after: int = sum(file[2] for file in self.files)
+        return (f"Minified {len(self.files)} files: {before} -> {after} "
+                + f"bytes, saved {before - after} bytes")
@@ -0,0 +1,154 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from inventory import FileEntry, Inventory
+
+COMPRESSIBLE_EXTENSIONS: tuple[str, ...] = (".html", ".css", ".js", ".svg")
+
+
+def _encoders() -> dict[str, Callable[[bytes], bytes]]:
+    """
+    Compressors available in the standard library, by file suffix.
+    zstd is only part of it from Python 3.14 on.
+    """
+    encoders: dict[str, Callable[[bytes], bytes]] = {
+        ".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+    except ImportError:
+        return encoders
+    encoders[".zst"] = lambda data: zstd.compress(data, level=19)
+    return encoders
+
+
+ENCODERS: dict[str, Callable[[bytes], bytes]] = _encoders()
+
+
+class CompressResult:
+    def __init__(self) -> None:
+        self.compressed: list[str] = []
+        self.unchanged: list[str] = []
+        self.removed: list[str] = []
+        self.original_bytes: int = 0
+        self.encoded_bytes: dict[str, int] = dict.fromkeys(ENCODERS, 0)
+
+    def __repr__(self) -> str:
+        return (f"CompressResult(compressed={len(self.compressed)},"
+                + f" unchanged={len(self.unchanged)},"
+                + f" removed={len(self.removed)})")
+
+    def add(self, original: int, sizes: Iterable[int]) -> None:
+        self.original_bytes += original
+        for suffix, size in zip(ENCODERS, sizes):
+            self.encoded_bytes[suffix] += size
+
+    def saved_bytes(self, suffix: str = ".gz") -> int:
+        return self.original_bytes - self.encoded_bytes[suffix]
+
+    def report(self) -> str:
+        lines: list[str] = [
+                f"Precompressed {len(self.compressed)} files "
+                + f"({len(self.unchanged)} unchanged, "
+                + f"{len(self.removed)} stale removed), "
+                + f"{self.original_bytes} bytes"]
+        for suffix, size in self.encoded_bytes.items():
+            ratio: float = (size / self.original_bytes * 100
+                            if self.original_bytes else 100.0)
+            lines.append(f"{suffix:<6}{size:>12} bytes ({ratio:.1f}%), "
+                         + f"saved {self.saved_bytes(suffix)} bytes")
+        return "\n".join(lines)
+
+
+def is_compressible(entry: FileEntry, min_size: int) -> bool:
+    return (entry.rel_path.endswith(COMPRESSIBLE_EXTENSIONS)
+            and entry.st_size >= min_size)
+
+
+def compress_file(path: str, suffixes: Iterable[str]) -> list[int]:
+    """
+    Write a compressed sibling of path for every suffix, with the
+    modification time of path so later builds can tell it is current.
+
+    Returns:
+        Size of every sibling written
+    """
+    with open(path, "rb") as f:
+        data: bytes = f.read()
+    stat: os.stat_result = os.stat(path)
+    sizes: list[int] = []
+    for suffix in suffixes:
+        compressed: bytes = ENCODERS[suffix](data)
+        sibling: str = path + suffix
+        tmp_path: str = sibling + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, sibling)
+        sizes.append(len(compressed))
+    return sizes
+
+
+def precompress(root: str, min_size: int = 1024, workers: int = 1,
+                inventory: Optional[Inventory] = None) -> CompressResult:
+    """
+    Write .gz siblings (and .zst ones where the standard library has
+    zstd) next to every html, css, js and svg file below root of at
+    least min_size bytes, for static hosts that serve precompressed
+    files. Siblings that already match their file are kept, siblings
+    whose file is gone or too small are removed.
+
+    Args:
+        root: Output directory path
+        min_size: Smallest file size worth compressing, in bytes
+        workers: Number of threads compressing files
+        inventory: Scan of root to reuse, root is scanned when None;
+            it provides the size and modification time of every file
+            and sibling, so nothing is stated twice
+    """
+    result: CompressResult = CompressResult()
+    suffixes: tuple[str, ...] = tuple(ENCODERS)
+    pending: list[str] = []
+    if inventory is None:
+        inventory = Inventory.scan(root, ())
+    for entry in inventory:
+        source_path, suffix = os.path.splitext(entry.rel_path)
+        if suffix in suffixes and source_path.endswith(
+                COMPRESSIBLE_EXTENSIONS):
+            source: Optional[FileEntry] = inventory.get(source_path)
+            if source is None or not is_compressible(source, min_size):
+                os.remove(entry.path)
+                result.removed.append(entry.path)
+            continue
+        if not is_compressible(entry, min_size):
+            continue
+        siblings: list[FileEntry] = []
+        for sibling_suffix in suffixes:
+            sibling: Optional[FileEntry] = inventory.get(
+                    entry.rel_path + sibling_suffix)
+            if sibling is None:
+                break
+            siblings.append(sibling)
+        if (len(siblings) == len(suffixes)
+                and all(sibling.st_mtime_ns == entry.st_mtime_ns
+                        for sibling in siblings)):
+            result.unchanged.append(entry.path)
+            result.add(entry.st_size,
+                       [sibling.st_size for sibling in siblings])
+            continue
+        pending.append(entry.path)
+
+    def compress(path: str) -> list[int]:
+        return compress_file(path, suffixes)
+
+    if workers > 1 and len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            sizes: Iterable[list[int]] = list(executor.map(compress, pending))
+    else:
+        sizes = map(compress, pending)
+    for path, sibling_sizes in zip(pending, sizes):
+        result.compressed.append(path)
+        result.add(os.path.getsize(path), sibling_sizes)
+    return result
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Iterator, Optional
+
+# name, page, start, wall seconds, cpu seconds, process id, thread id
+TraceEvent = tuple[str, Optional[str], float, float, float, int, int]
+
+_NULL_SPAN: AbstractContextManager = nullcontext()
+
+
+class NullProfiler:
+    """
+    Profiler used when profiling is off. Every hook returns the same
+    do-nothing context manager, so instrumented code pays only for a
+    method call.
+    """
+
+    enabled: bool = False
+
+    def stage(self, name: str,
+              page: Optional[str] = None) -> AbstractContextManager:
+        return _NULL_SPAN
+
+    def drain(self) -> list[TraceEvent]:
+        return []
+
+    def extend(self, events: list[TraceEvent]) -> None:
+        pass
+
+
+NULL_PROFILER: NullProfiler = NullProfiler()
+
+
+class Profiler(NullProfiler):
+    """
+    Records wall and cpu time of every build stage, optionally tied
+    to the page it worked on.
+    """
+
+    enabled: bool = True
+
+    def __init__(self) -> None:
+        self.events: list[TraceEvent] = []
+
+    @contextmanager
+    def stage(self, name: str,
+              page: Optional[str] = None) -> Iterator[None]:
+        wall: float = time.perf_counter()
+        cpu: float = time.thread_time()
+        try:
+            yield
+        finally:
+            self.events.append((name, page, wall,
+                                time.perf_counter() - wall,
+                                time.thread_time() - cpu,
+                                os.getpid(), threading.get_ident()))
+
+    def drain(self) -> list[TraceEvent]:
+        """
+        Take the recorded events, used by workers to hand their
+        events over to the parent process.
+        """
+        events: list[TraceEvent] = self.events
+        self.events = []
+        return events
+
+    def extend(self, events: list[TraceEvent]) -> None:
+        self.events.extend(events)
+
+    def stage_totals(self) -> dict[str, tuple[float, float, int]]:
+        totals: dict[str, tuple[float, float, int]] = {}
+        for name, _, _, wall, cpu, _, _ in self.events:
+            total_wall, total_cpu, count = totals.get(name, (0.0, 0.0, 0))
+            totals[name] = (total_wall + wall, total_cpu + cpu, count + 1)
+        return totals
+
+    def slowest_pages(self, count: int) -> list[tuple[str, float]]:
+        pages: dict[str, float] = {}
+        for _, page, _, wall, _, _, _ in self.events:
+            if page is not None:
+                pages[page] = pages.get(page, 0.0) + wall
+        return sorted(pages.items(), key=lambda item: item[1],
+                      reverse=True)[:count]
+
+    def report(self, top: int = 10) -> str:
+        lines: list[str] = [f"{'stage':<12}{'count':>8}{'wall ms':>12}"
+                            + f"{'cpu ms':>12}"]
+        for name, (wall, cpu, count) in self.stage_totals().items():
+            lines.append(f"{name:<12}{count:>8}{wall * 1000:>12.1f}"
+                         + f"{cpu * 1000:>12.1f}")
+        slowest: list[tuple[str, float]] = self.slowest_pages(top)
+        if slowest:
+            lines.append(f"Slowest {len(slowest)} pages:")
+            for page, wall in slowest:
+                lines.append(f"{wall * 1000:>10.1f} ms  {page}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """
+        Export the events in the Chrome trace event format, which
+        chrome://tracing and Perfetto can load.
+        """
+        origin: float = min((event[2] for event in self.events), default=0)
+        trace_events: list[dict] = []
+        for name, page, start, wall, cpu, pid, tid in self.events:
+            args: dict = {"cpu_ms": round(cpu * 1000, 3)}
+            if page is not None:
+                args["page"] = page
+            trace_events.append({
+                "name": name, "cat": "build", "ph": "X",
+                "ts": round((start - origin) * 1e6, 1),
+                "dur": round(wall * 1e6, 1),
+                "pid": pid, "tid": tid, "args": args,
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace_events,
+                       "displayTimeUnit": "ms"}, f)
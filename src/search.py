@@ -0,0 +1,210 @@
+import json
+import os
+import re
+from typing import Iterable, Iterator, Optional
+
+from htmlnode import HTMLNode
+from manifest import hash_text
+from transforms import node_text
+
+SEARCH_DIR: str = "search"
+SEARCH_STATE: str = "search.json"
+SEARCH_VERSION: int = 2
+# Terms are sharded by their first characters, so a query only
+# downloads the shards of its terms.
+PREFIX_LENGTH: int = 2
+MIN_TERM_LENGTH: int = 2
+MAX_TERM_LENGTH: int = 40
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """
+    Split text into lowercase words, dropping words too short or too
+    long to be worth searching for.
+    """
+    for match in TOKEN_PATTERN.finditer(text):
+        term: str = match.group().casefold()
+        if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH:
+            yield term
+
+
+def block_terms(node: HTMLNode) -> tuple[str, ...]:
+    """
+    Distinct terms of the text a block was rendered from, in the
+    order they first appear.
+    """
+    return tuple(dict.fromkeys(tokenize(node_text(node))))
+
+
+def delta_encode(ids: Iterable[int]) -> list[int]:
+    """
+    Store ascending ids as the first id and the gaps between the rest,
+    which stay small however many pages the site has.
+    """
+    encoded: list[int] = []
+    previous: int = 0
+    for page_id in ids:
+        encoded.append(page_id - previous)
+        previous = page_id
+    return encoded
+
+
+def delta_decode(encoded: Iterable[int]) -> list[int]:
+    ids: list[int] = []
+    page_id: int = 0
+    for gap in encoded:
+        page_id += gap
+        ids.append(page_id)
+    return ids
+
+
+class SearchTerms:
+    """
+    Collects the terms of the page being rendered, block by block as
+    their nodes are created. The block cache keeps the terms of a
+    block with its html, so cached blocks add theirs too.
+    """
+
+    def __init__(self) -> None:
+        self.terms: set[str] = set()
+
+    def __repr__(self) -> str:
+        return f"SearchTerms({len(self.terms)} terms)"
+
+    def add(self, terms: Iterable[str]) -> None:
+        self.terms.update(terms)
+
+    def drain(self) -> list[str]:
+        """
+        Take the terms added since the last call, those of one page,
+        in the sorted order the manifest stores them in.
+        """
+        terms: list[str] = sorted(self.terms)
+        self.terms = set()
+        return terms
+
+
+class SearchResult:
+    def __init__(self) -> None:
+        self.pages: int = 0
+        self.terms: int = 0
+        self.written: list[str] = []
+        self.unchanged: list[str] = []
+        self.removed: list[str] = []
+
+    def __repr__(self) -> str:
+        return (f"SearchResult(written={len(self.written)},"
+                + f" unchanged={len(self.unchanged)},"
+                + f" removed={len(self.removed)})")
+
+    def report(self) -> str:
+        return (f"Search index: {self.pages} pages, {self.terms} terms, "
+                + f"wrote {len(self.written)} of "
+                + f"{len(self.written) + len(self.unchanged)} files, "
+                + f"removed {len(self.removed)}")
+
+
+def shard_file(prefix: str) -> str:
+    """
+    File name of the shard for a term prefix: the hex digits of its
+    utf-8 bytes, so any script gives a plain ascii name that needs no
+    escaping in a url and no care on case insensitive file systems.
+    """
+    return f"{prefix.encode('utf-8').hex()}.json"
+
+
+def write_search_index(
+        out_dir: str, state_path: str,
+        pages: dict[str, tuple[str, str, list[str]]]) -> SearchResult:
+    """
+    Write the inverted index of the pages into out_dir for client side
+    search. index.json lists the url and title of every page id and
+    maps the term prefixes there are shards for to their shard file
+    named by shard_file (6162.json for terms starting with ab), each
+    shard maps its terms to the delta encoded ids of the pages
+    containing them. Clients look the shard of a term up by its first
+    prefix_length characters.
+
+    A page keeps its id for as long as it exists, the ids of removed
+    pages are given to new ones. Only the files whose content changed
+    since the last build are written, so a change to a few pages only
+    rewrites the shards of the terms they gained or lost. The ids and
+    the hashes of the files written are kept at state_path.
+
+    Args:
+        out_dir: Directory of the index in the output
+        state_path: Path of the index state in the build cache
+        pages: Url, title and search terms of every page by manifest
+            key
+
+    Returns:
+        Result listing the files written, unchanged and removed
+    """
+    result: SearchResult = SearchResult()
+    state: dict = {}
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        pass
+    if state.get("version") != SEARCH_VERSION:
+        # Files of an older layout are still removed below.
+        state = {"files": dict.fromkeys(state.get("files", {}), "")}
+    ids: dict[str, int] = {key: page_id
+                           for key, page_id in state.get("ids", {}).items()
+                           if key in pages}
+    digests: dict[str, str] = state.get("files", {})
+    used: set[int] = set(ids.values())
+    free: Iterator[int] = (page_id for page_id in range(len(pages) + 1)
+                           if page_id not in used)
+    for key in sorted(pages):
+        if key not in ids:
+            ids[key] = next(free)
+    listing: list[Optional[list[str]]] = [None] * (max(ids.values(),
+                                                       default=-1) + 1)
+    postings: dict[str, list[int]] = {}
+    for key, page_id in ids.items():
+        url, title, terms = pages[key]
+        listing[page_id] = [url, title]
+        for term in terms:
+            postings.setdefault(term, []).append(page_id)
+    shards: dict[str, dict[str, list[int]]] = {}
+    for term in sorted(postings):
+        shards.setdefault(term[:PREFIX_LENGTH], {})[term] = delta_encode(
+                sorted(postings[term]))
+    files: dict[str, object] = {
+        shard_file(prefix): shard for prefix, shard in shards.items()}
+    files["index.json"] = {"version": SEARCH_VERSION,
+                           "prefix_length": PREFIX_LENGTH,
+                           "pages": listing,
+                           "shards": {prefix: shard_file(prefix)
+                                      for prefix in shards}}
+    written: dict[str, str] = {}
+    os.makedirs(out_dir, exist_ok=True)
+    for name, data in files.items():
+        text: str = json.dumps(data, ensure_ascii=False, sort_keys=True,
+                               separators=(",", ":"))
+        digest: str = hash_text(text)
+        written[name] = digest
+        path: str = os.path.join(out_dir, name)
+        if digests.get(name) == digest and os.path.exists(path):
+            result.unchanged.append(path)
+            continue
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        result.written.append(path)
+    for name in sorted(set(digests) - set(written)):
+        path = os.path.join(out_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+            result.removed.append(path)
+    state_dir: str = os.path.dirname(state_path)
+    if state_dir:
+        os.makedirs(state_dir, exist_ok=True)
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"version": SEARCH_VERSION, "ids": ids, "files": written},
+                  f, sort_keys=True)
+    result.pages = len(ids)
+    result.terms = len(postings)
+    return result
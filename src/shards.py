@@ -0,0 +1,35 @@
+import argparse
+import hashlib
+
+Shard = tuple[int, int]
+
+
+def parse_shard(value: str) -> Shard:
+    """
+    Parse a shard given as index/count, with 0 <= index < count.
+    """
+    index, _, count = value.partition("/")
+    try:
+        shard: Shard = (int(index), int(count))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+                f"invalid shard {value!r}, expected INDEX/COUNT")
+    if not 0 <= shard[0] < shard[1]:
+        raise argparse.ArgumentTypeError(
+                f"invalid shard {value!r}, INDEX must be in 0..COUNT-1")
+    return shard
+
+
+def shard_of(rel_path: str, count: int) -> int:
+    """
+    Shard a page belongs to, from the hash of its source path relative
+    to the content directory. The hash does not depend on the process,
+    machine or the other pages, so a page stays in its shard as pages
+    come and go.
+    """
+    digest: bytes = hashlib.sha256(rel_path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def shard_name(shard: Shard) -> str:
+    return f"{shard[0]}-of-{shard[1]}"
@@ -0,0 +1,200 @@
+import heapq
+import os
+import re
+from datetime import datetime, timezone
+from typing import Iterable, Optional, TextIO
+from xml.sax.saxutils import escape, quoteattr
+
+SITEMAP: str = "sitemap.xml"
+FEED: str = "feed.xml"
+# Limits of a single sitemap file, above them an index lists several.
+SITEMAP_URLS: int = 50_000
+SITEMAP_BYTES: int = 50 * 1024 * 1024
+SITEMAP_PART_PATTERN = re.compile(r"sitemap-\d+\.xml")
+SITEMAP_NS: str = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NS: str = "http://www.w3.org/2005/Atom"
+XML_DECLARATION: str = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_END: str = "</urlset>\n"
+
+# url, title and modification time in seconds of a page
+PageInfo = tuple[str, str, int]
+
+
+def w3c_datetime(modified: int) -> str:
+    return datetime.fromtimestamp(modified, timezone.utc).strftime(
+            "%Y-%m-%dT%H:%M:%SZ")
+
+
+def absolute_url(site_url: str, url: str) -> str:
+    return site_url.rstrip("/") + url
+
+
+class SitemapWriter:
+    """
+    Writes the urls of a sitemap as they come, into parts that stay
+    within the limits of the sitemap protocol, so memory does not grow
+    with the site. Parts are written to temporary files and only put
+    in place by close.
+    """
+
+    def __init__(self, dest_dir: str, site_url: str, basepath: str = "/",
+                 max_urls: int = SITEMAP_URLS,
+                 max_bytes: int = SITEMAP_BYTES) -> None:
+        self.dest_dir = dest_dir
+        self.site_url = site_url
+        self.basepath = basepath
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        # temporary path and latest modification of every part
+        self.parts: list[tuple[str, int]] = []
+        self.file: Optional[TextIO] = None
+        self.urls: int = 0
+        self.bytes: int = 0
+        self.latest: int = 0
+        self.total: int = 0
+
+    def __repr__(self) -> str:
+        return f"SitemapWriter({self.dest_dir}, {self.total} urls)"
+
+    def add(self, url: str, modified: int) -> None:
+        entry: str = (f"<url><loc>{escape(absolute_url(self.site_url, url))}"
+                      + f"</loc><lastmod>{w3c_datetime(modified)}</lastmod>"
+                      + "</url>\n")
+        size: int = len(entry.encode("utf-8"))
+        if (self.file is None or self.urls >= self.max_urls
+                or self.bytes + size + len(URLSET_END) > self.max_bytes):
+            self._start_part()
+        assert self.file is not None
+        self.file.write(entry)
+        self.urls += 1
+        self.bytes += size
+        self.latest = max(self.latest, modified)
+        self.total += 1
+
+    def _start_part(self) -> None:
+        self._finish_part()
+        path: str = os.path.join(self.dest_dir,
+                                 f"sitemap-{len(self.parts) + 1}.xml.tmp")
+        self.file = open(path, "w", encoding="utf-8")
+        header: str = XML_DECLARATION + f'<urlset xmlns="{SITEMAP_NS}">\n'
+        self.file.write(header)
+        self.parts.append((path, 0))
+        self.urls = 0
+        self.bytes = len(header.encode("utf-8"))
+        self.latest = 0
+
+    def _finish_part(self) -> None:
+        if self.file is None:
+            return
+        self.file.write(URLSET_END)
+        self.file.close()
+        self.file = None
+        self.parts[-1] = (self.parts[-1][0], self.latest)
+
+    def close(self) -> list[str]:
+        """
+        Put the sitemap in place: a single part becomes sitemap.xml,
+        several are listed by a sitemap index in sitemap.xml. Parts
+        left over from a larger sitemap are removed.
+
+        Returns:
+            Paths of the files written
+        """
+        if not self.parts:
+            self._start_part()
+        self._finish_part()
+        sitemap_path: str = os.path.join(self.dest_dir, SITEMAP)
+        written: list[str] = []
+        if len(self.parts) == 1:
+            os.replace(self.parts[0][0], sitemap_path)
+        else:
+            tmp_path: str = sitemap_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(XML_DECLARATION
+                        + f'<sitemapindex xmlns="{SITEMAP_NS}">\n')
+                for part_path, latest in self.parts:
+                    path: str = part_path.removesuffix(".tmp")
+                    os.replace(part_path, path)
+                    written.append(path)
+                    url: str = absolute_url(
+                            self.site_url,
+                            self.basepath.rstrip("/") + "/"
+                            + os.path.basename(path))
+                    f.write(f"<sitemap><loc>{escape(url)}</loc>"
+                            + f"<lastmod>{w3c_datetime(latest)}</lastmod>"
+                            + "</sitemap>\n")
+                f.write("</sitemapindex>\n")
+            os.replace(tmp_path, sitemap_path)
+        written.append(sitemap_path)
+        for name in os.listdir(self.dest_dir):
+            path = os.path.join(self.dest_dir, name)
+            if SITEMAP_PART_PATTERN.fullmatch(name) and path not in written:
+                os.remove(path)
+        return written
+
+
+def write_sitemap(dest_dir: str, site_url: str,
+                  pages: Iterable[PageInfo], basepath: str = "/",
+                  max_urls: int = SITEMAP_URLS) -> tuple[int, list[str]]:
+    """
+    Stream the sitemap of the pages into dest_dir, served at basepath,
+    with the urls rooted at site_url.
+
+    Returns:
+        Number of urls and paths of the files written, sitemap.xml
+        last
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    writer: SitemapWriter = SitemapWriter(dest_dir, site_url, basepath,
+                                          max_urls)
+    try:
+        for url, _, modified in pages:
+            writer.add(url, modified)
+    except BaseException:
+        if writer.file is not None:
+            writer.file.close()
+        for part_path, _ in writer.parts:
+            os.remove(part_path)
+        raise
+    return writer.total, writer.close()
+
+
+def write_feed(path: str, site_url: str, section_url: str, title: str,
+               pages: Iterable[PageInfo], entries: int = 20) -> int:
+    """
+    Write an Atom feed of the most recently modified pages below
+    section_url to path. Only the newest entries are kept while the
+    pages go by, so memory depends on the length of the feed rather
+    than on the site.
+
+    Returns:
+        Number of entries written
+    """
+    newest: list[PageInfo] = heapq.nlargest(
+            entries,
+            (page for page in pages
+             if page[0].startswith(section_url) and page[0] != section_url),
+            key=lambda page: (page[2], page[0]))
+    feed_url: str = absolute_url(site_url, section_url)
+    updated: str = w3c_datetime(max((page[2] for page in newest),
+                                    default=0))
+    tmp_path: str = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(XML_DECLARATION + f'<feed xmlns="{ATOM_NS}">\n'
+                + f"<title>{escape(title)}</title>\n"
+                + f"<link href={quoteattr(feed_url)}/>\n"
+                + "<link rel=\"self\" href="
+                + f"{quoteattr(feed_url + os.path.basename(path))}/>\n"
+                + f"<id>{escape(feed_url)}</id>\n"
+                + f"<updated>{updated}</updated>\n"
+                + f"<author><name>{escape(title)}</name></author>\n")
+        for url, page_title, modified in newest:
+            page_url: str = absolute_url(site_url, url)
+            f.write(f"<entry><title>{escape(page_title)}</title>"
+                    + f"<link href={quoteattr(page_url)}/>"
+                    + f"<id>{escape(page_url)}</id>"
+                    + f"<updated>{w3c_datetime(modified)}</updated>"
+                    + "</entry>\n")
+        f.write("</feed>\n")
+    os.replace(tmp_path, path)
+    return len(newest)
@@ -0,0 +1,198 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from inventory import FileEntry, Inventory
+from manifest import hash_file, remove_output
+from minify import MinifyStats, minify_css
+
+
+class SyncResult:
+    def __init__(self) -> None:
+        self.files: list[str] = []
+        self.copied: list[str] = []
+        self.unchanged: list[str] = []
+        self.removed: list[str] = []
+
+    def __repr__(self) -> str:
+        return (f"SyncResult(copied={len(self.copied)},"
+                + f" unchanged={len(self.unchanged)},"
+                + f" removed={len(self.removed)})")
+
+
+def is_unchanged(src_path: str, dst_path: str,
+                 checksum: bool = False,
+                 src_stat: Optional[os.stat_result | FileEntry] = None
+                 ) -> bool:
+    """
+    Decide whether dst_path already holds the content of src_path.
+    Sizes must match, then either the modification times must match
+    or, in checksum mode, the content hashes. src_stat saves stating
+    src_path again when a scan already did.
+    """
+    try:
+        if src_stat is None:
+            src_stat = os.stat(src_path)
+        dst_stat: os.stat_result = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    if os.path.samestat(src_stat, dst_stat):
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(src_path) == hash_file(dst_path)
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+def publish_file(src_path: str, dst_path: str,
+                 hardlink: bool = False) -> None:
+    """
+    Copy src_path to dst_path keeping its metadata. In hardlink mode
+    the file is linked instead, falling back to a copy when linking
+    is not possible (e.g. across filesystems).
+    """
+    if os.path.lexists(dst_path):
+        os.remove(dst_path)
+    if hardlink:
+        try:
+            os.link(src_path, dst_path)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src_path, dst_path)
+
+
+def publish_css(src_path: str, dst_path: str, minify: MinifyStats) -> str:
+    """
+    Write the minified css of src_path to dst_path, with the
+    modification time of src_path so later syncs can tell it is
+    current. The file is replaced rather than written in place, so a
+    hardlink to the source is never written through.
+
+    Returns:
+        Log line of the savings
+    """
+    with open(src_path, encoding="utf-8") as f:
+        css: str = f.read()
+    minified: str = minify_css(css)
+    tmp_path: str = dst_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(minified)
+    stat: os.stat_result = os.stat(src_path)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path, dst_path)
+    return minify.add(dst_path, css, minified)
+
+
+def is_minified(src_path: str, dst_path: str,
+                src_stat: Optional[os.stat_result | FileEntry] = None
+                ) -> bool:
+    """
+    Decide whether dst_path already holds the minified css of
+    src_path, which publish_css gave the same modification time.
+    """
+    try:
+        if src_stat is None:
+            src_stat = os.stat(src_path)
+        return src_stat.st_mtime_ns == os.stat(dst_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def remove_orphans(dst: str, orphans: Iterable[str]) -> list[str]:
+    """
+    Delete orphaned files below dst and any directories left empty.
+
+    Returns:
+        List of removed file paths
+    """
+    removed: list[str] = []
+    for rel_path in sorted(orphans):
+        dst_path: str = os.path.join(dst, rel_path)
+        if not os.path.isfile(dst_path):
+            continue
+        remove_output(dst_path, dst)
+        removed.append(dst_path)
+    return removed
+
+
+def sync_static(
+        src: str, dst: str, previous: Optional[Iterable[str]] = None,
+        checksum: bool = False, hardlink: bool = False,
+        workers: int = 1,
+        names: Optional[dict[str, str]] = None,
+        minify: Optional[MinifyStats] = None,
+        inventory: Optional[Inventory] = None,
+        republish_css: bool = False) -> SyncResult:
+    """
+    Differentially synchronize all files from src into dst.
+    Only new or changed files are copied and files that were synced
+    before but no longer exist in src are removed. Anything else in
+    dst, such as generated pages, is left alone.
+
+    Args:
+        src: Source directory path
+        dst: Destination directory path
+        previous: Relative paths synced by the previous build
+        checksum: Compare content hashes instead of modification times
+        hardlink: Publish files as hardlinks instead of copies
+        workers: Number of threads used to copy files
+        names: Relative path in dst of each file, when it differs
+            from its path in src
+        minify: Statistics to record into when css files are to be
+            minified, None to copy them as they are
+        inventory: Scan of src to reuse, src is scanned when None
+        republish_css: Publish every css file again, as when minify
+            was switched on or off since the previous sync
+
+    Returns:
+        Result whose files are the relative paths published in dst
+    """
+    result: SyncResult = SyncResult()
+    sources: Inventory = (Inventory.scan(src) if inventory is None
+                          else inventory)
+    files: list[str] = [(names or {}).get(entry.rel_path, entry.rel_path)
+                        for entry in sources]
+    result.files = files
+    pending: list[tuple[str, str]] = []
+    for entry, rel_path in zip(sources, files):
+        src_path: str = entry.path
+        dst_path: str = os.path.join(dst, rel_path)
+        if republish_css and rel_path.endswith(".css"):
+            unchanged: bool = False
+        elif minify is not None and rel_path.endswith(".css"):
+            unchanged = is_minified(src_path, dst_path, entry)
+        else:
+            unchanged = is_unchanged(src_path, dst_path, checksum, entry)
+        if unchanged:
+            result.unchanged.append(dst_path)
+            continue
+        pending.append((src_path, dst_path))
+    for dst_dir in sorted({os.path.dirname(dst_path)
+                           for _, dst_path in pending}):
+        os.makedirs(dst_dir, exist_ok=True)
+
+    def publish(paths: tuple[str, str]) -> Optional[str]:
+        if minify is not None and paths[1].endswith(".css"):
+            return publish_css(paths[0], paths[1], minify)
+        publish_file(paths[0], paths[1], hardlink)
+        return None
+
+    if workers > 1 and len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            logs: Iterable[Optional[str]] = list(executor.map(publish,
+                                                              pending))
+    else:
+        logs = map(publish, pending)
+    for (src_path, dst_path), log in zip(pending, logs):
+        print(f"Copied file: {src_path} to {dst_path}")
+        if log is not None:
+            print(log)
+        result.copied.append(dst_path)
+    orphans: set[str] = set(previous or ()) - set(files)
+    result.removed = remove_orphans(dst, orphans)
+    for dst_path in result.removed:
+        print(f"Removed orphaned file: {dst_path}")
+    return result
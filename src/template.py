@@ -0,0 +1,196 @@
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
+
+from fingerprint import AssetMap
+from manifest import hash_text
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# Slot names the generator fills, any other {{ Name }} is kept as is.
+SLOTS: frozenset[str] = frozenset({"Title", "Content", "TOC"})
+INCLUDE_PATTERN = re.compile(r"\{%\s*include\s+\"([^\"]+)\"\s*%\}")
+HREF_PATTERN = re.compile(r'href="/([^"]*)"')
+SRC_PATTERN = re.compile(r'src="/([^"]*)"')
+URL_PATTERN = re.compile(r'(href|src)="/([^"]*)"')
+RELATIVE_URL_PATTERN = re.compile(r'(href|src)="([^"/#?:][^":]*)"')
+
+
+def rewrite_urls(html: str, basepath: str,
+                 assets: Optional[AssetMap] = None) -> str:
+    """
+    Root every absolute href and src attribute in html at basepath,
+    pointing references to static assets at their fingerprinted
+    paths when assets are given.
+    """
+    prefix: str = basepath.rstrip("/")
+    if assets is not None:
+        return URL_PATTERN.sub(
+                lambda match: (f'{match.group(1)}="{prefix}/'
+                               + f'{assets.resolve(match.group(2))}"'),
+                html)
+    if not prefix:
+        return html
+    html = HREF_PATTERN.sub(rf'href="{prefix}/\1"', html)
+    return SRC_PATTERN.sub(rf'src="{prefix}/\1"', html)
+
+
+def root_asset_urls(html: str, assets: AssetMap) -> str:
+    """
+    Make relative href and src attributes naming a static asset
+    absolute, so they are fingerprinted like any other reference.
+    Used for templates, which are shared by pages at every depth, so
+    a relative asset reference in them can only mean the site root.
+    """
+    def resolve(match: re.Match) -> str:
+        url_path: str = match.group(2)
+        if assets.resolve(url_path) == url_path:
+            return match.group(0)
+        return f'{match.group(1)}="/{url_path}"'
+
+    return RELATIVE_URL_PATTERN.sub(resolve, html)
+
+
+class Template:
+    """
+    A template compiled into literal parts and slots. Literal parts
+    already have their urls rooted at the base path, so rendering
+    only fills the slots and joins the parts.
+
+    Slots are written as {{ Name }} and filled by keyword, names
+    outside SLOTS are not slots and stay in the output literally.
+    Partials are pulled in with {% include "path.html" %} relative to
+    the including file.
+    """
+
+    def __init__(self, path: str, basepath: str = "/",
+                 assets: Optional[AssetMap] = None) -> None:
+        self.path = path
+        self.basepath = basepath
+        self.assets = assets
+        self.sources: list[str] = []
+        self.files: list[str] = []
+        text: str = self._expand(path, [])
+        if assets is not None:
+            text = root_asset_urls(text, assets)
+        self.digest: str = hash_text("\0".join(self.sources))
+        self.parts: list[str] = []
+        self.slots: list[tuple[int, str]] = []
+        position: int = 0
+        for match in SLOT_PATTERN.finditer(text):
+            if match.group(1) not in SLOTS:
+                continue
+            self.parts.append(rewrite_urls(text[position:match.start()],
+                                           basepath, assets))
+            self.slots.append((len(self.parts), match.group(1)))
+            self.parts.append("")
+            position = match.end()
+        self.parts.append(rewrite_urls(text[position:], basepath, assets))
+        self._slot_names: dict[int, str] = dict(self.slots)
+
+    def __repr__(self) -> str:
+        return (f"Template({self.path}, "
+                + f"{[name for _, name in self.slots]})")
+
+    def _expand(self, path: str, stack: list[str]) -> str:
+        path = os.path.abspath(path)
+        if path in stack:
+            raise ValueError(f"Recursive template include: {path}")
+        with open(path, encoding="utf-8") as f:
+            text: str = f.read()
+        self.sources.append(text)
+        self.files.append(path)
+        directory: str = os.path.dirname(path)
+        return INCLUDE_PATTERN.sub(
+                lambda match: self._expand(
+                    os.path.join(directory, match.group(1)), stack + [path]),
+                text)
+
+    def render(self, **values: str) -> str:
+        """
+        Fill every slot with the value of the same name, as is: urls
+        in rendered content are resolved when its nodes are created.
+        Slots without a value are left empty.
+        """
+        parts: list[str] = self.parts.copy()
+        for index, name in self.slots:
+            value: Optional[str] = values.get(name)
+            if value:
+                parts[index] = value
+        return "".join(parts)
+
+    def render_stream(self, write: Callable[[str], None], slot: str,
+                      fragments: Iterable[str], **values: str) -> None:
+        """
+        Write the filled template through write, streaming fragments
+        into the slot named slot as they are produced, so the value
+        of that slot never has to be held in memory as a whole. The
+        output is the same as render() with the joined fragments.
+        """
+        if sum(name == slot for _, name in self.slots) > 1:
+            raise ValueError(f"Slot {slot} can only be streamed once")
+        for index, part in enumerate(self.parts):
+            name: Optional[str] = self._slot_names.get(index)
+            if name == slot:
+                for fragment in fragments:
+                    write(fragment)
+            elif name is not None:
+                value: Optional[str] = values.get(name)
+                if value:
+                    write(value)
+            else:
+                write(part)
+
+
+_templates: dict[tuple[str, str, str], Template] = {}
+
+
+def load_template(path: str, basepath: str = "/",
+                  assets: Optional[AssetMap] = None) -> Template:
+    """
+    Compile the template at path once and reuse it for the rest
+    of the build.
+    """
+    key: tuple[str, str, str] = (os.path.abspath(path), basepath,
+                                 "" if assets is None else assets.digest)
+    template: Optional[Template] = _templates.get(key)
+    if template is None:
+        template = Template(path, basepath, assets)
+        _templates[key] = template
+    return template
+
+
+def clear_template_cache() -> None:
+    _templates.clear()
+    _layout_for_dir.cache_clear()
+
+
+def find_layout(from_path: str, content_dir: str,
+                layouts_dir: Optional[str], default: str) -> str:
+    """
+    Pick the layout for a page. A layout in layouts_dir named after a
+    content directory (layouts/blog.html for content/blog/) applies to
+    every page below it, the deepest match wins, falling back to the
+    default template.
+
+    Args:
+        from_path: Source markdown path files
+        content_dir: Source content directory path
+        layouts_dir: Directory path holding layout overrides
+        default: Template path used when no layout matches
+    """
+    if layouts_dir is None:
+        return default
+    rel_dir: str = os.path.relpath(os.path.dirname(from_path), content_dir)
+    return _layout_for_dir(layouts_dir, rel_dir, default)
+
+
+@lru_cache(maxsize=None)
+def _layout_for_dir(layouts_dir: str, rel_dir: str, default: str) -> str:
+    parts: list[str] = [] if rel_dir == "." else rel_dir.split(os.sep)
+    while parts:
+        candidate: str = os.path.join(layouts_dir, *parts) + ".html"
+        if os.path.isfile(candidate):
+            return candidate
+        parts.pop()
+    return default
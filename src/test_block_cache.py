@@ -0,0 +1,60 @@
+import unittest
+
+from block_cache import BlockCache
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_hit_and_miss(self) -> None:
+        cache: BlockCache = BlockCache()
+        self.assertIsNone(cache.get("# Title"))
+        cache.put("# Title", "<h1>Title</h1>")
+        self.assertEqual(cache.get("# Title"), ("<h1>Title</h1>", (), ()))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache: BlockCache = BlockCache(max_entries=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        cache.put("c", "<p>c</p>")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ("<p>a</p>", (), ()))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_char_budget(self) -> None:
+        cache: BlockCache = BlockCache(max_chars=20)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.put("c", "<p>c</p>")
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.chars, 20)
+        cache.put("huge", "<p>" + "x" * 100 + "</p>")
+        self.assertIsNone(cache.get("huge"))
+
+    def test_replace_keeps_size(self) -> None:
+        cache: BlockCache = BlockCache()
+        cache.put("a", "<p>a</p>")
+        cache.put("a", "<p>b</p>")
+        self.assertEqual((len(cache), cache.chars), (1, 9))
+
+    def test_links_and_terms_kept_with_html(self) -> None:
+        cache: BlockCache = BlockCache()
+        cache.put("[a](/a)", '<p><a href="/a">a</a></p>', ("/a",))
+        self.assertEqual(cache.get("[a](/a)"),
+                         ('<p><a href="/a">a</a></p>', ("/a",), ()))
+        self.assertEqual(cache.chars, 7 + 25 + 2)
+        cache.put("[ab](/a)", '<p><a href="/a">ab</a></p>', ("/a",),
+                  ("ab",))
+        self.assertEqual(cache.get("[ab](/a)")[2], ("ab",))
+        self.assertEqual(cache.chars, 34 + 8 + 26 + 2 + 2)
+
+    def test_drain_and_add_stats(self) -> None:
+        cache: BlockCache = BlockCache()
+        cache.get("a")
+        cache.put("a", "<p>a</p>")
+        cache.get("a")
+        stats = cache.drain_stats()
+        self.assertEqual(stats, (1, 1, 0))
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        cache.add_stats(stats)
+        self.assertIn("1 hits, 1 misses (50.0% hit rate)", cache.report())
@@ -0,0 +1,320 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Optional
+
+from block_cache import BlockCache
+from build import (Site, build_site, check_links, discover_pages,
+                   generate_pages_recursive)
+from context import BuildContext
+from main import parse_args
+from manifest import BuildManifest, hash_text
+from minify import MinifyStats
+from search import SearchTerms
+from test_support import TempSite
+
+TEMPLATE: str = """<html><head><title>{{ Title }}</title>
+<link href="/index.css" rel="stylesheet" /></head>
+<body>{{ Content }}</body></html>"""
+
+
+class TestGeneratePages(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.content: str = os.path.join(self.root, "content")
+        self.template: str = os.path.join(self.root, "template.html")
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\n[Blog](/blog/post)")
+        for i in range(6):
+            self.write(f"content/blog/post{i}/index.md",
+                       f"# Post {i}\n\nSome **bold** text ![img](/images/{i}.png)")
+        self.write("content/notes.txt", "not markdown")
+
+    def build(self, dest: str, jobs: int = 1,
+              manifest: Optional[BuildManifest] = None,
+              block_cache: Optional[BlockCache] = None,
+              io_jobs: int = 0,
+              stream_threshold: Optional[int] = None,
+              minify: Optional[MinifyStats] = None,
+              transforms: tuple[str, ...] = (),
+              search: Optional[SearchTerms] = None
+              ) -> tuple[str, list[str]]:
+        log = StringIO()
+        with redirect_stdout(log):
+            errors: list[str] = generate_pages_recursive(
+                    self.content, self.template, dest,
+                    BuildContext("/site", manifest, block_cache=block_cache,
+                                 stream_threshold=stream_threshold,
+                                 minify=minify, transforms=transforms,
+                                 search=search),
+                    jobs, io_jobs=io_jobs)
+        return log.getvalue(), errors
+
+    def test_discover_pages_sorted(self) -> None:
+        with redirect_stdout(StringIO()):
+            pages = discover_pages(self.content,
+                                   os.path.join(self.root, "docs"))
+        self.assertEqual(
+                [os.path.relpath(page[0], self.content) for page in pages],
+                [f"blog/post{i}/index.md" for i in range(6)] + ["index.md"])
+
+    def test_parallel_matches_serial(self) -> None:
+        serial_dest: str = os.path.join(self.root, "serial")
+        parallel_dest: str = os.path.join(self.root, "parallel")
+        serial_log, _ = self.build(serial_dest)
+        parallel_log, _ = self.build(parallel_dest, jobs=3)
+        self.assertEqual(self.read_tree(serial_dest),
+                         self.read_tree(parallel_dest))
+        self.assertEqual(serial_log.replace(serial_dest, ""),
+                         parallel_log.replace(parallel_dest, ""))
+        self.assertIn('href="/site/index.css"',
+                      self.read_tree(parallel_dest)["index.html"])
+
+    def test_block_cache_matches_uncached(self) -> None:
+        for i in range(3):
+            self.write(f"content/notes/{i}/index.md",
+                       f"# Note {i}\n\n> Shared [notice](/about)\n\n- a\n- b")
+        plain_dest: str = os.path.join(self.root, "plain")
+        self.build(plain_dest)
+        for jobs in (1, 2):
+            cache: BlockCache = BlockCache()
+            cached_dest: str = os.path.join(self.root, f"cached{jobs}")
+            self.build(cached_dest, jobs=jobs, block_cache=cache)
+            self.assertEqual(self.read_tree(plain_dest),
+                             self.read_tree(cached_dest))
+            self.assertEqual(cache.hits + cache.misses, 23)
+            if jobs == 1:
+                self.assertEqual(cache.hits, 4)
+
+    def test_pipeline_matches_serial(self) -> None:
+        serial_dest: str = os.path.join(self.root, "serial")
+        pipeline_dest: str = os.path.join(self.root, "pipeline")
+        serial_log, _ = self.build(serial_dest)
+        pipeline_log, _ = self.build(pipeline_dest, io_jobs=3)
+        self.assertEqual(self.read_tree(serial_dest),
+                         self.read_tree(pipeline_dest))
+        self.assertEqual(serial_log.replace(serial_dest, ""),
+                         pipeline_log.replace(pipeline_dest, ""))
+
+    def test_pipeline_errors_and_manifest(self) -> None:
+        self.write("content/broken/index.md", "no title here")
+        dest: str = os.path.join(self.root, "docs")
+        manifest: BuildManifest = BuildManifest(
+                os.path.join(self.root, "manifest.json"), self.root)
+        _, errors = self.build(dest, manifest=manifest, io_jobs=2)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("broken/index.md: ValueError: Heading 1 is not found.",
+                      errors[0])
+        self.assertEqual(len(manifest.pages), 7)
+        log, _ = self.build(dest, manifest=manifest, io_jobs=2)
+        self.assertEqual(log.count("Skipping unchanged page"), 7)
+
+    def test_streamed_matches_serial(self) -> None:
+        self.write("content/big/index.md",
+                   "Intro before the title\n\n# Big\nheading line\n\n"
+                   + "> quote\n> more\n\n" * 50)
+        serial_dest: str = os.path.join(self.root, "serial")
+        serial_manifest: BuildManifest = BuildManifest(
+                os.path.join(self.root, "serial.json"), self.root)
+        serial_log, _ = self.build(serial_dest, manifest=serial_manifest)
+        for io_jobs in (0, 2):
+            stream_dest: str = os.path.join(self.root, f"stream{io_jobs}")
+            stream_manifest: BuildManifest = BuildManifest(
+                    os.path.join(self.root, "stream.json"), self.root)
+            stream_log, _ = self.build(stream_dest, manifest=stream_manifest,
+                                       io_jobs=io_jobs, stream_threshold=0)
+            self.assertEqual(self.read_tree(serial_dest),
+                             self.read_tree(stream_dest))
+            self.assertEqual(serial_log.replace(serial_dest, ""),
+                             stream_log.replace(stream_dest, ""))
+            self.assertEqual(
+                    [page["inputs"] for page in serial_manifest.pages.values()],
+                    [page["inputs"] for page in stream_manifest.pages.values()])
+
+    def test_streamed_error_leaves_no_output(self) -> None:
+        self.write("content/broken/index.md", "# Broken\n\nan **open delimiter")
+        dest: str = os.path.join(self.root, "docs")
+        _, errors = self.build(dest, stream_threshold=0)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(os.listdir(os.path.join(dest, "broken")), [])
+
+    def test_minify_in_every_mode(self) -> None:
+        trees: list[dict[str, str]] = []
+        for options in ({}, {"jobs": 2}, {"io_jobs": 2},
+                        {"stream_threshold": 0}):
+            dest: str = os.path.join(self.root, f"docs{len(trees)}")
+            minify: MinifyStats = MinifyStats()
+            log, _ = self.build(dest, minify=minify, **options)
+            self.assertEqual(len(minify.files), 7)
+            self.assertEqual(log.count("Minified "), 7)
+            trees.append(self.read_tree(dest))
+        self.assertNotIn("\n<body>", trees[0]["index.html"])
+        for tree in trees[1:]:
+            self.assertEqual(tree, trees[0])
+
+    def test_streamed_minify_matches_whole_page(self) -> None:
+        self.write("template.html",
+                   "<title> {{ Title }} </title>\n<i>  {{ Content }}  </i>"
+                   + " <!-- {{ Title }}\n -->  <pre> {{ Title }} </pre>")
+        self.write("content/index.md",
+                   "# Home\n\nSome  *text*\n\n```\n a  b\n```\n\nmore")
+        trees: list[dict[str, str]] = []
+        for options in ({}, {"stream_threshold": 0}):
+            dest: str = os.path.join(self.root, f"docs{len(trees)}")
+            self.build(dest, minify=MinifyStats(), **options)
+            trees.append(self.read_tree(dest))
+        self.assertEqual(trees[1]["index.html"], trees[0]["index.html"])
+        self.assertIn("<pre> Home </pre>", trees[0]["index.html"])
+
+    def test_toc_in_every_mode(self) -> None:
+        self.write("template.html", "{{ TOC }}{{ Content }}")
+        self.write("content/guide/index.md",
+                   "# Guide\n\n## Setup\n\nText\n\n### Setup\n\nText\n\n"
+                   + "## Usage\n\n## Setup")
+        trees: list[dict[str, str]] = []
+        for options in ({}, {"jobs": 2}, {"io_jobs": 2},
+                        {"stream_threshold": 0},
+                        {"block_cache": BlockCache()}):
+            dest: str = os.path.join(self.root, f"docs{len(trees)}")
+            self.build(dest, transforms=("heading-ids", "toc"), **options)
+            trees.append(self.read_tree(dest))
+        self.assertEqual(
+                trees[0]["guide/index.html"],
+                '<nav class="toc"><ul><li><a href="#setup">Setup</a><ul>'
+                + '<li><a href="#setup-1">Setup</a></li></ul></li>'
+                + '<li><a href="#usage">Usage</a></li>'
+                + '<li><a href="#setup-2">Setup</a></li></ul></nav>'
+                + '<div><h1 id="guide">Guide</h1><h2 id="setup">Setup</h2>'
+                + '<p>Text</p><h3 id="setup-1">Setup</h3><p>Text</p>'
+                + '<h2 id="usage">Usage</h2><h2 id="setup-2">Setup</h2></div>')
+        self.assertTrue(trees[0]["index.html"].startswith("<div>"))
+        for tree in trees[1:]:
+            self.assertEqual(tree, trees[0])
+
+    def test_parallel_reports_errors(self) -> None:
+        self.write("content/broken/index.md", "no title here")
+        _, errors = self.build(os.path.join(self.root, "docs"), jobs=2)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("broken/index.md: ValueError: Heading 1 is not found.",
+                      errors[0])
+
+    def test_parallel_updates_manifest(self) -> None:
+        dest: str = os.path.join(self.root, "docs")
+        manifest: BuildManifest = BuildManifest(
+                os.path.join(self.root, "manifest.json"), self.root)
+        self.build(dest, jobs=2, manifest=manifest)
+        self.assertEqual(len(manifest.pages), 7)
+        log, _ = self.build(dest, jobs=2, manifest=manifest)
+        self.assertEqual(log.count("Skipping unchanged page"), 7)
+
+    def test_links_recorded_in_every_mode(self) -> None:
+        links: list[dict[str, list[str]]] = []
+        for options in ({}, {"jobs": 2}, {"io_jobs": 2},
+                        {"stream_threshold": 0},
+                        {"block_cache": BlockCache()}):
+            manifest: BuildManifest = BuildManifest(
+                    os.path.join(self.root, "manifest.json"), self.root)
+            self.build(os.path.join(self.root, "docs"), manifest=manifest,
+                       **options)
+            links.append({key: entry.get("links", [])
+                          for key, entry in manifest.pages.items()})
+        self.assertEqual(links[0]["content/index.md"], ["/blog/post"])
+        self.assertEqual(links[0]["content/blog/post3/index.md"],
+                         ["/images/3.png"])
+        for mode in links[1:]:
+            self.assertEqual(mode, links[0])
+
+    def test_search_terms_in_every_mode(self) -> None:
+        entries: list[dict[str, tuple[str, list[str]]]] = []
+        for options in ({}, {"jobs": 2}, {"io_jobs": 2},
+                        {"stream_threshold": 0},
+                        {"block_cache": BlockCache()}):
+            manifest: BuildManifest = BuildManifest(
+                    os.path.join(self.root, "manifest.json"), self.root)
+            self.build(os.path.join(self.root, f"docs{len(entries)}"),
+                       manifest=manifest, search=SearchTerms(), **options)
+            entries.append({key: (entry["title"], entry["terms"])
+                            for key, entry in manifest.pages.items()})
+        self.assertEqual(entries[0]["content/blog/post2/index.md"],
+                         ("Post 2", ["bold", "post", "some", "text"]))
+        for mode in entries[1:]:
+            self.assertEqual(mode, entries[0])
+
+    def test_second_build_skips_pages(self) -> None:
+        self.write("static/index.css", "body {}")
+        site: Site = Site(self.root)
+        logs: list[str] = []
+        for _ in range(2):
+            manifest: BuildManifest = BuildManifest.load(
+                    site.manifest_path(), self.root)
+            log = StringIO()
+            with redirect_stdout(log):
+                build_site(site, parse_args([]),
+                           BuildContext("/site", manifest))
+            logs.append(log.getvalue())
+        self.assertEqual(logs[0].count("Generating page"), 7)
+        self.assertEqual(logs[1].count("Skipping unchanged page"), 7)
+        self.assertNotIn("Generating page", logs[1])
+        self.assertTrue(os.path.exists(
+                os.path.join(site.dest_dir, "index.html")))
+
+    def test_switching_minify_republishes_css(self) -> None:
+        css: str = "body {\n  margin: 0;\n}\n"
+        self.write("static/index.css", css)
+        site: Site = Site(self.root)
+        for flags, expected in (([], css), (["--minify"], "body{margin:0}"),
+                                ([], css)):
+            manifest: BuildManifest = BuildManifest.load(
+                    site.manifest_path(), self.root)
+            options = parse_args(flags)
+            self.run_quietly(lambda: build_site(
+                    site, options, BuildContext(
+                        "/site", manifest,
+                        minify=MinifyStats() if options.minify else None)))
+            self.assertEqual(self.read("docs/index.css"), expected, flags)
+
+    def test_relative_fingerprinted_images(self) -> None:
+        self.write("static/blog/post0/tom.png", "post0")
+        self.write("static/blog/post1/tom.png", "post1")
+        for i in range(3):
+            self.write(f"content/blog/post{i}/index.md",
+                       f"# Post {i}\n\n![Tom](tom.png)")
+        site: Site = Site(self.root)
+        manifest: BuildManifest = BuildManifest(site.manifest_path(),
+                                                self.root)
+        log = StringIO()
+        with redirect_stdout(log):
+            errors: list[str] = build_site(
+                    site, parse_args(["--fingerprint"]),
+                    BuildContext("/site", manifest,
+                                 block_cache=BlockCache()))
+        self.assertEqual(errors, [])
+        tree: dict[str, str] = self.read_tree(site.dest_dir)
+        for i in range(2):
+            name: str = f"tom.{hash_text(f'post{i}')[:8]}.png"
+            self.assertIn(os.path.join("blog", f"post{i}", name), tree)
+            self.assertIn(f'<img src="{name}" alt="Tom">',
+                          tree[os.path.join("blog", f"post{i}",
+                                            "index.html")])
+        self.assertIn('<img src="tom.png" alt="Tom">',
+                      tree[os.path.join("blog", "post2", "index.html")])
+        self.assertIn("Broken link in content/blog/post2/index.md: tom.png",
+                      log.getvalue())
+        self.assertNotIn("post0/index.md: tom.png", log.getvalue())
+
+    def test_check_links(self) -> None:
+        self.write("content/index.md",
+                   "# Home\n\n[Post](/blog/post1) [Post](blog/post2/)"
+                   + " [Gone](/blog/gone#top) [Css](/index.css?v=1)")
+        self.write("content/blog/post0/index.md",
+                   "# Post\n\n[Up](../post1) [Up](../../missing.html)")
+        manifest: BuildManifest = BuildManifest(
+                os.path.join(self.root, "manifest.json"), self.root)
+        self.build(os.path.join(self.root, "docs"), manifest=manifest)
+        manifest.assets = ["index.css"] + [f"images/{i}.png"
+                                           for i in range(1, 6)]
+        self.assertEqual(check_links(Site(self.root), manifest), [
+                "Broken link in content/blog/post0/index.md: "
+                + "../../missing.html",
+                "Broken link in content/index.md: /blog/gone#top"])
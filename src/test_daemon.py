@@ -0,0 +1,157 @@
+import os
+import re
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+from block_cache import BlockCache
+from build import Site
+from context import BuildContext
+from daemon import (BuildDaemon, build_options, format_timings, request,
+                    socket_path)
+from main import parse_args
+from manifest import BuildManifest
+from profiling import Profiler
+from template import load_template
+from test_support import TempSite
+
+
+class TestBuildDaemon(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write("template.html", "{{ Title }}{{ Content }}")
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/index.md", "# Blog")
+        self.site: Site = Site(self.root)
+        self.daemon: BuildDaemon = self.make_daemon()
+
+    def make_daemon(self, *args: str) -> BuildDaemon:
+        return BuildDaemon(
+                self.site, parse_args(["--port", "0", *args]),
+                BuildContext("/", BuildManifest(
+                    self.site.manifest_path(), self.root), Profiler(),
+                    BlockCache()))
+
+    def handle(self, command: str, **message) -> dict:
+        return self.daemon.handle(dict(
+                message, command=command, root=self.root, basepath="/",
+                options=build_options(self.daemon.options)))
+
+    def test_build_then_rebuild(self) -> None:
+        response: dict = self.handle("build")
+        self.assertEqual(response["errors"], [])
+        self.assertEqual(response["log"].count("Generating page"), 2)
+        self.assertIn("render", response["timings"])
+        self.assertGreater(response["timings"]["total"], 0)
+        path: str = self.write("content/blog/index.md", "# Blog 2")
+        response = self.handle("rebuild", paths=[path])
+        self.assertEqual(response["log"].count("Generating page"), 1)
+        with open(os.path.join(self.root, "docs/blog/index.html"),
+                  encoding="utf-8") as f:
+            self.assertEqual(f.read(), "Blog 2<div><h1>Blog 2</h1></div>")
+        os.remove(path)
+        response = self.handle("rebuild", paths=[path])
+        self.assertIn("Removed stale page", response["log"])
+
+    def test_build_keeps_caches_warm(self) -> None:
+        self.handle("build")
+        template = load_template(self.site.template_path)
+        self.handle("build")
+        self.assertIs(load_template(self.site.template_path), template)
+        self.assertGreater(len(self.daemon.context.block_cache), 0)
+
+    def test_rejects_other_options(self) -> None:
+        response: dict = self.daemon.handle(
+                {"command": "build", "root": self.root, "basepath": "/",
+                 "options": build_options(parse_args(
+                     ["--minify", "--jobs", "2"]))})
+        self.assertFalse(response["ok"])
+        self.assertEqual(response["error"], "Daemon builds with other "
+                         + "options: --jobs, --minify")
+        self.assertFalse(self.daemon.handle(
+                {"command": "rebuild", "root": self.root,
+                 "basepath": "/"})["ok"])
+        self.assertTrue(self.daemon.handle(
+                {"command": "ping", "root": self.root,
+                 "basepath": "/"})["ok"])
+
+    def test_build_picks_up_template_edits(self) -> None:
+        self.handle("build")
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.assertEqual(self.handle("build")["errors"], [])
+        self.assertEqual(self.read("docs/index.html"),
+                         "<main><div><h1>Home</h1></div></main>")
+
+    def test_build_prunes_removed_pages(self) -> None:
+        self.handle("build")
+        os.remove(os.path.join(self.root, "content/blog/index.md"))
+        response: dict = self.handle("build")
+        self.assertIn("Removed stale page", response["log"])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "docs/blog")))
+        self.assertTrue(os.path.exists(
+                os.path.join(self.root, "docs/index.html")))
+
+    def test_build_follows_fingerprinted_assets(self) -> None:
+        self.daemon = self.make_daemon("--fingerprint")
+        self.write("content/index.md", "# Home\n\n[Style](/index.css)")
+        self.handle("build")
+        old_html: str = self.read("docs/index.html")
+        self.write("static/index.css", "body { color: red; }")
+        self.assertEqual(self.handle("build")["errors"], [])
+        html: str = self.read("docs/index.html")
+        self.assertNotEqual(html, old_html)
+        asset: str = re.search(r'href="/(index\.\w+\.css)"', html).group(1)
+        self.assertTrue(os.path.exists(os.path.join(self.root, "docs",
+                                                    asset)))
+
+    def test_rejects_other_sites_and_commands(self) -> None:
+        response: dict = self.daemon.handle(
+                {"command": "build", "root": self.root, "basepath": "/x"})
+        self.assertFalse(response["ok"])
+        self.assertIn("base path /", response["error"])
+        self.assertFalse(self.handle("deploy")["ok"])
+
+    def test_build_errors_keep_daemon_alive(self) -> None:
+        os.remove(os.path.join(self.root, "template.html"))
+        response: dict = self.handle("build")
+        self.assertTrue(response["ok"])
+        self.assertIn("FileNotFoundError", response["errors"][0])
+        self.write("template.html", "{{ Title }}")
+        self.assertEqual(self.handle("build")["errors"], [])
+
+    def test_socket_round_trip(self) -> None:
+        path: str = socket_path(self.site)
+        self.assertIsNone(request(path, {"command": "ping"}))
+        with redirect_stdout(StringIO()):
+            server = threading.Thread(target=self.daemon.serve, args=(path,))
+            server.start()
+            try:
+                for _ in range(100):
+                    response = request(path, {
+                            "command": "build", "root": self.root,
+                            "basepath": "/",
+                            "options": build_options(self.daemon.options)})
+                    if response is not None:
+                        break
+                    threading.Event().wait(0.01)
+            finally:
+                request(path, {"command": "stop", "root": self.root,
+                               "basepath": "/"})
+                server.join()
+        assert response is not None
+        self.assertEqual(response["errors"], [])
+        self.assertFalse(os.path.exists(path))
+
+    def test_format_timings(self) -> None:
+        self.assertEqual(
+                format_timings("build", {"total": 0.5, "render": 0.1,
+                                         "write": 0.3}),
+                "Daemon build: 500.0 ms (write 300.0 ms, render 100.0 ms)")
+
+    def test_client_options(self) -> None:
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit):
+            parse_args(["--rebuild", "content/index.md"])
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit):
+            parse_args(["--daemon", "--watch"])
@@ -0,0 +1,62 @@
+import json
+import os
+import unittest
+
+from fingerprint import AssetMap, fingerprint_name
+from manifest import hash_text
+from template import Template, rewrite_urls
+from test_support import TempSite
+
+
+class TestFingerprint(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("static/images/tom.png", "png")
+        self.assets: AssetMap = AssetMap.scan(
+                os.path.join(self.root, "static"))
+        self.css: str = f"index.{hash_text('body {}')[:8]}.css"
+        self.png: str = f"images/tom.{hash_text('png')[:8]}.png"
+
+    def test_fingerprint_name_eq(self) -> None:
+        self.assertEqual(fingerprint_name("images/tom.png", "3f9a1c2b77"),
+                         "images/tom.3f9a1c2b.png")
+        self.assertEqual(fingerprint_name("LICENSE", "3f9a1c2b77"),
+                         "LICENSE.3f9a1c2b")
+
+    def test_scan_eq(self) -> None:
+        self.assertEqual(self.assets.paths,
+                         {"index.css": self.css, "images/tom.png": self.png})
+        self.assertEqual(AssetMap.scan(os.path.join(self.root, "static"),
+                                       workers=2).digest,
+                         self.assets.digest)
+
+    def test_resolve_keeps_query_and_fragment(self) -> None:
+        self.assertEqual(self.assets.resolve("index.css?v=1#top"),
+                         self.css + "?v=1#top")
+        self.assertEqual(self.assets.resolve("blog/tom"), "blog/tom")
+
+    def test_rewrite_urls_eq(self) -> None:
+        self.assertEqual(
+                rewrite_urls('<img src="/images/tom.png"><a href="/blog">',
+                             "/site", self.assets),
+                f'<img src="/site/{self.png}"><a href="/site/blog">')
+        self.assertEqual(
+                rewrite_urls('<img src="/images/tom.png">', "/", self.assets),
+                f'<img src="/{self.png}">')
+
+    def test_template_relative_asset(self) -> None:
+        path: str = self.write(
+                "template.html",
+                '<link href="index.css"><a href="about">{{ Content }}')
+        template: Template = Template(path, "/site", self.assets)
+        self.assertEqual(template.render(Content="C"),
+                         f'<link href="/site/{self.css}"><a href="about">C')
+
+    def test_write_manifest(self) -> None:
+        path: str = os.path.join(self.root, "asset-manifest.json")
+        self.assets.write_manifest(path)
+        with open(path, encoding="utf-8") as f:
+            assets: dict = json.load(f)["assets"]
+        self.assertEqual(assets["index.css"],
+                         {"path": self.css, "hash": hash_text("body {}")})
@@ -1,6 +1,6 @@
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLBuffer, HTMLNode, LeafNode, ParentNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -128,3 +128,42 @@ class TestParentNode(unittest.TestCase):
                 + "</section>"
                 + "</article>"
                 + "</main>")
+
+
+class TestWriteHTML(unittest.TestCase):
+    def test_write_html_eq(self) -> None:
+        parent_node: ParentNode = ParentNode("p", [
+                LeafNode("b", "Bold"),
+                LeafNode(None, " text "),
+                ParentNode("span", [LeafNode("i", "italic")],
+                           {"class": "note"}),
+            ])
+        fragments: list[str] = []
+        parent_node.write_html(fragments.append)
+        self.assertEqual("".join(fragments), parent_node.to_html())
+        self.assertEqual(
+                parent_node.to_html(),
+                "<p><b>Bold</b> text "
+                + "<span class=\"note\"><i>italic</i></span></p>")
+
+    def test_deep_nesting(self) -> None:
+        html_node: HTMLNode = LeafNode(None, "deep")
+        for _ in range(20000):
+            html_node = ParentNode("div", [html_node])
+        html: str = html_node.to_html()
+        self.assertEqual(len(html), 20000 * len("<div></div>") + len("deep"))
+        self.assertTrue(html.startswith("<div><div>"))
+
+    def test_nested_raise_value_error(self) -> None:
+        parent_node: ParentNode = ParentNode(
+                "div", [ParentNode(None, [LeafNode("b", "Bold")])])
+        with self.assertRaisesRegex(
+                ValueError, "Parent node must have a tag!"):
+            parent_node.to_html()
+
+    def test_buffer_chunks(self) -> None:
+        buffer: HTMLBuffer = HTMLBuffer(chunk_size=3)
+        for fragment in "abcdefg":
+            buffer.write(fragment)
+        self.assertEqual(buffer.chunks, ["abc", "def"])
+        self.assertEqual(buffer.getvalue(), "abcdefg")
@@ -0,0 +1,89 @@
+import json
+import os
+import struct
+import unittest
+
+from images import ImageSizes, image_size
+from markdown_blocks import parse_document
+from test_support import TempSite
+from urls import UrlResolver
+
+PNG: bytes = (b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR"
+              + struct.pack(">II", 640, 480) + b"\x08\x06\x00\x00\x00")
+GIF: bytes = b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 8
+JPEG: bytes = (b"\xff\xd8" + b"\xff\xe0" + struct.pack(">H", 16)
+               + b"JFIF\x00" + b"\x00" * 9
+               + b"\xff\xc0" + struct.pack(">HBHH", 17, 8, 200, 300)
+               + b"\x03" + b"\x00" * 9)
+WEBP_LOSSY: bytes = (b"RIFF" + b"\x00" * 4 + b"WEBPVP8 " + b"\x00" * 4
+                     + b"\x00" * 3 + b"\x9d\x01\x2a"
+                     + struct.pack("<HH", 120, 90))
+WEBP_LOSSLESS: bytes = (b"RIFF" + b"\x00" * 4 + b"WEBPVP8L" + b"\x00" * 4
+                        + b"\x2f" + ((99) | (49 << 14)).to_bytes(4, "little")
+                        + b"\x00" * 8)
+WEBP_EXTENDED: bytes = (b"RIFF" + b"\x00" * 4 + b"WEBPVP8X" + b"\x00" * 8
+                        + (1919).to_bytes(3, "little")
+                        + (1079).to_bytes(3, "little") + b"\x00" * 2)
+
+
+class TestImageSize(TempSite, unittest.TestCase):
+    def test_formats_eq(self) -> None:
+        for name, data, size in (("a.png", PNG, (640, 480)),
+                                 ("a.gif", GIF, (32, 16)),
+                                 ("a.jpg", JPEG, (300, 200)),
+                                 ("a.webp", WEBP_LOSSY, (120, 90)),
+                                 ("b.webp", WEBP_LOSSLESS, (100, 50)),
+                                 ("c.webp", WEBP_EXTENDED, (1920, 1080))):
+            self.assertEqual(image_size(self.write(name, data)), size, name)
+
+    def test_unknown_format(self) -> None:
+        self.assertIsNone(image_size(self.write("a.png", b"not an image")))
+        self.assertIsNone(image_size(self.write("a.jpg", b"\xff\xd8\xff")))
+
+    def test_truncated_files(self) -> None:
+        for name, data, length in (("a.png", PNG, 20), ("a.gif", GIF, 8),
+                                   ("a.jpg", JPEG, 26),
+                                   ("a.webp", WEBP_LOSSY, 27),
+                                   ("b.webp", WEBP_LOSSLESS, 20),
+                                   ("c.webp", WEBP_EXTENDED, 26)):
+            self.assertIsNone(image_size(self.write(name, data[:length])),
+                              name)
+        static: str = os.path.join(self.root, "static")
+        self.write("static/a.png", PNG[:20])
+        self.write("static/b.gif", GIF)
+        self.assertEqual(ImageSizes.scan(static, os.path.join(
+                self.root, "images.json")).sizes, {"b.gif": (32, 16)})
+
+    def test_scan_uses_cache(self) -> None:
+        static: str = os.path.join(self.root, "static")
+        cache_path: str = os.path.join(self.root, "cache", "images.json")
+        self.write("static/images/a.png", PNG)
+        self.write("static/images/b.gif", GIF)
+        self.write("static/index.css", "body {}")
+        sizes: ImageSizes = ImageSizes.scan(static, cache_path)
+        self.assertEqual(sizes.sizes, {"images/a.png": (640, 480),
+                                       "images/b.gif": (32, 16)})
+        with open(cache_path, encoding="utf-8") as f:
+            cache: dict = json.load(f)
+        digest: str = cache["files"]["images/a.png"][2]
+        cache["sizes"][digest] = [1, 2]
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        self.assertEqual(ImageSizes.scan(static, cache_path).sizes,
+                         {"images/a.png": (1, 2), "images/b.gif": (32, 16)})
+        os.remove(os.path.join(static, "images/b.gif"))
+        self.assertEqual(len(ImageSizes.scan(static, cache_path).sizes), 1)
+
+    def test_image_props(self) -> None:
+        sizes: ImageSizes = ImageSizes({"images/a.png": (640, 480)})
+        self.assertEqual(
+                parse_document("![A](/images/a.png) ![B](/images/b.png)"
+                               + " ![C](https://boot.dev/c.png)"
+                               ).to_html(urls=UrlResolver(images=sizes)),
+                '<div><p><img src="/images/a.png" alt="A" width="640" '
+                + 'height="480" loading="lazy" decoding="async"></img> '
+                + '<img src="/images/b.png" alt="B" loading="lazy" '
+                + 'decoding="async"></img> <img src="https://boot.dev/c.png" '
+                + 'alt="C" loading="lazy" decoding="async"></img></p></div>')
+        self.assertEqual(sizes.size("/images/a.png?v=1"), (640, 480))
+        self.assertIsNone(sizes.size("//cdn/images/a.png"))
@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from inline_markdown import (extract_markdown_images, extract_markdown_links,
@@ -43,6 +44,51 @@ class TestTextToTextNodes(unittest.TestCase):
                              "https://i.imgur.com/fJRm4Vk.jpeg"),
                 ])
 
+    def test_empty_eq(self) -> None:
+        self.assertEqual(text_to_textnodes(""), [])
+
+    def test_link_inside_bold_eq(self) -> None:
+        self.assertEqual(
+                text_to_textnodes("**see [boot](https://boot.dev)** now"),
+                [
+                    TextNode("see ", TextType.TEXT),
+                    TextNode("boot", TextType.LINK, "https://boot.dev"),
+                    TextNode(" now", TextType.TEXT),
+                ])
+
+    def test_bold_error_takes_precedence(self) -> None:
+        with self.assertRaisesRegex(
+                ValueError, "Missing second '\\*\\*' delimiter"):
+            text_to_textnodes("_italic **bold_")
+
+    def test_code_interrupted_by_italic(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Missing second '`' delimiter"):
+            text_to_textnodes("`snake_case_name`")
+
+    def test_matches_multipass(self) -> None:
+        pieces: list[str] = ["a", " ", "*", "**", "_", "`", "[", "]", "(",
+                             ")", "!", "[x](y)", "![i](u)"]
+        rng: random.Random = random.Random(5)
+        for _ in range(5000):
+            text: str = "".join(rng.choice(pieces)
+                                for _ in range(rng.randint(0, 12)))
+            self.assertEqual(self.run_or_error(text_to_textnodes, text),
+                             self.run_or_error(self.multipass, text), text)
+
+    def multipass(self, text: str) -> list[TextNode]:
+        text_nodes: list[TextNode] = [TextNode(text, TextType.TEXT)]
+        text_nodes = split_nodes_delimiter(text_nodes, "**", TextType.BOLD)
+        text_nodes = split_nodes_delimiter(text_nodes, "_", TextType.ITALIC)
+        text_nodes = split_nodes_delimiter(text_nodes, "`", TextType.CODE)
+        text_nodes = split_nodes_image(text_nodes)
+        return split_nodes_link(text_nodes)
+
+    def run_or_error(self, func, text: str) -> list[TextNode] | str:
+        try:
+            return func(text)
+        except ValueError as e:
+            return str(e)
+
 
 class TestSplitNodesDelimiter(unittest.TestCase):
     def test_raise_value_error(self) -> None:
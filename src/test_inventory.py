@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from inventory import Inventory
+from main import parse_args
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root: str = self.tmp.name
+        for rel_path in ("index.css", "images/tom.png", "images/a/b.png",
+                         "blog/index.md", "blog/.index.md.swp", "notes~",
+                         ".git/HEAD", "empty/"):
+            path: str = os.path.join(self.root, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not rel_path.endswith("/"):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(rel_path)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_scan_walk_order_and_ignore(self) -> None:
+        inventory: Inventory = Inventory.scan(self.root,
+                                              ["*.swp", "*~", ".git"])
+        self.assertEqual(inventory.paths(),
+                         ["index.css", "blog/index.md", "images/tom.png",
+                          "images/a/b.png"])
+        self.assertEqual(sorted(inventory.dirs),
+                         ["blog", "empty", "images", "images/a"])
+
+    def test_entries_carry_stat(self) -> None:
+        inventory: Inventory = Inventory.scan(self.root)
+        entry = inventory.get("images/tom.png")
+        assert entry is not None
+        self.assertEqual(entry.path,
+                         os.path.join(self.root, "images", "tom.png"))
+        self.assertEqual(entry.st_size, len("images/tom.png"))
+        self.assertIsNone(inventory.get("notes~"))
+        self.assertIsNotNone(inventory.get(".git/HEAD"))
+
+    def test_missing_root(self) -> None:
+        inventory: Inventory = Inventory.scan(
+                os.path.join(self.root, "missing"))
+        self.assertEqual((inventory.files, inventory.dirs), ([], []))
+
+    def test_make_dirs(self) -> None:
+        dest: str = os.path.join(self.root, "out")
+        Inventory.scan(self.root, [".git"]).make_dirs(dest)
+        self.assertEqual(sorted(os.listdir(dest)),
+                         ["blog", "empty", "images"])
+        self.assertTrue(os.path.isdir(os.path.join(dest, "images/a")))
+
+    def test_ignore_option(self) -> None:
+        self.assertIn("*.swp", parse_args([]).ignore)
+        self.assertIn("drafts", parse_args(["--ignore", "drafts"]).ignore)
+        self.assertNotIn("drafts", parse_args([]).ignore)
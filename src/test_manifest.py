@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest, hash_file, hash_text
+
+
+class TestHash(unittest.TestCase):
+    def test_hash_file_eq(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path: str = os.path.join(tmp, "index.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# Heading 1")
+            self.assertEqual(hash_file(path, chunk_size=3),
+                             hash_text("# Heading 1"))
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root: str = self.tmp.name
+        self.manifest_path: str = os.path.join(self.root, "manifest.json")
+        self.source: str = os.path.join(self.root, "index.md")
+        self.output: str = os.path.join(self.root, "index.html")
+        self.inputs: dict[str, str] = {"source": "a", "template": "b"}
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def write_output(self) -> None:
+        with open(self.output, "w", encoding="utf-8") as f:
+            f.write("<html></html>")
+
+    def test_unknown_page_not_current(self) -> None:
+        manifest: BuildManifest = BuildManifest(self.manifest_path, self.root)
+        self.write_output()
+        self.assertFalse(
+                manifest.is_current(self.source, self.output, self.inputs))
+
+    def test_recorded_page_is_current_after_reload(self) -> None:
+        manifest: BuildManifest = BuildManifest(self.manifest_path, self.root)
+        self.write_output()
+        manifest.record(self.source, self.output, self.inputs)
+        manifest.save()
+        reloaded: BuildManifest = BuildManifest.load(
+                self.manifest_path, self.root)
+        self.assertTrue(
+                reloaded.is_current(self.source, self.output, self.inputs))
+
+    def test_changed_inputs_not_current(self) -> None:
+        manifest: BuildManifest = BuildManifest(self.manifest_path, self.root)
+        self.write_output()
+        manifest.record(self.source, self.output, self.inputs)
+        self.assertFalse(manifest.is_current(
+                self.source, self.output, {"source": "a", "template": "c"}))
+
+    def test_missing_output_not_current(self) -> None:
+        manifest: BuildManifest = BuildManifest(self.manifest_path, self.root)
+        manifest.record(self.source, self.output, self.inputs)
+        self.assertFalse(
+                manifest.is_current(self.source, self.output, self.inputs))
+
+    def test_prune_removes_unseen_outputs(self) -> None:
+        manifest: BuildManifest = BuildManifest(self.manifest_path, self.root)
+        self.write_output()
+        manifest.record(self.source, self.output, self.inputs)
+        manifest.save()
+        reloaded: BuildManifest = BuildManifest.load(
+                self.manifest_path, self.root)
+        self.assertEqual(reloaded.prune(self.root), [self.output])
+        self.assertFalse(os.path.exists(self.output))
+        self.assertEqual(reloaded.pages, {})
+
+    def test_prune_removes_emptied_dirs(self) -> None:
+        manifest: BuildManifest = BuildManifest(self.manifest_path, self.root)
+        self.output = os.path.join(self.root, "blog", "tom", "index.html")
+        os.makedirs(os.path.dirname(self.output))
+        self.write_output()
+        manifest.record(self.source, self.output, self.inputs)
+        manifest.seen.clear()
+        self.assertEqual(manifest.prune(self.root), [self.output])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "blog")))
+        self.assertTrue(os.path.isdir(self.root))
+
+    def test_forget_removes_emptied_dirs(self) -> None:
+        manifest: BuildManifest = BuildManifest(self.manifest_path, self.root)
+        self.output = os.path.join(self.root, "blog", "tom", "index.html")
+        os.makedirs(os.path.dirname(self.output))
+        self.write_output()
+        with open(os.path.join(self.root, "blog", "index.html"), "w",
+                  encoding="utf-8") as f:
+            f.write("<html></html>")
+        manifest.record(self.source, self.output, self.inputs)
+        self.assertEqual(manifest.forget(self.source, self.root), self.output)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "blog", "tom")))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "blog")))
+
+    def test_load_corrupt_manifest(self) -> None:
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        manifest: BuildManifest = BuildManifest.load(
+                self.manifest_path, self.root)
+        self.assertEqual(manifest.pages, {})
@@ -1,8 +1,10 @@
 import unittest
 
+from block_cache import BlockCache
 from htmlnode import HTMLNode
-from markdown_blocks import (BlockType, block_to_block_type, extract_title,
-                             markdown_to_blocks, markdown_to_html_node)
+from markdown_blocks import (BlockType, Document, block_to_block_type,
+                             extract_title, markdown_to_blocks,
+                             markdown_to_html_node, parse_document)
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -266,3 +268,51 @@ This is the same paragraph on new line
                     "This is another paragraph with _italic_ text and `code` here\nThis is the same paragraph on new line",
                     "- This is a list\n- with items",
                 ])
+
+
+class TestParseDocument(unittest.TestCase):
+    def test_title_and_blocks_eq(self) -> None:
+        markdown: str = """
+        Intro paragraph
+
+        # The Title
+
+        - item one
+        - item two
+        """
+        document: Document = parse_document(markdown)
+        self.assertEqual(document.title, "The Title")
+        self.assertEqual(
+                document.blocks,
+                [
+                    (BlockType.PARAGRAPH, "Intro paragraph"),
+                    (BlockType.HEADING, "# The Title"),
+                    (BlockType.UNORDERED_LIST, "- item one\n- item two"),
+                ])
+
+    def test_lines_eq(self) -> None:
+        markdown: str = "# Title\n\n> quote\n> more\n\n1. one\n2. two\n"
+        self.assertEqual(
+                parse_document(markdown.splitlines()).blocks,
+                parse_document(markdown).blocks)
+
+    def test_require_title_raise_value_error(self) -> None:
+        document: Document = parse_document("## Not a title")
+        self.assertIsNone(document.title)
+        with self.assertRaisesRegex(ValueError, "Heading 1 is not found."):
+            document.require_title()
+
+    def test_to_html_node_eq(self) -> None:
+        markdown: str = "# Title\n\nSome **bold** text"
+        self.assertEqual(parse_document(markdown).to_html_node().to_html(),
+                         markdown_to_html_node(markdown).to_html())
+
+    def test_to_html_cached_eq(self) -> None:
+        markdown: str = ("# Title\n\n> Shared **notice**\n\n```\ncode\n```\n\n"
+                         + "> Shared **notice**\n\n- a\n- b")
+        document: Document = parse_document(markdown)
+        cache: BlockCache = BlockCache()
+        self.assertEqual(document.to_html(cache),
+                         document.to_html_node().to_html())
+        self.assertEqual(document.to_html(cache), document.to_html())
+        self.assertEqual((cache.hits, cache.misses), (6, 4))
@@ -0,0 +1,75 @@
+import unittest
+
+from minify import HtmlMinifier, MinifyStats, minify_css, minify_html
+
+
+class TestMinifyHTML(unittest.TestCase):
+    def test_eq(self) -> None:
+        html: str = ("<!DOCTYPE html>\n<html>\n  <head>\n    <title> Home "
+                     + "</title>\n  </head>\n  <!-- note -->\n  <body>\n"
+                     + "    <p>Some   <b>bold</b>\n    text</p>\n  </body>\n"
+                     + "</html>\n")
+        self.assertEqual(
+                minify_html(html),
+                "<!DOCTYPE html><html><head><title>Home</title></head>"
+                + "<body><p>Some <b>bold</b> text</p></body></html>")
+
+    def test_keeps_pre_and_code(self) -> None:
+        html: str = ("<div>\n  <pre><code>def f():\n    return  1\n"
+                     + "</code></pre>\n  <p>use <code>a  =  b</code></p>\n"
+                     + "</div>")
+        self.assertEqual(
+                minify_html(html),
+                "<div><pre><code>def f():\n    return  1\n</code></pre>"
+                + "<p>use <code>a  =  b</code></p></div>")
+
+    def test_keeps_inline_spacing(self) -> None:
+        self.assertEqual(minify_html("<a href='/'>x</a>\n<i>y</i>"),
+                         "<a href='/'>x</a> <i>y</i>")
+
+
+class TestHtmlMinifier(unittest.TestCase):
+    def test_pieces_match_whole(self) -> None:
+        html: str = ("<html>\n <body> <p>a </p>\n <!-- <div>\n --> <i> b"
+                     + " </i>  <pre> <div> c  </pre>\n<div> d <code> e "
+                     + "</code> </div><!--[if IE]> <p> f <![endif]-->\n")
+        for size in (1, 2, 5):
+            chunks: list[str] = []
+            minifier: HtmlMinifier = HtmlMinifier(chunks.append)
+            for start in range(0, len(html), size):
+                minifier.write(html[start:start + size])
+            minifier.close()
+            self.assertEqual("".join(chunks), minify_html(html))
+            self.assertEqual(minifier.before, len(html))
+            self.assertEqual(minifier.after, len(minify_html(html)))
+            self.assertGreater(len(chunks), 2)
+
+
+class TestMinifyCSS(unittest.TestCase):
+    def test_eq(self) -> None:
+        css: str = ("/* theme */\nbody {\n  color: #fff;\n  "
+                    + "font-family: \"Luminari\",  serif;\n}\n\n"
+                    + "h1, h2 > a {\n  margin: 0 auto;\n}\n")
+        self.assertEqual(
+                minify_css(css),
+                'body{color:#fff;font-family:"Luminari",serif}'
+                + "h1,h2>a{margin:0 auto}")
+
+    def test_keeps_strings_calc_and_descendant_pseudo(self) -> None:
+        css: str = ('a :hover { content: "a ;  b /* c */"; '
+                    + "width: calc(100% - 2px); }")
+        self.assertEqual(
+                minify_css(css),
+                'a :hover{content:"a ;  b /* c */";width:calc(100% - 2px)}')
+
+
+class TestMinifyStats(unittest.TestCase):
+    def test_report(self) -> None:
+        stats: MinifyStats = MinifyStats()
+        self.assertEqual(stats.add("index.html", "<p> a </p>", "<p>a</p>"),
+                         "Minified index.html: 10 -> 8 bytes")
+        stats.extend([("index.css", 100, 60)])
+        self.assertEqual(stats.report(),
+                         "Minified 2 files: 110 -> 68 bytes, saved 42 bytes")
+        self.assertEqual(len(stats.drain()), 2)
+        self.assertEqual(stats.files, [])
@@ -0,0 +1,50 @@
+import gzip
+import os
+import unittest
+
+from precompress import ENCODERS, precompress
+from test_support import TempSite
+
+
+class TestPrecompress(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.page: str = "<p>" + "hobbit " * 500 + "</p>"
+        self.write("index.html", self.page)
+        self.write("blog/index.html", self.page)
+        self.write("index.css", "body {}")
+        self.write("images/tom.png", "png" * 1000)
+
+    def test_writes_siblings_above_threshold(self) -> None:
+        result = precompress(self.root, min_size=100)
+        self.assertEqual(len(result.compressed), 2)
+        with gzip.open(os.path.join(self.root, "index.html.gz"), "rt",
+                       encoding="utf-8") as f:
+            self.assertEqual(f.read(), self.page)
+        for suffix in ENCODERS:
+            self.assertTrue(os.path.isfile(
+                    os.path.join(self.root, "blog/index.html" + suffix)))
+        self.assertFalse(os.path.exists(
+                os.path.join(self.root, "index.css.gz")))
+        self.assertFalse(os.path.exists(
+                os.path.join(self.root, "images/tom.png.gz")))
+        self.assertEqual(result.original_bytes, 2 * len(self.page))
+        self.assertGreater(result.saved_bytes(), 0)
+
+    def test_skips_current_siblings(self) -> None:
+        precompress(self.root, min_size=100)
+        result = precompress(self.root, min_size=100, workers=2)
+        self.assertEqual((len(result.compressed), len(result.unchanged)),
+                         (0, 2))
+        self.write("index.html", self.page + "<p>more</p>")
+        os.utime(os.path.join(self.root, "index.html"), ns=(1, 1))
+        result = precompress(self.root, min_size=100, workers=2)
+        self.assertEqual(result.compressed,
+                         [os.path.join(self.root, "index.html")])
+
+    def test_removes_stale_siblings(self) -> None:
+        precompress(self.root, min_size=100)
+        os.remove(os.path.join(self.root, "blog/index.html"))
+        result = precompress(self.root, min_size=100)
+        self.assertEqual(len(result.removed), len(ENCODERS))
+        self.assertEqual(os.listdir(os.path.join(self.root, "blog")), [])
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profiling import NULL_PROFILER, Profiler
+
+
+class TestNullProfiler(unittest.TestCase):
+    def test_stage_shared_noop(self) -> None:
+        self.assertIs(NULL_PROFILER.stage("parse", "a.md"),
+                      NULL_PROFILER.stage("write"))
+        with NULL_PROFILER.stage("parse"):
+            pass
+        self.assertEqual(NULL_PROFILER.drain(), [])
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.profiler: Profiler = Profiler()
+        self.profiler.extend([
+                ("parse", "a.md", 1.0, 0.5, 0.4, 1, 1),
+                ("write", "a.md", 1.5, 0.1, 0.0, 1, 1),
+                ("parse", "b.md", 1.0, 0.2, 0.2, 2, 2),
+                ("copy", None, 0.5, 0.3, 0.1, 1, 1),
+            ])
+
+    def test_stage_records_event(self) -> None:
+        profiler: Profiler = Profiler()
+        with profiler.stage("render", "index.md"):
+            pass
+        name, page, _, wall, cpu, pid, _ = profiler.events[0]
+        self.assertEqual((name, page, pid), ("render", "index.md",
+                                             os.getpid()))
+        self.assertGreaterEqual(wall, 0)
+        self.assertGreaterEqual(cpu, 0)
+
+    def test_stage_records_on_error(self) -> None:
+        profiler: Profiler = Profiler()
+        with self.assertRaises(ValueError):
+            with profiler.stage("parse", "broken.md"):
+                raise ValueError("Heading 1 is not found.")
+        self.assertEqual(len(profiler.events), 1)
+
+    def test_stage_totals_eq(self) -> None:
+        totals = self.profiler.stage_totals()
+        self.assertEqual(totals["parse"][2], 2)
+        self.assertAlmostEqual(totals["parse"][0], 0.7)
+
+    def test_slowest_pages_eq(self) -> None:
+        slowest = self.profiler.slowest_pages(1)
+        self.assertEqual(slowest[0][0], "a.md")
+        self.assertAlmostEqual(slowest[0][1], 0.6)
+
+    def test_drain(self) -> None:
+        self.assertEqual(len(self.profiler.drain()), 4)
+        self.assertEqual(self.profiler.events, [])
+
+    def test_chrome_trace(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path: str = os.path.join(tmp, "trace.json")
+            self.profiler.write_chrome_trace(path)
+            with open(path, encoding="utf-8") as f:
+                trace: dict = json.load(f)
+        event: dict = trace["traceEvents"][0]
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["ts"], 500000.0)
+        self.assertEqual(event["dur"], 500000.0)
+        self.assertEqual(event["args"]["page"], "a.md")
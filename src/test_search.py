@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from markdown_blocks import parse_document
+from search import (SEARCH_VERSION, SearchTerms, delta_decode, delta_encode,
+                    shard_file, tokenize, write_search_index)
+
+
+class TestSearch(unittest.TestCase):
+    def test_tokenize(self) -> None:
+        self.assertEqual(list(tokenize("Hello, *World* a 42 Ünïcode")),
+                         ["hello", "world", "42", "ünïcode"])
+        self.assertEqual(list(tokenize("x" * 41)), [])
+
+    def test_delta_encoding(self) -> None:
+        self.assertEqual(delta_encode([3, 4, 10, 200]), [3, 1, 6, 190])
+        self.assertEqual(delta_decode([3, 1, 6, 190]), [3, 4, 10, 200])
+
+    def test_terms_of_cached_blocks(self) -> None:
+        document = parse_document(
+                "# Title\n\nSome [linked](/a) text\n\n```\ncode only\n```")
+        cache: BlockCache = BlockCache()
+        for _ in range(2):
+            terms: SearchTerms = SearchTerms()
+            document.to_html(cache, terms=terms)
+            self.assertEqual(terms.drain(),
+                             ["linked", "some", "text", "title"])
+            self.assertEqual(terms.drain(), [])
+        self.assertEqual(cache.hits, 3)
+        terms = SearchTerms()
+        document.to_html_node(terms=terms)
+        self.assertEqual(terms.drain(), ["linked", "some", "text", "title"])
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out: str = os.path.join(self.tmp.name, "docs/search")
+        self.state: str = os.path.join(self.tmp.name, "cache/search.json")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def read(self, name: str) -> dict:
+        with open(os.path.join(self.out, name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def write(self, pages: dict[str, list[str]]) -> list[str]:
+        result = write_search_index(
+                self.out, self.state,
+                {key: (f"/{key}/", key.title(), terms)
+                 for key, terms in pages.items()})
+        return sorted(os.path.relpath(path, self.out)
+                      for path in result.written + result.removed)
+
+    def test_shards_by_prefix(self) -> None:
+        self.write({"b": ["apple", "banana"], "a": ["apple", "avocado"],
+                    "c": ["apple"]})
+        index: dict = self.read("index.json")
+        self.assertEqual(index["pages"],
+                         [["/a/", "A"], ["/b/", "B"], ["/c/", "C"]])
+        self.assertEqual(index["shards"], {"ap": "6170.json",
+                                           "av": "6176.json",
+                                           "ba": "6261.json"})
+        self.assertEqual(self.read("6170.json"), {"apple": [0, 1, 1]})
+        self.assertEqual(self.read("6261.json"), {"banana": [1]})
+
+    def test_incremental_update(self) -> None:
+        self.write({"a": ["apple"], "b": ["banana"], "c": ["cherry"]})
+        self.assertEqual(self.write({"a": ["apple"], "b": ["banana"],
+                                     "c": ["cherry"]}), [])
+        self.assertEqual(
+                self.write({"a": ["apple"], "b": ["blueberry"],
+                            "c": ["cherry"]}),
+                ["6261.json", "626c.json", "index.json"])
+        self.assertFalse(os.path.exists(os.path.join(self.out, "6261.json")))
+        self.assertEqual(self.write({"a": ["apple"], "c": ["cherry"],
+                                     "d": ["date"]}),
+                         ["626c.json", "6461.json", "index.json"])
+        self.assertEqual(self.read("index.json")["pages"],
+                         [["/a/", "A"], ["/d/", "D"], ["/c/", "C"]])
+        self.assertEqual(self.read("6368.json"), {"cherry": [2]})
+
+    def test_rewrites_missing_files(self) -> None:
+        self.write({"a": ["apple"]})
+        os.remove(os.path.join(self.out, "6170.json"))
+        self.assertEqual(self.write({"a": ["apple"]}), ["6170.json"])
+
+    def test_encodes_shard_names(self) -> None:
+        self.assertEqual(shard_file("eä"), "65c3a4.json")
+        self.write({"a": ["eäster", "日本語"]})
+        self.assertEqual(self.read("index.json")["shards"],
+                         {"eä": "65c3a4.json", "日本": "e697a5e69cac.json"})
+        self.assertEqual(self.read("65c3a4.json"), {"eäster": [0]})
+        self.assertEqual(self.read("e697a5e69cac.json"), {"日本語": [0]})
+
+    def test_removes_files_of_older_versions(self) -> None:
+        os.makedirs(self.out)
+        with open(os.path.join(self.out, "ap.json"), "w",
+                  encoding="utf-8") as f:
+            f.write("{}")
+        os.makedirs(os.path.dirname(self.state))
+        with open(self.state, "w", encoding="utf-8") as f:
+            json.dump({"version": SEARCH_VERSION - 1, "ids": {},
+                       "files": {"ap.json": "", "index.json": ""}}, f)
+        self.assertEqual(self.write({"a": ["apple"]}),
+                         ["6170.json", "ap.json", "index.json"])
+        self.assertFalse(os.path.exists(os.path.join(self.out, "ap.json")))
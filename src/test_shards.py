@@ -0,0 +1,105 @@
+import argparse
+import os
+import unittest
+
+from build import SHARD_MANIFEST, Site, build_site, merge_shards
+from context import BuildContext
+from main import parse_args
+from manifest import BuildManifest
+from shards import parse_shard, shard_of
+from test_support import TempSite
+
+
+class TestShards(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write("template.html",
+                   '<link href="/index.css">{{ Title }}{{ Content }}')
+        self.write("static/index.css", "body {}")
+        self.write("static/images/tom.png", "png")
+        self.write("content/index.md", "# Home\n\n[Post](/blog/post3)")
+        for i in range(12):
+            self.write(f"content/blog/post{i}/index.md", f"# Post {i}")
+        self.site: Site = Site(self.root)
+
+    def run_build(self, argv: list[str]) -> tuple[str, list[str]]:
+        options: argparse.Namespace = parse_args(argv)
+        site: Site = Site(self.root)
+        if options.shard is not None:
+            site.dest_dir = site.shard_dir(options.shard)
+        context: BuildContext = BuildContext(
+                "/site", BuildManifest.load(site.manifest_path(options.shard),
+                                            self.root))
+        errors: list[str] = []
+
+        def build() -> None:
+            if options.merge is not None:
+                errors.extend(merge_shards(site, options, context,
+                                           options.merge))
+            else:
+                errors.extend(build_site(site, options, context))
+
+        return self.run_quietly(build), errors
+
+    def test_parse_shard(self) -> None:
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for value in ("4/4", "-1/2", "a/b", "3"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(value)
+
+    def test_shard_of_is_stable(self) -> None:
+        self.assertEqual([shard_of(path, 4) for path in
+                          ("index.md", "blog/tom/index.md",
+                           "contact/index.md")],
+                         [3, 0, 1])
+
+    def test_shards_partition_pages(self) -> None:
+        pages: list[set[str]] = []
+        for index in range(3):
+            self.run_build(["--shard", f"{index}/3"])
+            pages.append(set(self.read_tree(
+                    self.site.shard_dir((index, 3)))) - {SHARD_MANIFEST})
+        self.assertEqual(sum(len(shard) for shard in pages), 13)
+        self.assertEqual(len(set.union(*pages)), 13)
+
+    def test_merge_matches_full_build(self) -> None:
+        for flags in ([], ["--fingerprint"]):
+            self.run_build(["--clean"] + flags)
+            full: dict[str, str] = self.read_tree(self.site.dest_dir)
+            for index in range(3):
+                self.run_build(["--clean", "--shard", f"{index}/3"] + flags)
+            log, errors = self.run_build(["--merge", "3"] + flags)
+            self.assertEqual(errors, [])
+            self.assertIn("Merged shard 2-of-3", log)
+            self.assertNotIn("Broken link", log)
+            self.assertEqual(self.read_tree(self.site.dest_dir), full)
+
+    def test_merge_needs_only_shard_directories(self) -> None:
+        for index in range(2):
+            self.run_build(["--shard", f"{index}/2"])
+        self.assertFalse(os.path.exists(self.site.cache_dir))
+        log, errors = self.run_build(["--merge", "2", "--sitemap",
+                                      "--site-url", "https://boot.dev"])
+        self.assertEqual(errors, [])
+        self.assertIn("Sitemap: 13 urls", log)
+        self.assertNotIn(".manifest.json", self.read_tree(self.site.dest_dir))
+        self.assertEqual(len(BuildManifest.load(self.site.manifest_path(),
+                                                self.root).pages), 13)
+        os.remove(self.site.manifest_path((1, 2)))
+        _, errors = self.run_build(["--merge", "2"])
+        self.assertEqual(errors, ["Missing manifest of shard 1-of-2: "
+                                  + self.site.manifest_path((1, 2))])
+
+    def test_merge_reports_overlaps_and_missing_shards(self) -> None:
+        for index in range(2):
+            self.run_build(["--shard", f"{index}/2"])
+        self.write("static/index.html", "static home")
+        self.write(f"shards/{1 - shard_of('index.md', 2)}-of-2/index.html",
+                   "stray home")
+        _, errors = self.run_build(["--merge", "2"])
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all(error.startswith("Overlapping output index.html")
+                            for error in errors))
+        self.assertFalse(os.path.exists(self.site.dest_dir))
+        _, errors = self.run_build(["--merge", "3"])
+        self.assertEqual(errors[0][:22], "Missing shard 0-of-3: ")
@@ -0,0 +1,123 @@
+import argparse
+import os
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+from build import Site, build_site
+from context import BuildContext
+from main import parse_args
+from manifest import BuildManifest
+from sitemap import PageInfo, w3c_datetime, write_feed, write_sitemap
+from test_support import TempSite
+
+
+class TestSitemap(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.pages: list[PageInfo] = [
+            (f"/site/blog/post{i}/", f"Post {i} & more", 86400 * i)
+            for i in range(5)]
+
+    def test_w3c_datetime(self) -> None:
+        self.assertEqual(w3c_datetime(86400 * 365), "1971-01-01T00:00:00Z")
+
+    def test_single_sitemap(self) -> None:
+        urls, written = write_sitemap(self.root, "https://example.com",
+                                      self.pages, "/site")
+        self.assertEqual((urls, written),
+                         (5, [os.path.join(self.root, "sitemap.xml")]))
+        sitemap: str = self.read("sitemap.xml")
+        self.assertTrue(sitemap.startswith("<?xml"))
+        self.assertIn("<url><loc>https://example.com/site/blog/post1/</loc>"
+                      + "<lastmod>1970-01-02T00:00:00Z</lastmod></url>",
+                      sitemap)
+        self.assertTrue(sitemap.endswith("</urlset>\n"))
+
+    def test_split_under_index(self) -> None:
+        _, written = write_sitemap(self.root, "https://example.com",
+                                   self.pages, "/site", max_urls=2)
+        self.assertEqual([os.path.basename(path) for path in written],
+                         ["sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml",
+                          "sitemap.xml"])
+        index: str = self.read("sitemap.xml")
+        self.assertIn("<sitemapindex", index)
+        self.assertIn("<sitemap><loc>https://example.com/site/sitemap-3.xml"
+                      + "</loc><lastmod>1970-01-05T00:00:00Z</lastmod>"
+                      + "</sitemap>", index)
+        self.assertEqual(self.read("sitemap-3.xml").count("<url>"), 1)
+        write_sitemap(self.root, "https://example.com", self.pages[:3],
+                      "/site", max_urls=2)
+        self.assertEqual(sorted(os.listdir(self.root)),
+                         ["sitemap-1.xml", "sitemap-2.xml", "sitemap.xml"])
+        write_sitemap(self.root, "https://example.com", [], "/site")
+        self.assertEqual(os.listdir(self.root), ["sitemap.xml"])
+        self.assertNotIn("<url>", self.read("sitemap.xml"))
+
+    def test_failed_sitemap_leaves_nothing(self) -> None:
+        def pages():
+            yield self.pages[0]
+            raise ValueError("broken")
+
+        with self.assertRaises(ValueError):
+            write_sitemap(self.root, "https://example.com", pages())
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_feed(self) -> None:
+        path: str = os.path.join(self.root, "feed.xml")
+        pages: list[PageInfo] = self.pages + [
+            ("/site/blog/", "Blog", 86400 * 9),
+            ("/site/about/", "About", 86400 * 9)]
+        entries: int = write_feed(path, "https://example.com", "/site/blog/",
+                                  "Blog", pages, entries=2)
+        self.assertEqual(entries, 2)
+        feed: str = self.read("feed.xml")
+        self.assertIn('<link rel="self" '
+                      + 'href="https://example.com/site/blog/feed.xml"/>',
+                      feed)
+        self.assertIn("<updated>1970-01-05T00:00:00Z</updated>", feed)
+        self.assertIn("<title>Post 4 &amp; more</title>", feed)
+        self.assertLess(feed.index("post4"), feed.index("post3"))
+        self.assertNotIn("post2", feed)
+        self.assertNotIn("About", feed)
+
+
+class TestBuildSitemap(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.write("template.html", "{{ Title }}{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/index.md", "# The Blog")
+        for i in range(3):
+            self.write(f"content/blog/post{i}/index.md", f"# Post {i}")
+            os.utime(os.path.join(self.root,
+                                  f"content/blog/post{i}/index.md"),
+                     (86400 * i, 86400 * i))
+
+    def test_build_writes_sitemap_and_feed(self) -> None:
+        options: argparse.Namespace = parse_args(
+                ["--site-url", "https://example.com", "--sitemap",
+                 "--feed", "blog", "-j", "2"])
+        site: Site = Site(self.root)
+        for _ in range(2):
+            context: BuildContext = BuildContext(
+                    "/", BuildManifest.load(site.manifest_path(), self.root))
+            log = StringIO()
+            with redirect_stdout(log):
+                self.assertEqual(build_site(site, options, context), [])
+            self.assertIn("Sitemap: 5 urls in 1 file(s)", log.getvalue())
+        self.assertIn("Skipping unchanged page", log.getvalue())
+        with open(os.path.join(self.root, "docs/sitemap.xml"),
+                  encoding="utf-8") as f:
+            self.assertIn("<loc>https://example.com/blog/post1/</loc>"
+                          + "<lastmod>1970-01-02T00:00:00Z</lastmod>",
+                          f.read())
+        with open(os.path.join(self.root, "docs/blog/feed.xml"),
+                  encoding="utf-8") as f:
+            feed: str = f.read()
+        self.assertIn("<title>The Blog</title>", feed)
+        self.assertEqual(feed.count("<entry>"), 3)
+
+    def test_site_url_required(self) -> None:
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit):
+            parse_args(["--sitemap"])
@@ -0,0 +1,85 @@
+import os
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from minify import MinifyStats
+from static_sync import is_unchanged, sync_static
+from test_support import TempSite
+
+
+class TestSyncStatic(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.src: str = os.path.join(self.root, "static")
+        self.dst: str = os.path.join(self.root, "docs")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/tom.png", "png")
+
+    def sync(self, **kwargs):
+        with redirect_stdout(StringIO()):
+            return sync_static(self.src, self.dst, **kwargs)
+
+    def test_copies_then_skips_unchanged(self) -> None:
+        self.assertEqual(len(self.sync().copied), 2)
+        result = self.sync()
+        self.assertEqual(result.copied, [])
+        self.assertEqual(len(result.unchanged), 2)
+
+    def test_copies_changed_file(self) -> None:
+        self.sync()
+        self.write("static/index.css", "body { margin: 0 }")
+        result = self.sync()
+        self.assertEqual(result.copied,
+                         [os.path.join(self.dst, "index.css")])
+
+    def test_checksum_ignores_mtime(self) -> None:
+        self.sync()
+        os.utime(os.path.join(self.src, "index.css"), (0, 0))
+        self.assertEqual(self.sync(checksum=True).copied, [])
+
+    def test_removes_orphans_and_keeps_pages(self) -> None:
+        first = self.sync()
+        self.write("docs/index.html", "<html></html>")
+        os.remove(os.path.join(self.src, "images/tom.png"))
+        result = self.sync(previous=first.files)
+        self.assertEqual(result.removed,
+                         [os.path.join(self.dst, "images/tom.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dst, "index.html")))
+
+    def test_hardlink(self) -> None:
+        self.sync(hardlink=True)
+        src_path: str = os.path.join(self.src, "index.css")
+        dst_path: str = os.path.join(self.dst, "index.css")
+        self.assertTrue(os.path.samefile(src_path, dst_path))
+        self.assertTrue(is_unchanged(src_path, dst_path))
+
+    def test_threaded_copy(self) -> None:
+        for i in range(20):
+            self.write(f"static/images/{i}.png", str(i))
+        result = self.sync(workers=4)
+        self.assertEqual(len(result.copied), 22)
+        with open(os.path.join(self.dst, "images/7.png"),
+                  encoding="utf-8") as f:
+            self.assertEqual(f.read(), "7")
+
+    def test_renamed_files(self) -> None:
+        result = self.sync(names={"index.css": "index.abc.css"})
+        self.assertEqual(result.files, ["index.abc.css", "images/tom.png"])
+        self.assertTrue(os.path.isfile(os.path.join(self.dst,
+                                                    "index.abc.css")))
+        result = self.sync(previous=result.files)
+        self.assertEqual(result.removed,
+                         [os.path.join(self.dst, "index.abc.css")])
+
+    def test_minified_css(self) -> None:
+        self.write("static/index.css", "body {\n  margin: 0;\n}\n")
+        minify: MinifyStats = MinifyStats()
+        result = self.sync(minify=minify)
+        with open(os.path.join(self.dst, "index.css"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "body{margin:0}")
+        self.assertEqual(minify.files,
+                         [(os.path.join(self.dst, "index.css"), 22, 14)])
+        result = self.sync(minify=minify)
+        self.assertEqual(len(result.unchanged), 2)
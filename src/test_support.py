@@ -0,0 +1,68 @@
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Callable
+
+from template import clear_template_cache
+
+
+class TempSite:
+    """
+    Test case mixin giving every test a temporary root directory to
+    lay out a site in, and a fresh template cache. Mixed in ahead of
+    unittest.TestCase; it is not a TestCase itself, so discovery finds
+    no tests in this module.
+    """
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root: str = self.tmp.name
+        clear_template_cache()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        clear_template_cache()
+
+    def write(self, rel_path: str, data: str | bytes) -> str:
+        """
+        Write text or bytes to rel_path below the root, creating its
+        directories.
+
+        Returns:
+            Path of the file written
+        """
+        path: str = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(data, bytes):
+            with open(path, "wb") as f:
+                f.write(data)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+        return path
+
+    def read(self, rel_path: str) -> str:
+        with open(os.path.join(self.root, rel_path), encoding="utf-8") as f:
+            return f.read()
+
+    def read_tree(self, root: str) -> dict[str, str]:
+        """
+        Text of every file below root by its path relative to root.
+        """
+        tree: dict[str, str] = {}
+        for dir_path, _, file_names in os.walk(root):
+            for file_name in file_names:
+                path: str = os.path.join(dir_path, file_name)
+                with open(path, encoding="utf-8") as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def run_quietly(self, func: Callable[[], object]) -> str:
+        """
+        Call func, returning what it printed.
+        """
+        log = StringIO()
+        with redirect_stdout(log):
+            func()
+        return log.getvalue()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+
+from template import (Template, clear_template_cache, find_layout,
+                      load_template, rewrite_urls)
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root: str = self.tmp.name
+        clear_template_cache()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+        clear_template_cache()
+
+    def write(self, rel_path: str, text: str) -> str:
+        path: str = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_rewrite_urls_eq(self) -> None:
+        self.assertEqual(
+                rewrite_urls('<a href="/blog">x</a><img src="/a.png">'
+                             + '<a href="https://boot.dev">', "/site"),
+                '<a href="/site/blog">x</a><img src="/site/a.png">'
+                + '<a href="https://boot.dev">')
+
+    def test_render_eq(self) -> None:
+        path: str = self.write(
+                "template.html",
+                '<title>{{ Title }}</title><link href="/index.css">'
+                + "<article>{{ Content }}</article>")
+        template: Template = Template(path, "/site")
+        self.assertEqual(
+                template.render(Title="Home",
+                                Content='<a href="/blog">Blog</a>'),
+                '<title>Home</title><link href="/site/index.css">'
+                + '<article><a href="/blog">Blog</a></article>')
+
+    def test_render_stream_eq(self) -> None:
+        path: str = self.write(
+                "template.html",
+                "<title>{{ Title }}</title>{{ TOC }}<main>{{ Content }}</main>")
+        template: Template = Template(path, "/site")
+        fragments: list[str] = ["<div>", '<a href="/blog">Blog</a>', "</div>"]
+        chunks: list[str] = []
+        template.render_stream(chunks.append, "Content", iter(fragments),
+                               Title="Home")
+        self.assertEqual("".join(chunks),
+                         template.render(Title="Home",
+                                         Content="".join(fragments)))
+
+    def test_render_stream_repeated_slot(self) -> None:
+        path: str = self.write("template.html", "{{ Content }}{{ Content }}")
+        with self.assertRaisesRegex(ValueError, "streamed once"):
+            Template(path).render_stream(print, "Content", [])
+
+    def test_repeated_and_missing_slots(self) -> None:
+        path: str = self.write("template.html",
+                               "{{ Title }}|{{Title}}|{{ TOC }}")
+        self.assertEqual(Template(path).render(Title="T"), "T|T|")
+
+    def test_unknown_slots_kept(self) -> None:
+        path: str = self.write("template.html",
+                               "{{ Title }}|{{ Toc }}|{{Author}}")
+        template: Template = Template(path)
+        self.assertEqual(template.render(Title="T", Author="A"),
+                         "T|{{ Toc }}|{{Author}}")
+        chunks: list[str] = []
+        template.render_stream(chunks.append, "Content", [], Title="T")
+        self.assertEqual("".join(chunks), "T|{{ Toc }}|{{Author}}")
+
+    def test_include_partials(self) -> None:
+        self.write("partials/head.html", "<title>{{ Title }}</title>")
+        path: str = self.write(
+                "template.html",
+                '{% include "partials/head.html" %}<body>{{ Content }}</body>')
+        template: Template = Template(path)
+        self.assertEqual(template.render(Title="T", Content="C"),
+                         "<title>T</title><body>C</body>")
+
+    def test_include_changes_digest(self) -> None:
+        self.write("partials/head.html", "<title>{{ Title }}</title>")
+        path: str = self.write("template.html",
+                               '{% include "partials/head.html" %}')
+        before: str = Template(path).digest
+        self.write("partials/head.html", "<title>{{ Title }}!</title>")
+        self.assertNotEqual(Template(path).digest, before)
+
+    def test_recursive_include(self) -> None:
+        path: str = self.write("template.html",
+                               '{% include "template.html" %}')
+        with self.assertRaisesRegex(ValueError, "Recursive template include"):
+            Template(path)
+
+    def test_load_template_cached(self) -> None:
+        path: str = self.write("template.html", "{{ Content }}")
+        self.assertIs(load_template(path, "/"), load_template(path, "/"))
+        self.assertIsNot(load_template(path, "/"), load_template(path, "/a"))
+
+    def test_find_layout(self) -> None:
+        content: str = os.path.join(self.root, "content")
+        layouts: str = os.path.join(self.root, "layouts")
+        blog: str = self.write("layouts/blog.html", "blog")
+        default: str = os.path.join(self.root, "template.html")
+        self.assertEqual(
+                find_layout(os.path.join(content, "blog/tom/index.md"),
+                            content, layouts, default),
+                blog)
+        self.assertEqual(
+                find_layout(os.path.join(content, "index.md"),
+                            content, layouts, default),
+                default)
+        self.assertEqual(
+                find_layout(os.path.join(content, "contact/index.md"),
+                            content, layouts, default),
+                default)
@@ -1,6 +1,6 @@
 import unittest
 
-from htmlnode import LeafNode
+from htmlnode import HTMLNode, LeafNode
 from textnode import TextNode, TextType, text_node_to_html_node
 
 
@@ -50,3 +50,20 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
                 LeafNode("img", "",
                          {"src": "https://unsplash.com/photos/a-bunch-of-white-and-yellow-flowers-in-a-field-y-HLtKtZLqg",
                           "alt": "Beautiful daisy flowers"}))
+
+    def test_link_props_shared(self) -> None:
+        first: HTMLNode = text_node_to_html_node(
+                TextNode("One", TextType.LINK, "https://www.boot.dev"))
+        second: HTMLNode = text_node_to_html_node(
+                TextNode("Two", TextType.LINK, "https://www.boot.dev"))
+        self.assertIs(first.props, second.props)
+        with self.assertRaises(TypeError):
+            first.props["href"] = "https://example.com"
+
+
+class TestSlots(unittest.TestCase):
+    def test_no_instance_dict(self) -> None:
+        text_node: TextNode = TextNode("A normal text", TextType.TEXT)
+        self.assertFalse(hasattr(text_node, "__dict__"))
+        self.assertFalse(hasattr(text_node_to_html_node(text_node),
+                                 "__dict__"))
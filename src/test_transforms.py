@@ -0,0 +1,93 @@
+import unittest
+
+from block_cache import BlockCache
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node, parse_document
+from transforms import (HeadingIds, TableOfContents, Transform,
+                        TransformPipeline, make_pipeline, slugify)
+
+
+class CountTags(Transform):
+    name = "count"
+
+    def __init__(self) -> None:
+        self.tags_seen: list[str] = []
+
+    def visit(self, node: HTMLNode) -> None:
+        self.tags_seen.append(node.tag or "")
+
+
+class TestTransforms(unittest.TestCase):
+    def test_slugify(self) -> None:
+        self.assertEqual(slugify("Hello, World!"), "hello-world")
+        self.assertEqual(slugify("  snake_case -- and  spaces "),
+                         "snake-case-and-spaces")
+        self.assertEqual(slugify("?!"), "section")
+
+    def test_heading_ids(self) -> None:
+        node: HTMLNode = markdown_to_html_node(
+                "# Intro\n\n## Intro\n\n## Intro-1\n\n### Intro\n\n"
+                + "## The `code` part",
+                TransformPipeline([HeadingIds()]))
+        self.assertEqual(
+                [child.props["id"] for child in node.children],
+                ["intro", "intro-1", "intro-1-1", "intro-2",
+                 "the-code-part"])
+
+    def test_heading_ids_keep_existing(self) -> None:
+        heading: HTMLNode = ParentNode("h2", [LeafNode(None, "Top")],
+                                       {"id": "top", "class": "x"})
+        other: HTMLNode = ParentNode("h2", [LeafNode(None, "Top")])
+        TransformPipeline([HeadingIds()]).apply(
+                ParentNode("div", [heading, other]))
+        self.assertEqual(heading.props, {"id": "top", "class": "x"})
+        self.assertEqual(other.props, {"id": "top-1"})
+
+    def test_table_of_contents(self) -> None:
+        pipeline: TransformPipeline = make_pipeline(["toc", "heading-ids"])
+        markdown_to_html_node(
+                "# Title\n\n### Deep\n\n## One\n\n### One A\n\n"
+                + "#### One A i\n\n## Two", pipeline)
+        self.assertEqual(
+                pipeline.slots()["TOC"],
+                '<nav class="toc"><ul><li><a href="#deep">Deep</a></li>'
+                + '<li><a href="#one">One</a><ul>'
+                + '<li><a href="#one-a">One A</a><ul>'
+                + '<li><a href="#one-a-i">One A i</a></li></ul></li>'
+                + '</ul></li><li><a href="#two">Two</a></li></ul></nav>')
+
+    def test_table_of_contents_empty(self) -> None:
+        pipeline: TransformPipeline = TransformPipeline(
+                [HeadingIds(), TableOfContents()])
+        markdown_to_html_node("# Title\n\nText", pipeline)
+        self.assertEqual(pipeline.slots(), {"TOC": ""})
+
+    def test_one_walk_for_every_transform(self) -> None:
+        counter: CountTags = CountTags()
+        ids: HeadingIds = HeadingIds()
+        node: HTMLNode = markdown_to_html_node(
+                "## A **b**\n\n- item", TransformPipeline([counter, ids]))
+        self.assertEqual(counter.tags_seen,
+                         ["h2", "", "b", "ul", "li", ""])
+        self.assertEqual(node.children[0].props, {"id": "a-b"})
+
+    def test_cached_render_matches_tree(self) -> None:
+        document = parse_document("# A\n\nText\n\n## A\n\nText\n\n## A")
+        cache: BlockCache = BlockCache()
+        for _ in range(2):
+            self.assertEqual(
+                    document.to_html(cache, transforms=make_pipeline(
+                        ["heading-ids"])),
+                    document.to_html_node(
+                        transforms=make_pipeline(["heading-ids"])).to_html())
+        self.assertEqual(len(cache), 1)
+
+    def test_make_pipeline(self) -> None:
+        self.assertIsNone(make_pipeline([]))
+        self.assertEqual(
+                [type(transform) for transform
+                 in make_pipeline(["toc", "heading-ids"]).transforms],
+                [HeadingIds, TableOfContents])
+        self.assertFalse(make_pipeline(["toc"]).selects("paragraph"))
+        self.assertTrue(
+                TransformPipeline([CountTags()]).selects("paragraph"))
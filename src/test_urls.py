@@ -0,0 +1,120 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from fingerprint import AssetMap
+from manifest import hash_text
+from markdown_blocks import parse_document
+from urls import SiteIndex, UrlResolver, is_internal, page_url
+
+
+class TestUrlResolver(unittest.TestCase):
+    def test_resolve_eq(self) -> None:
+        urls: UrlResolver = UrlResolver("/site/")
+        self.assertEqual(urls.resolve("/blog"), "/site/blog")
+        self.assertEqual(urls.resolve("blog"), "blog")
+        self.assertEqual(urls.resolve("//cdn.boot.dev/a.js"),
+                         "//cdn.boot.dev/a.js")
+        self.assertEqual(UrlResolver().resolve("/blog"), "/blog")
+
+    def test_resolve_fingerprinted(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "images"))
+            with open(os.path.join(root, "images/tom.png"), "w") as f:
+                f.write("png")
+            urls: UrlResolver = UrlResolver("/site", AssetMap.scan(root))
+        self.assertEqual(urls.resolve("/images/tom.png#x"),
+                         f"/site/images/tom.{hash_text('png')[:8]}.png#x")
+        self.assertEqual(urls.resolve("/blog"), "/site/blog")
+
+    def test_resolve_relative_fingerprinted(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "blog/images"))
+            with open(os.path.join(root, "blog/images/tom.png"), "w") as f:
+                f.write("png")
+            with open(os.path.join(root, "index.css"), "w") as f:
+                f.write("css")
+            urls: UrlResolver = UrlResolver("/site", AssetMap.scan(root),
+                                            dest_dir="docs")
+        png: str = f"images/tom.{hash_text('png')[:8]}.png"
+        css: str = f"index.{hash_text('css')[:8]}.css"
+        self.assertEqual(urls.resolve("images/tom.png"), "images/tom.png")
+        urls.start_page(os.path.join("docs", "blog", "index.html"))
+        self.assertEqual(urls.resolve("images/tom.png"), png)
+        self.assertEqual(urls.resolve("../index.css?v=1"), f"../{css}?v=1")
+        self.assertEqual(urls.resolve("tom"), "tom")
+        blog_props = urls.image_props("images/tom.png", "Tom")
+        self.assertTrue(urls.depends_on_page(["tom", "images/tom.png"]))
+        urls.start_page(os.path.join("docs", "index.html"))
+        self.assertEqual(urls.resolve("index.css"), css)
+        self.assertEqual(urls.image_props("images/tom.png", "Tom")["src"],
+                         "images/tom.png")
+        self.assertEqual(blog_props["src"], png)
+        self.assertFalse(urls.depends_on_page(["images/tom.png", "/blog"]))
+
+    def test_is_internal(self) -> None:
+        self.assertTrue(is_internal("/blog"))
+        self.assertTrue(is_internal("../blog?page=2"))
+        self.assertFalse(is_internal("https://boot.dev"))
+        self.assertFalse(is_internal("mailto:tom@boot.dev"))
+        self.assertFalse(is_internal("//cdn.boot.dev"))
+        self.assertFalse(is_internal("#top"))
+
+    def test_page_url(self) -> None:
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url("blog/tom/index.html", "/site"),
+                         "/site/blog/tom/")
+        self.assertEqual(page_url("notes.html", "/site/"), "/site/notes.html")
+
+    def test_links_resolved_at_creation(self) -> None:
+        urls: UrlResolver = UrlResolver("/site")
+        html: str = parse_document(
+                "[Blog](/blog) ![Tom](/tom.png) [Boot](https://boot.dev)\n\n"
+                + '```\n<a href="/blog">\n```').to_html(urls=urls)
+        self.assertEqual(
+                html,
+                '<div><p><a href="/site/blog">Blog</a> '
+                + '<img src="/site/tom.png" alt="Tom"></img> '
+                + '<a href="https://boot.dev">Boot</a></p>'
+                + '<pre><code><a href="/blog"></code></pre></div>')
+        self.assertEqual(urls.drain_links(), ["/blog", "/tom.png"])
+        self.assertEqual(urls.links, [])
+
+    def test_props_shared_and_picklable(self) -> None:
+        urls: UrlResolver = UrlResolver("/site")
+        self.assertIs(urls.link_props("/blog"), urls.link_props("/blog"))
+        self.assertEqual(urls.links, ["/blog", "/blog"])
+        copy: UrlResolver = pickle.loads(pickle.dumps(urls))
+        self.assertEqual((copy.prefix, copy.links), ("/site", []))
+        self.assertEqual(copy.link_props("/blog")["href"], "/site/blog")
+
+
+class TestSiteIndex(unittest.TestCase):
+    def test_broken_links(self) -> None:
+        index: SiteIndex = SiteIndex()
+        index.add_page("index.html")
+        index.add_page("blog/tom/index.html")
+        index.add_page("about.html")
+        index.add_asset("index.css")
+        self.assertEqual(
+                index.broken_links("blog/tom/index.html", [
+                    "/", "/blog/tom", "/blog/tom/", "../../about.html",
+                    "/index.css?v=2", "./", "?page=2", "/blog/gone",
+                    "../jerry/", "/about"]),
+                ["/blog/gone", "../jerry/", "/about"])
+
+    def test_broken_links_fingerprinted(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            for name in ("index.css", "draft.css"):
+                with open(os.path.join(root, name), "w") as f:
+                    f.write(name)
+            assets: AssetMap = AssetMap.scan(root)
+        index: SiteIndex = SiteIndex(assets)
+        index.add_page("blog/index.html")
+        index.add_asset(assets.paths["index.css"])
+        self.assertEqual(
+                index.broken_links("blog/index.html", [
+                    "/index.css", "../index.css", "../draft.css",
+                    "/" + assets.paths["index.css"]]),
+                ["../draft.css"])
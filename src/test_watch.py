@@ -0,0 +1,70 @@
+import os
+import unittest
+
+from build import Site
+from context import BuildContext
+from main import parse_args
+from manifest import BuildManifest
+from test_support import TempSite
+from watch import SiteWatcher, diff_files
+
+
+class TestDiffFiles(unittest.TestCase):
+    def test_eq(self) -> None:
+        changed, removed = diff_files(
+                {"a": (1, 1), "b": (1, 1), "c": (1, 1)},
+                {"a": (1, 1), "b": (2, 1), "d": (1, 1)})
+        self.assertEqual(changed, {"b", "d"})
+        self.assertEqual(removed, {"c"})
+
+
+class TestSiteWatcher(TempSite, unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.site: Site = Site(self.root)
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post/index.md", "# Post")
+        manifest: BuildManifest = BuildManifest(
+                os.path.join(self.site.cache_dir, "manifest.json"),
+                self.site.root_dir)
+        self.watcher: SiteWatcher = SiteWatcher(
+                self.site, parse_args(["--port", "0"]),
+                BuildContext("/", manifest))
+        self.run_quietly(self.watcher.build)
+
+    def test_markdown_edit_regenerates_one_page(self) -> None:
+        self.write("content/blog/post/index.md", "# Edited post")
+        log: str = self.run_quietly(self.watcher.poll)
+        self.assertEqual(log.count("Generating page"), 1)
+        self.assertIn("<title>Edited post</title>",
+                      self.read("docs/blog/post/index.html"))
+
+    def test_static_edit_copies_one_file(self) -> None:
+        self.write("static/index.css", "body { margin: 0 }")
+        log: str = self.run_quietly(self.watcher.poll)
+        self.assertEqual(log.count("Copied file"), 1)
+        self.assertNotIn("Generating page", log)
+        self.assertEqual(self.read("docs/index.css"), "body { margin: 0 }")
+
+    def test_template_edit_regenerates_all_pages(self) -> None:
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        log: str = self.run_quietly(self.watcher.poll)
+        self.assertEqual(log.count("Generating page"), 2)
+        self.assertTrue(
+                self.read("docs/index.html").startswith("<h1>Home</h1>"))
+
+    def test_removed_page_deleted(self) -> None:
+        os.remove(os.path.join(self.site.content_dir, "blog/post/index.md"))
+        self.run_quietly(self.watcher.poll)
+        self.assertFalse(os.path.exists(
+                os.path.join(self.site.dest_dir, "blog/post/index.html")))
+
+    def test_poll_notifies(self) -> None:
+        generation: int = self.watcher.generation
+        self.run_quietly(self.watcher.poll)
+        self.assertEqual(self.watcher.generation, generation)
+        self.write("content/index.md", "# Home again")
+        self.run_quietly(self.watcher.poll)
+        self.assertEqual(self.watcher.generation, generation + 1)
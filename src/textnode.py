@@ -1,8 +1,10 @@
 from enum import Enum
-from types import NotImplementedType
-from typing import Optional
+from functools import lru_cache
+from types import MappingProxyType, NotImplementedType
+from typing import Mapping, Optional
 
 from htmlnode import HTMLNode, LeafNode
+from urls import UrlResolver
 
 
 class TextType(Enum):
@@ -15,6 +17,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(
             self, text: str, text_type: TextType,
             url: Optional[str] = None) -> None:
@@ -33,7 +37,29 @@ class TextNode:
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
+@lru_cache(maxsize=65536)
+def link_props(url: Optional[str]) -> Mapping[str, Optional[str]]:
+    """
+    Shared read-only props for every link to url.
+    """
+    return MappingProxyType({"href": url})
+
+
+@lru_cache(maxsize=65536)
+def image_props(url: Optional[str],
+                alt: str) -> Mapping[str, Optional[str]]:
+    """
+    Shared read-only props for every image of url with alt text.
+    """
+    return MappingProxyType({"src": url, "alt": alt})
+
+
+def text_node_to_html_node(text_node: TextNode,
+                           urls: Optional[UrlResolver] = None) -> HTMLNode:
+    """
+    Convert a text node to html, resolving link and image urls with
+    urls when given and keeping them as written otherwise.
+    """
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -44,7 +70,13 @@ def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            if urls is not None and text_node.url is not None:
+                return LeafNode("a", text_node.text,
+                                urls.link_props(text_node.url))
+            return LeafNode("a", text_node.text, link_props(text_node.url))
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url,
-                                        "alt": text_node.text})
+            if urls is not None and text_node.url is not None:
+                return LeafNode("img", "", urls.image_props(text_node.url,
+                                                            text_node.text))
+            return LeafNode("img", "", image_props(text_node.url,
+                                                   text_node.text))
@@ -0,0 +1,213 @@
+import re
+from typing import Iterable, Optional
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+
+HEADINGS: frozenset[str] = frozenset(f"h{level}" for level in range(1, 7))
+
+
+def slugify(text: str) -> str:
+    """
+    Turn the text of a heading into an id: lowercase words joined by
+    hyphens, without punctuation.
+    """
+    slug: str = re.sub(r"[^\w\s-]", "", text.lower())
+    return re.sub(r"[\s_-]+", "-", slug).strip("-") or "section"
+
+
+def node_text(node: HTMLNode) -> str:
+    """
+    Text of every leaf below node in document order, without markup.
+    """
+    parts: list[str] = []
+    stack: list[HTMLNode] = [node]
+    while stack:
+        current: HTMLNode = stack.pop()
+        if current.children is not None:
+            stack.extend(reversed(current.children))
+        elif current.value:
+            parts.append(current.value)
+    return "".join(parts)
+
+
+class Transform:
+    """
+    A change to the html tree of a page, made one node at a time as a
+    pipeline walks the tree. A transform is created for every page, so
+    it can keep state across the nodes of that page, and can fill
+    template slots once the page is done.
+
+    Pages are walked block by block, the div enclosing the blocks is
+    not visited. tags limits the nodes a transform visits, None visits
+    every node. A visit may change the node and its children, the
+    children are walked after the visit. block_types names the
+    BlockType values of the blocks whose nodes it may change, None for
+    any block: the html of other blocks is taken from the block cache
+    as is.
+    """
+
+    name: str = ""
+    tags: Optional[frozenset[str]] = None
+    block_types: Optional[frozenset[str]] = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+    def visit(self, node: HTMLNode) -> None:
+        raise NotImplementedError
+
+    def slots(self) -> dict[str, str]:
+        return {}
+
+
+class HeadingIds(Transform):
+    """
+    Give every heading an id slugged from its text. Repeated slugs get
+    a counter, like intro, intro-1, intro-2. Ids a heading already has
+    are kept.
+    """
+
+    name = "heading-ids"
+    tags = HEADINGS
+    block_types = frozenset({"heading"})
+
+    def __init__(self) -> None:
+        self.seen: dict[str, int] = {}
+
+    def visit(self, node: HTMLNode) -> None:
+        props: dict[str, str] = dict(node.props or {})
+        if "id" in props:
+            self.seen.setdefault(props["id"], 0)
+            return
+        base: str = slugify(node_text(node))
+        slug: str = base
+        if base in self.seen:
+            count: int = self.seen[base]
+            while slug in self.seen:
+                count += 1
+                slug = f"{base}-{count}"
+            self.seen[base] = count
+        self.seen[slug] = 0
+        props["id"] = slug
+        node.props = props
+
+
+class TableOfContents(Transform):
+    """
+    Collect the headings below the title that have an id and nest
+    them into a list of links, placed by the {{ TOC }} slot of the
+    template. It runs after HeadingIds, which gives headings their
+    ids.
+    """
+
+    name = "toc"
+    tags = HEADINGS - {"h1"}
+    block_types = frozenset({"heading"})
+
+    def __init__(self) -> None:
+        self.entries: list[tuple[int, str, str]] = []
+
+    def visit(self, node: HTMLNode) -> None:
+        if node.props and "id" in node.props:
+            self.entries.append((int(node.tag[1:]), node.props["id"],
+                                 node_text(node)))
+
+    def to_html_node(self) -> Optional[HTMLNode]:
+        if not self.entries:
+            return None
+        root: ParentNode = ParentNode("ul", [])
+        stack: list[tuple[int, ParentNode]] = [(self.entries[0][0], root)]
+        for level, slug, text in self.entries:
+            while len(stack) > 1 and stack[-1][0] > level:
+                stack.pop()
+            if stack[-1][0] > level:
+                stack[-1] = (level, root)
+            parent: ParentNode = stack[-1][1]
+            if level > stack[-1][0] and parent.children:
+                nested: ParentNode = ParentNode("ul", [])
+                parent.children[-1].children.append(nested)
+                stack.append((level, nested))
+                parent = nested
+            parent.children.append(ParentNode(
+                    "li", [LeafNode("a", text, {"href": f"#{slug}"})]))
+        return ParentNode("nav", [root], {"class": "toc"})
+
+    def slots(self) -> dict[str, str]:
+        node: Optional[HTMLNode] = self.to_html_node()
+        return {"TOC": "" if node is None else node.to_html()}
+
+
+# Built in transforms by name, in the order they run.
+TRANSFORMS: dict[str, type[Transform]] = {
+    HeadingIds.name: HeadingIds,
+    TableOfContents.name: TableOfContents,
+}
+
+
+class TransformPipeline:
+    """
+    Runs several transforms in a single walk of an html tree. The walk
+    uses a stack rather than recursion and hands every node to the
+    transforms visiting its tag, in the order they were given.
+    """
+
+    def __init__(self, transforms: Iterable[Transform]) -> None:
+        self.transforms: list[Transform] = list(transforms)
+        self.any_tag: list[Transform] = [transform
+                                         for transform in self.transforms
+                                         if transform.tags is None]
+        self.by_tag: dict[str, list[Transform]] = {}
+        for transform in self.transforms:
+            for tag in transform.tags or ():
+                self.by_tag.setdefault(tag, [])
+        for tag, visitors in self.by_tag.items():
+            visitors.extend(transform for transform in self.transforms
+                            if transform.tags is None
+                            or tag in transform.tags)
+        self.block_types: Optional[set[str]] = set()
+        for transform in self.transforms:
+            if transform.block_types is None:
+                self.block_types = None
+                break
+            self.block_types.update(transform.block_types)
+
+    def __repr__(self) -> str:
+        return f"TransformPipeline({self.transforms})"
+
+    def selects(self, block_type: str) -> bool:
+        """
+        Whether the nodes of blocks of the type with this value may be
+        changed, so they have to be rendered rather than cached.
+        """
+        return self.block_types is None or block_type in self.block_types
+
+    def apply(self, root: HTMLNode) -> None:
+        stack: list[HTMLNode] = [root]
+        while stack:
+            node: HTMLNode = stack.pop()
+            for transform in self.by_tag.get(node.tag or "", self.any_tag):
+                transform.visit(node)
+            if node.children is not None:
+                stack.extend(reversed(node.children))
+
+    def slots(self) -> dict[str, str]:
+        """
+        Template slot values of every transform, once the page has
+        been walked.
+        """
+        values: dict[str, str] = {}
+        for transform in self.transforms:
+            values.update(transform.slots())
+        return values
+
+
+def make_pipeline(names: Iterable[str]) -> Optional[TransformPipeline]:
+    """
+    A fresh pipeline of the built in transforms with these names, in
+    their built in order, or None when there are none.
+    """
+    wanted: set[str] = set(names)
+    if not wanted:
+        return None
+    return TransformPipeline(transform() for name, transform
+                             in TRANSFORMS.items() if name in wanted)
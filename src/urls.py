@@ -0,0 +1,232 @@
+import os
+import posixpath
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+from fingerprint import AssetMap
+from images import ImageSizes, Size
+
+
+def is_internal(url: str) -> bool:
+    """
+    Whether url points into the site: no scheme, not protocol
+    relative and not only a fragment.
+    """
+    if not url or url.startswith(("#", "//")):
+        return False
+    return ":" not in url.split("/", 1)[0]
+
+
+def url_path(url: str) -> str:
+    """
+    Path of url without its query and fragment.
+    """
+    end: int = len(url)
+    for separator in "?#":
+        index: int = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+    return url[:end]
+
+
+def page_url(output: str, basepath: str = "/") -> str:
+    """
+    Url of the page written to output, a path relative to the output
+    directory with forward slashes. index.html is left to the server.
+    """
+    if output == "index.html" or output.endswith("/index.html"):
+        output = output[:-len("index.html")]
+    return f"{basepath.rstrip('/')}/{output}"
+
+
+class UrlResolver:
+    """
+    Resolves the urls of links and images once, as their nodes are
+    created: site absolute urls are rooted at the base path and point
+    at fingerprinted assets, images get their sizes. Every internal
+    url is recorded in links, so the pages linking to something that
+    does not exist can be reported.
+
+    Relative urls naming an asset or image are resolved against the
+    directory of the page being rendered, set by start_page when the
+    output directory is known, and stay relative.
+
+    Props are shared by every link or image with the same url, like
+    link_props and image_props, within a directory for relative urls
+    naming an asset or image.
+    """
+
+    def __init__(self, basepath: str = "/",
+                 assets: Optional[AssetMap] = None,
+                 images: Optional[ImageSizes] = None,
+                 dest_dir: Optional[str] = None) -> None:
+        self.prefix: str = basepath.rstrip("/")
+        self.assets = assets
+        self.images = images
+        self.dest_dir = dest_dir
+        self.page_dir: Optional[str] = None
+        self.links: list[str] = []
+        self._link_props: dict[tuple[str, str], Mapping[str, str]] = {}
+        self._image_props: dict[tuple[str, str, str],
+                                Mapping[str, str]] = {}
+
+    def __repr__(self) -> str:
+        return f"UrlResolver({self.prefix or '/'})"
+
+    def __getstate__(self) -> dict:
+        return {"prefix": self.prefix, "assets": self.assets,
+                "images": self.images, "dest_dir": self.dest_dir,
+                "page_dir": None, "links": []}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._link_props = {}
+        self._image_props = {}
+
+    def start_page(self, dest_path: str) -> None:
+        """
+        Resolve relative urls against the directory of the page about
+        to be written to dest_path, below the output directory.
+        """
+        if self.dest_dir is None:
+            return
+        page_dir: str = os.path.relpath(os.path.dirname(dest_path),
+                                        self.dest_dir).replace(os.sep, "/")
+        self.page_dir = "" if page_dir == "." else page_dir
+
+    def page_target(self, url: str) -> Optional[str]:
+        """
+        Site relative path of the asset or image a relative url of the
+        current page names, None for any other url.
+        """
+        if (self.page_dir is None or url.startswith("/")
+                or not is_internal(url)):
+            return None
+        target: str = posixpath.normpath(
+                posixpath.join(self.page_dir, url_path(url)))
+        if ((self.assets is not None and target in self.assets.paths)
+                or (self.images is not None and target in self.images.sizes)):
+            return target
+        return None
+
+    def depends_on_page(self, links: Iterable[str]) -> bool:
+        """
+        Whether any of the links resolves differently in another
+        directory, so html containing them is not shared across pages.
+        """
+        return any(self.page_target(link) is not None for link in links)
+
+    def resolve(self, url: str) -> str:
+        if not url.startswith("/") or url.startswith("//"):
+            target: Optional[str] = self.page_target(url)
+            if target is None or self.assets is None:
+                return url
+            published: str = posixpath.relpath(self.assets.paths[target],
+                                               self.page_dir or ".")
+            return published + url[len(url_path(url)):]
+        path: str = url[1:]
+        if self.assets is not None:
+            path = self.assets.resolve(path)
+        return f"{self.prefix}/{path}"
+
+    def scope(self, url: str) -> str:
+        """
+        Directory the props of url are shared within, empty when they
+        are shared by every page.
+        """
+        if self.page_target(url) is None:
+            return ""
+        return self.page_dir or "."
+
+    def link_props(self, url: str) -> Mapping[str, str]:
+        if is_internal(url):
+            self.links.append(url)
+        key: tuple[str, str] = (self.scope(url), url)
+        props: Optional[Mapping[str, str]] = self._link_props.get(key)
+        if props is None:
+            props = MappingProxyType({"href": self.resolve(url)})
+            self._link_props[key] = props
+        return props
+
+    def image_props(self, url: str, alt: str) -> Mapping[str, str]:
+        if is_internal(url):
+            self.links.append(url)
+        key: tuple[str, str, str] = (self.scope(url), url, alt)
+        props: Optional[Mapping[str, str]] = self._image_props.get(key)
+        if props is None:
+            values: dict[str, str] = {"src": self.resolve(url), "alt": alt}
+            if self.images is not None:
+                target: Optional[str] = self.page_target(url)
+                size: Optional[Size] = self.images.size(
+                        url if target is None else f"/{target}")
+                if size is not None:
+                    values["width"] = str(size[0])
+                    values["height"] = str(size[1])
+                values["loading"] = "lazy"
+                values["decoding"] = "async"
+            props = MappingProxyType(values)
+            self._image_props[key] = props
+        return props
+
+    def drain_links(self) -> list[str]:
+        """
+        Take the internal urls recorded since the last call, the
+        links of one page.
+        """
+        links: list[str] = self.links
+        self.links = []
+        return links
+
+
+class SiteIndex:
+    """
+    Every url path the site serves, its generated pages and its
+    assets, relative to the site root. With assets, links are checked
+    against the fingerprinted paths the assets are published under.
+    """
+
+    def __init__(self, assets: Optional[AssetMap] = None) -> None:
+        self.assets = assets
+        self.paths: set[str] = set()
+
+    def __repr__(self) -> str:
+        return f"SiteIndex({len(self.paths)} paths)"
+
+    def add_page(self, rel_path: str) -> None:
+        """
+        Add a page by its output path, which for index.html pages
+        also serves the directory.
+        """
+        self.paths.add(rel_path)
+        if posixpath.basename(rel_path) == "index.html":
+            directory: str = posixpath.dirname(rel_path)
+            self.paths.add(directory)
+            self.paths.add(directory + "/")
+
+    def add_asset(self, rel_path: str) -> None:
+        self.paths.add(rel_path)
+
+    def broken_links(self, page: str, links: Iterable[str]) -> list[str]:
+        """
+        Links of the page at output path page that point at nothing
+        the site serves, in the order they appear.
+        """
+        page_dir: str = posixpath.dirname(page)
+        broken: list[str] = []
+        for link in links:
+            path: str = url_path(link)
+            if not path:
+                continue
+            if path.startswith("/"):
+                target: str = path[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(page_dir, path))
+                if target == ".":
+                    target = ""
+                elif path.endswith("/"):
+                    target += "/"
+            if self.assets is not None:
+                target = self.assets.paths.get(target, target)
+            if target not in self.paths:
+                broken.append(link)
+        return broken
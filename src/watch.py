@@ -0,0 +1,352 @@
+import argparse
+import os
+import threading
+import time
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+
+from build import (Site, build_site, check_links, compress_output,
+                   generate_pages, index_site, map_site, page_dest_path)
+from context import BuildContext
+from inventory import DEFAULT_IGNORE, Inventory
+from manifest import BuildManifest, remove_output
+from static_sync import publish_css, publish_file, remove_orphans
+from template import clear_template_cache, find_layout, load_template
+
+LIVE_RELOAD_PATH: str = "/__livereload"
+LIVE_RELOAD_SCRIPT: bytes = (
+        b'<script>new EventSource("' + LIVE_RELOAD_PATH.encode()
+        + b'").onmessage = function () { location.reload(); };</script>')
+
+FileStats = dict[str, tuple[int, int]]
+
+
+def scan_files(roots: list[str], files: list[str],
+               ignore: Iterable[str] = DEFAULT_IGNORE) -> FileStats:
+    """
+    Stat every file below roots, but those ignored, and every file
+    in files.
+
+    Returns:
+        Mapping of path to modification time and size
+    """
+    stats: FileStats = {}
+    for root in roots:
+        for entry in Inventory.scan(root, ignore):
+            stats[entry.path] = (entry.st_mtime_ns, entry.st_size)
+    for path in files:
+        try:
+            stat: os.stat_result = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stats[path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+def diff_files(old: FileStats, new: FileStats) -> tuple[set[str], set[str]]:
+    """
+    Returns:
+        Paths that were added or modified and paths that were removed
+    """
+    changed: set[str] = {path for path, stat in new.items()
+                         if old.get(path) != stat}
+    return changed, set(old) - set(new)
+
+
+def is_below(path: str, directory: str) -> bool:
+    return os.path.abspath(path).startswith(
+            os.path.join(os.path.abspath(directory), ""))
+
+
+class SiteWatcher:
+    """
+    Keeps the output of a site up to date by rebuilding only what a
+    change affects: an edited markdown file regenerates its page, a
+    static file is copied on its own, and a template, partial or
+    layout edit regenerates every page (pages whose template did not
+    change are skipped through the build manifest).
+    """
+
+    def __init__(self, site: Site, options: argparse.Namespace,
+                 context: BuildContext) -> None:
+        self.site = site
+        self.options = options
+        self.context = context
+        self.generation: int = 0
+        self.changed = threading.Condition()
+        self.stats: FileStats = {}
+        self.error: Optional[str] = None
+
+    def template_files(self) -> list[str]:
+        """
+        Files the default template and every layout are built from,
+        including their partials.
+        """
+        paths: list[str] = [self.site.template_path]
+        paths.extend(entry.path
+                     for entry in Inventory.scan(self.site.layouts_dir,
+                                                 self.options.ignore)
+                     if entry.rel_path.endswith(".html"))
+        files: list[str] = []
+        for path in paths:
+            files.extend(load_template(path, self.context.basepath,
+                                       self.context.assets).files)
+        return files
+
+    def snapshot(self) -> FileStats:
+        return scan_files(
+                [self.site.content_dir, self.site.static_dir,
+                 self.site.layouts_dir],
+                self.template_files(), self.options.ignore)
+
+    def reset(self) -> None:
+        """
+        Forget what earlier builds left in memory and is out of date:
+        compiled templates when a template file changed since the last
+        snapshot, as their cache does not notice edits, and the pages
+        seen, so pages whose source was removed are pruned. Rendered
+        blocks are dropped by build_site when the asset urls or image
+        sizes they carry change.
+        """
+        files: list[str] = self.template_files()
+        if (scan_files([], files, ())
+                != {path: self.stats[path] for path in files
+                    if path in self.stats}):
+            clear_template_cache()
+        if self.context.manifest is not None:
+            self.context.manifest.seen = set()
+
+    def build(self) -> list[str]:
+        self.reset()
+        errors: list[str] = build_site(self.site, self.options, self.context)
+        compress_output(self.site, self.options, self.context)
+        self.stats = self.snapshot()
+        self.notify()
+        return errors
+
+    def notify(self) -> None:
+        with self.changed:
+            self.generation += 1
+            self.changed.notify_all()
+
+    def poll(self) -> list[str]:
+        """
+        Check for changes once and apply them.
+
+        Returns:
+            Error messages of pages that failed to regenerate
+        """
+        try:
+            stats: FileStats = self.snapshot()
+        except (OSError, ValueError) as e:
+            error: str = f"Failed to load template: {e}"
+            clear_template_cache()
+            if error == self.error:
+                return []
+            self.error = error
+            return [error]
+        self.error = None
+        changed, removed = diff_files(self.stats, stats)
+        self.stats = stats
+        if not changed and not removed:
+            return []
+        return self.rebuild(changed, removed)
+
+    def rebuild(self, changed: set[str], removed: set[str]) -> list[str]:
+        """
+        Apply changes to the given paths, save the manifest, compress
+        the output and tell live reload clients.
+
+        Returns:
+            Error messages of pages that failed to regenerate
+        """
+        errors: list[str] = self.apply(changed, removed)
+        if self.context.manifest is not None:
+            self.context.manifest.save()
+            for line in check_links(self.site, self.context.manifest,
+                                    self.context.assets):
+                print(line)
+            index_site(self.site, self.options, self.context,
+                       self.context.manifest)
+            map_site(self.site, self.options, self.context,
+                     self.context.manifest)
+        compress_output(self.site, self.options, self.context)
+        self.notify()
+        return errors
+
+    def apply(self, changed: set[str], removed: set[str]) -> list[str]:
+        site: Site = self.site
+        if ((self.options.fingerprint or self.options.image_sizes)
+                and any(is_below(path, site.static_dir)
+                        for path in changed | removed)):
+            # Fingerprinted asset urls and image sizes are baked into
+            # every page.
+            self.reset()
+            errors: list[str] = build_site(site, self.options, self.context)
+            self.stats = self.snapshot()
+            return errors
+        template_files: set[str] = set(self.template_files())
+        templates_changed: bool = any(
+                path in template_files or is_below(path, site.layouts_dir)
+                for path in changed | removed)
+        pages: list[str] = []
+        for path in sorted(changed | removed):
+            if is_below(path, site.static_dir):
+                self.apply_static(path, path in removed)
+            elif is_below(path, site.content_dir) and path.endswith(".md"):
+                if path in removed:
+                    self.remove_page(path)
+                else:
+                    pages.append(path)
+        if templates_changed:
+            clear_template_cache()
+            self.stats = self.snapshot()
+            pages = self.all_pages()
+        return generate_pages(
+                [(path,
+                  find_layout(path, site.content_dir, site.layouts_dir,
+                              site.template_path),
+                  page_dest_path(site.content_dir, site.dest_dir, path))
+                 for path in pages],
+                self.context, self.options.jobs)
+
+    def all_pages(self) -> list[str]:
+        return sorted(path for path in self.stats
+                      if is_below(path, self.site.content_dir)
+                      and path.endswith(".md"))
+
+    def apply_static(self, path: str, removed: bool) -> None:
+        rel_path: str = os.path.relpath(path, self.site.static_dir)
+        manifest: Optional[BuildManifest] = self.context.manifest
+        if manifest is not None:
+            asset: str = rel_path.replace(os.sep, "/")
+            if asset in manifest.assets:
+                manifest.assets.remove(asset)
+            if not removed:
+                manifest.assets.append(asset)
+        if removed:
+            for removed_path in remove_orphans(self.site.dest_dir,
+                                               [rel_path]):
+                print(f"Removed orphaned file: {removed_path}")
+            return
+        dst_path: str = os.path.join(self.site.dest_dir, rel_path)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        log: Optional[str] = None
+        if self.context.minify is not None and path.endswith(".css"):
+            log = publish_css(path, dst_path, self.context.minify)
+        else:
+            publish_file(path, dst_path, self.options.hardlink)
+        print(f"Copied file: {path} to {dst_path}")
+        if log is not None:
+            print(log)
+
+    def remove_page(self, path: str) -> None:
+        output: Optional[str] = page_dest_path(
+                self.site.content_dir, self.site.dest_dir, path)
+        if self.context.manifest is not None:
+            output = self.context.manifest.forget(path, self.site.dest_dir)
+        elif os.path.exists(output):
+            remove_output(output, self.site.dest_dir)
+        else:
+            output = None
+        if output is not None:
+            print(f"Removed stale page: {output}")
+
+    def watch(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            for error in self.poll():
+                print(error)
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the output directory, injects a live reload script into
+    html pages and streams a server-sent event to them whenever the
+    watcher finishes a rebuild.
+    """
+
+    def __init__(self, *args, watcher: SiteWatcher, **kwargs) -> None:
+        self.watcher = watcher
+        super().__init__(*args, directory=watcher.site.dest_dir, **kwargs)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def translate_path(self, path: str) -> str:
+        prefix: str = self.watcher.context.basepath.rstrip("/")
+        if prefix and (path == prefix or path.startswith(prefix + "/")):
+            path = path[len(prefix):] or "/"
+        return super().translate_path(path)
+
+    def do_GET(self) -> None:
+        if self.path == LIVE_RELOAD_PATH:
+            self.stream_reloads()
+            return
+        path: str = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+        with open(path, "rb") as f:
+            body: bytes = f.read()
+        index: int = body.rfind(b"</body>")
+        if index == -1:
+            index = len(body)
+        body = body[:index] + LIVE_RELOAD_SCRIPT + body[index:]
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        watcher: SiteWatcher = self.watcher
+        with watcher.changed:
+            seen: int = watcher.generation
+        try:
+            while True:
+                with watcher.changed:
+                    watcher.changed.wait_for(
+                            lambda: watcher.generation != seen, timeout=15)
+                    generation: int = watcher.generation
+                if generation == seen:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    self.wfile.write(f"data: {generation}\n\n".encode())
+                    seen = generation
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+def watch_site(site: Site, options: argparse.Namespace,
+               context: BuildContext) -> None:
+    """
+    Build the site, serve it with live reload unless the port is 0,
+    and keep rebuilding what changes until interrupted.
+    """
+    watcher: SiteWatcher = SiteWatcher(site, options, context)
+    for error in watcher.build():
+        print(error)
+    if options.port:
+        handler = partial(LiveReloadHandler, watcher=watcher)
+        server: ThreadingHTTPServer = ThreadingHTTPServer(
+                ("", options.port), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Serving {site.dest_dir} at http://localhost:{options.port}"
+              + f"{context.basepath}")
+    print("Watching for changes, press Ctrl+C to stop.")
+    try:
+        watcher.watch(options.interval)
+    except KeyboardInterrupt:
+        pass